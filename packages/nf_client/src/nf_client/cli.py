@@ -19,6 +19,7 @@ import re
 import socket
 import subprocess
 import time
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import typer
@@ -481,7 +482,7 @@ _CMD_CURATION_BASE = (
 
 async def _ingest_rows(
     client: JobClient,
-    rows: list[dict],
+    rows: Iterable[dict],
     *,
     collection: str | None,
     limit: int | None,
@@ -491,24 +492,39 @@ async def _ingest_rows(
     Each row needs an ``ncbi_accession`` column. ``collection`` (if given) is
     used for every row; otherwise the row's ``study_name`` column names the
     collection. Rows without a real run accession are skipped (curation TSVs
-    carry placeholders like "Not applicable"). Membership goes through the
-    server's ``collection`` field — never ``metadata.cohort`` (retired).
+    carry placeholders like "Not applicable"), as are rows the server rejects.
+    Rows are streamed to ``POST /samples/bulk`` in chunks rather than one
+    request per sample. Membership goes through the server's ``collection``
+    field — never ``metadata.cohort`` (retired).
     """
-    registered = skipped = unattached = 0
-    for row in rows:
-        if limit is not None and registered >= limit:
-            break
-        acc = (row.get("ncbi_accession") or "").strip()
-        sample_id = derive_sample_id(acc)
-        if sample_id is None:
-            skipped += 1
-            continue
-        coll = collection or (row.get("study_name") or "").strip() or None
-        if coll is None:
-            unattached += 1  # registered to the catalog but in no collection
-        await client.register_sample(sample_id, ncbi_accession=acc, collection=coll)
-        registered += 1
-    return {"registered": registered, "skipped": skipped, "unattached": unattached}
+    skipped = unattached = 0
+
+    def bodies() -> Iterator[dict]:
+        nonlocal skipped, unattached
+        queued = 0
+        for row in rows:
+            if limit is not None and queued >= limit:
+                return
+            acc = (row.get("ncbi_accession") or "").strip()
+            sample_id = derive_sample_id(acc)
+            if sample_id is None:
+                skipped += 1
+                continue
+            coll = collection or (row.get("study_name") or "").strip() or None
+            if coll is None:
+                unattached += 1  # registered to the catalog but in no collection
+            body = {"sample_id": sample_id, "ncbi_accession": acc}
+            if coll:
+                body["collection"] = coll
+            queued += 1
+            yield body
+
+    result = await client.register_samples_bulk(bodies())
+    return {
+        "registered": result["created"] + result["updated"],
+        "skipped": skipped + result["invalid"],
+        "unattached": unattached,
+    }
 
 
 @app.command(name="add-samples")
@@ -529,9 +545,7 @@ def add_samples(
     import csv
 
     with tsv.open(newline="") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        rows = list(reader)
-        fieldnames = reader.fieldnames or []
+        fieldnames = csv.DictReader(f, delimiter="\t").fieldnames or []
 
     # Fail fast on the obvious misuse: no --collection and no column to fall back
     # to would silently register every sample into no collection at all.
@@ -542,11 +556,15 @@ def add_samples(
 
     async def _run() -> dict:
         cfg = _operator_config(config, server)
-        async with JobClient(cfg) as client:
-            result = await _ingest_rows(client, rows, collection=collection, limit=limit)
-            if reconcile_after:
-                result["reconcile"] = await client.reconcile()
-            return result
+        # Rows are read lazily and streamed to the server in chunks, so a
+        # whole-study TSV is never held in memory.
+        with tsv.open(newline="") as f:
+            async with JobClient(cfg) as client:
+                rows = csv.DictReader(f, delimiter="\t")
+                result = await _ingest_rows(client, rows, collection=collection, limit=limit)
+                if reconcile_after:
+                    result["reconcile"] = await client.reconcile()
+                return result
 
     payload = _run_operator(_run())
     payload["source"] = tsv.name
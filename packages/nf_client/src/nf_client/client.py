@@ -6,6 +6,9 @@ scheduler state — those decisions belong to the caller.
 """
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator, Iterable
+from itertools import islice
 from pathlib import Path
 
 import httpx
@@ -14,6 +17,11 @@ from .config import ClientConfig
 from .models import DispatchBatchResponse, SubmittedRequest
 
 
+async def _ndjson(rows: list[dict]) -> AsyncIterator[bytes]:
+    for row in rows:
+        yield (json.dumps(row) + "\n").encode()
+
+
 class JobClient:
     """Async-capable HTTP client for the dispatch protocol.
 
@@ -150,6 +158,34 @@ class JobClient:
         response.raise_for_status()
         return response.json()
 
+    async def register_samples_bulk(
+        self, rows: Iterable[dict], *, chunk_size: int = 5000
+    ) -> dict:
+        """Register (upsert) many samples via ``POST /samples/bulk``.
+
+        ``rows`` are register_sample bodies (``sample_id``, ``ncbi_accession``,
+        optional ``collection`` / ``biosample_id``) and are consumed lazily:
+        each request streams at most ``chunk_size`` of them as NDJSON, so a
+        whole-study file never sits in one request or in memory. Returns the
+        summed counts plus the server's ``invalid`` outcomes as ``errors``.
+        """
+        totals = {"received": 0, "created": 0, "updated": 0, "invalid": 0}
+        errors: list[dict] = []
+        it = iter(rows)
+        while chunk := list(islice(it, chunk_size)):
+            response = await self._client.post(
+                "samples/bulk",
+                content=_ndjson(chunk),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=300,
+            )
+            response.raise_for_status()
+            body = response.json()
+            for k in totals:
+                totals[k] += body[k]
+            errors.extend(r for r in body["results"] if r["status"] == "invalid")
+        return {**totals, "errors": errors}
+
     async def register_workflow(self, workflow: dict) -> dict:
         """Register (upsert) a workflow version. `workflow` is the POST /workflows body."""
         response = await self._client.post("workflows", json=workflow)
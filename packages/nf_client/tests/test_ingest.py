@@ -31,6 +31,19 @@ async def test_register_sample_posts_collection_not_cohort(config: ClientConfig)
     assert "metadata" not in body  # the retired cohort key must not reappear
 
 
+def _bulk_ok(request: httpx.Request) -> httpx.Response:
+    """Fake POST /samples/bulk: every row created."""
+    rows = _ndjson_rows(request)
+    results = [{"line": i + 1, "sample_id": r["sample_id"], "status": "created", "error": None}
+               for i, r in enumerate(rows)]
+    return httpx.Response(200, json={"received": len(rows), "created": len(rows), "updated": 0,
+                                     "invalid": 0, "results": results})
+
+
+def _ndjson_rows(request: httpx.Request) -> list[dict]:
+    return [json.loads(line) for line in request.content.decode().splitlines() if line]
+
+
 @pytest.mark.asyncio
 async def test_ingest_rows_skips_non_accession_and_falls_back_to_study_name(config: ClientConfig):
     rows = [
@@ -39,12 +52,13 @@ async def test_ingest_rows_skips_non_accession_and_falls_back_to_study_name(conf
         {"ncbi_accession": "SRR200;SRR201", "study_name": "StudyB"},
     ]
     with respx.mock(base_url="http://test.local") as mock:
-        route = mock.post("/samples").mock(return_value=httpx.Response(201, json={}))
+        route = mock.post("/samples/bulk").mock(side_effect=_bulk_ok)
         async with JobClient(config) as client:
             result = await _ingest_rows(client, rows, collection=None, limit=None)
 
     assert result == {"registered": 2, "skipped": 1, "unattached": 0}
-    bodies = [json.loads(c.request.content) for c in route.calls]
+    assert route.calls.last.request.headers["content-type"] == "application/x-ndjson"
+    bodies = _ndjson_rows(route.calls.last.request)
     # collection falls back to each row's study_name when --collection is not given
     assert bodies[0]["collection"] == "StudyA"
     assert bodies[1]["collection"] == "StudyB"
@@ -54,12 +68,12 @@ async def test_ingest_rows_skips_non_accession_and_falls_back_to_study_name(conf
 async def test_ingest_rows_explicit_collection_and_limit(config: ClientConfig):
     rows = [{"ncbi_accession": f"SRR{i}", "study_name": "Ignored"} for i in range(5)]
     with respx.mock(base_url="http://test.local") as mock:
-        route = mock.post("/samples").mock(return_value=httpx.Response(201, json={}))
+        route = mock.post("/samples/bulk").mock(side_effect=_bulk_ok)
         async with JobClient(config) as client:
             result = await _ingest_rows(client, rows, collection="Fixed", limit=3)
 
     assert result == {"registered": 3, "skipped": 0, "unattached": 0}
-    assert all(json.loads(c.request.content)["collection"] == "Fixed" for c in route.calls)
+    assert all(b["collection"] == "Fixed" for b in _ndjson_rows(route.calls.last.request))
 
 
 @pytest.mark.asyncio
@@ -67,9 +81,21 @@ async def test_ingest_rows_counts_unattached(config: ClientConfig):
     # No --collection and a blank study_name → registered but in no collection.
     rows = [{"ncbi_accession": "SRR1", "study_name": ""}]
     with respx.mock(base_url="http://test.local") as mock:
-        route = mock.post("/samples").mock(return_value=httpx.Response(201, json={}))
+        route = mock.post("/samples/bulk").mock(side_effect=_bulk_ok)
         async with JobClient(config) as client:
             result = await _ingest_rows(client, rows, collection=None, limit=None)
 
     assert result == {"registered": 1, "skipped": 0, "unattached": 1}
-    assert "collection" not in json.loads(route.calls.last.request.content)
+    assert "collection" not in _ndjson_rows(route.calls.last.request)[0]
+
+
+@pytest.mark.asyncio
+async def test_register_samples_bulk_chunks_and_sums(config: ClientConfig):
+    rows = [{"sample_id": f"s{i}", "ncbi_accession": f"SRR{i}"} for i in range(5)]
+    with respx.mock(base_url="http://test.local") as mock:
+        route = mock.post("/samples/bulk").mock(side_effect=_bulk_ok)
+        async with JobClient(config) as client:
+            result = await client.register_samples_bulk(iter(rows), chunk_size=2)
+
+    assert [len(_ndjson_rows(c.request)) for c in route.calls] == [2, 2, 1]
+    assert result == {"received": 5, "created": 5, "updated": 0, "invalid": 0, "errors": []}
@@ -0,0 +1,142 @@
+"""Per-route-class admission control.
+
+One API process serves weblog ingest, dispatch claims, dashboard analytics
+and log / TSV uploads. Each class gets its own SQLAlchemy pool (main.py) and
+its own gate here, so a burst of dashboard queries can't take the
+connections — or the event loop slots — that ``/telemetry`` and
+``/dispatch/batch`` need.
+
+A gate admits up to ``ADMISSION_LIMIT_<CLASS>`` requests at once, never
+more than the class has pool connections (``DB_POOL_SIZE_<CLASS>``). Beyond
+that up to ``ADMISSION_QUEUE_<CLASS>`` requests wait, each for at most
+``ADMISSION_QUEUE_TIMEOUT_SECONDS``. Anything past that fails fast with
+``503`` + ``Retry-After`` instead of queueing without bound. A limit of 0
+turns the class's gate off. ``/health``, ``/auth`` and the docs are never
+gated.
+
+``controller.snapshot()`` reports each gate's in-flight / waiting / rejected
+counts and each pool's checked-out connections (``GET /api/admin/admission``).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from .config import settings
+
+ROUTE_CLASSES = ("ingest", "dispatch", "uploads", "analytics")
+
+# POST endpoints that carry file / bulk bodies.
+_UPLOAD_PATHS = ("/api/task-logs", "/api/curated/import", "/api/samples/bulk", "/api/submissions")
+
+
+def route_class(method: str, path: str) -> str | None:
+    """The admission class for a request, or None for ungated paths."""
+    if path == "/telemetry":
+        return "ingest"
+    if not path.startswith("/api/"):
+        return None
+    if method == "POST" and path.startswith("/api/runs/") and path.endswith("/event"):
+        return "ingest"
+    if path.startswith(("/api/dispatch/", "/api/daemons/heartbeat")):
+        return "dispatch"
+    if method in ("POST", "PUT") and path.startswith(_UPLOAD_PATHS):
+        return "uploads"
+    return "analytics"
+
+
+class Saturated(Exception):
+    """The gate is full and its queue is full (or the wait timed out)."""
+
+
+class Gate:
+    def __init__(self, name: str, limit: int, queue_depth: int, timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        if self._slots.locked():
+            if self.waiting >= self.queue_depth:
+                self.rejected += 1
+                raise Saturated(self.name)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except TimeoutError:
+                self.rejected += 1
+                raise Saturated(self.name) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+
+class AdmissionController:
+    def __init__(
+        self, limits: dict[str, int], queue_depths: dict[str, int], timeout: float,
+        pool_sizes: dict[str, int] | None = None,
+    ) -> None:
+        """Gates per class; a limit above ``pool_sizes[cls]`` is clamped to it."""
+        if pool_sizes is not None:
+            limits = {cls: min(n, pool_sizes[cls]) for cls, n in limits.items()}
+        self.gates = {
+            cls: Gate(cls, limits[cls], queue_depths[cls], timeout)
+            for cls in ROUTE_CLASSES
+            if limits[cls] > 0
+        }
+        self.retry_after = max(1, math.ceil(timeout))
+        # Filled in by main.py so snapshot() can report pool usage.
+        self.pools: dict[str, AsyncEngine] = {}
+
+    def gate_for(self, method: str, path: str) -> Gate | None:
+        cls = route_class(method, path)
+        return self.gates.get(cls) if cls else None
+
+    def snapshot(self) -> dict[str, Any]:
+        gates = {
+            name: {
+                "limit": g.limit,
+                "in_flight": g.in_flight,
+                "queue_depth": g.queue_depth,
+                "waiting": g.waiting,
+                "rejected": g.rejected,
+            }
+            for name, g in self.gates.items()
+        }
+        pools: dict[str, Any] = {}
+        for name, eng in self.pools.items():
+            pool = eng.pool
+            if isinstance(pool, QueuePool):
+                pools[name] = {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                }
+        return {"gates": gates, "pools": pools}
+
+
+controller = AdmissionController(
+    settings.ADMISSION_LIMITS,
+    settings.ADMISSION_QUEUE_DEPTHS,
+    settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    settings.DB_POOL_SIZES,
+)
@@ -0,0 +1,140 @@
+"""Per-domain change generations and conditional GETs.
+
+Most dashboard polls of ``/runs``, ``/cohorts``, ``/admin/stats`` etc. come
+back with the same data as last time. ``ChangeTracker`` keeps one counter per
+domain (runs, jobs, samples, workflows, daemons). It bumps a domain's counter
+whenever a transaction that wrote one of its tables commits on a tracked
+engine. The commit might come from ingest, lifecycle transitions, sample
+registration or a daemon heartbeat; the tracker watches the SQL, not the
+call sites.
+
+main.py's middleware turns the counters of the domains a route reads into a
+weak ``ETag``. A GET whose ``If-None-Match`` still matches gets ``304`` before
+the route runs a single query.
+
+Ordering: a bump happens when the connection goes back to the pool after its
+commit, so data is always visible by the time its generation changes. Routes
+read the generation before querying, so a write landing mid-request makes
+the next poll refetch rather than pinning stale data.
+
+Writes the tracker can't see — other processes, ETL scripts, psql — and
+time-derived fields (a daemon going inactive, a run going stalled) are
+bounded by folding a ``ETAG_MAX_AGE_SECONDS`` epoch into every tag. With a
+read replica, a domain written within the last ``settle_seconds`` (the
+replica's lag bound) gets no ETag at all, so a lagging read can't be pinned
+under a new generation.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import re
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+DOMAIN_TABLES: dict[str, tuple[str, ...]] = {
+    "runs": ("telemetry", "task_executions", "workflow_runs", "task_logs"),
+    "jobs": ("jobs", "dead_letter"),
+    "samples": (
+        "samples", "sample_accessions", "collections", "collection_samples",
+        "sample_progress", "cohort_progress",
+    ),
+    "workflows": ("workflows",),
+    "daemons": ("daemon_agents",),
+}
+
+# GET path prefix -> domains its responses are derived from.
+CONDITIONAL_ROUTES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("/api/runs", ("runs", "jobs")),
+    ("/api/cohorts", ("samples", "jobs", "runs", "workflows")),
+    ("/api/samples/facets", ("samples",)),
+    ("/api/admin/stats", ("samples", "workflows", "jobs", "runs")),
+    ("/api/daemons", ("daemons",)),
+)
+
+_TABLE_DOMAIN = {t: d for d, tables in DOMAIN_TABLES.items() for t in tables}
+_WRITE = re.compile(r'\b(?:insert\s+into|update|delete\s+from)\s+"?(\w+)', re.IGNORECASE)
+
+# Keys on the pooled connection's ``info`` dict.
+_PENDING = "changes.pending"
+_COMMITTED = "changes.committed"
+
+
+@functools.lru_cache(maxsize=2048)
+def written_domains(statement: str) -> frozenset[str]:
+    """Domains whose tables ``statement`` inserts into, updates or deletes from."""
+    return frozenset(
+        _TABLE_DOMAIN[t] for t in (m.lower() for m in _WRITE.findall(statement))
+        if t in _TABLE_DOMAIN
+    )
+
+
+class ChangeTracker:
+    def __init__(self, max_age_seconds: float) -> None:
+        self.max_age_seconds = max_age_seconds
+        self.settle_seconds = 0.0
+        self.generations = {d: 0 for d in DOMAIN_TABLES}
+        self._bumped_at = {d: 0.0 for d in DOMAIN_TABLES}
+        # Restarted or different worker: never match a tag it didn't issue.
+        self._boot = f"{os.getpid():x}{int(time.time()):x}"
+
+    def bump(self, *domains: str) -> None:
+        now = time.monotonic()
+        for d in domains:
+            self.generations[d] += 1
+            self._bumped_at[d] = now
+
+    def etag(self, domains: tuple[str, ...]) -> str | None:
+        """Weak ETag for a response derived from ``domains``; None while settling."""
+        if self.settle_seconds:
+            horizon = time.monotonic() - self.settle_seconds
+            if any(self._bumped_at[d] > horizon for d in domains):
+                return None
+        epoch = int(time.time() // self.max_age_seconds) if self.max_age_seconds > 0 else 0
+        gens = ".".join(str(self.generations[d]) for d in domains)
+        return f'W/"{self._boot}-{epoch}-{gens}"'
+
+    def etag_for(self, path: str) -> str | None:
+        """ETag for a GET of ``path``, or None if the route isn't conditional."""
+        for prefix, domains in CONDITIONAL_ROUTES:
+            if path == prefix or path.startswith(prefix + "/"):
+                return self.etag(domains)
+        return None
+
+    # -- engine hooks -------------------------------------------------------
+
+    def track(self, engine: AsyncEngine) -> None:
+        """Bump domains for every committed write made through ``engine``."""
+        sync = engine.sync_engine
+
+        def after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+            domains = written_domains(statement)
+            if domains:
+                conn.info.setdefault(_PENDING, set()).update(domains)
+
+        def on_commit(conn: Any) -> None:
+            pending = conn.info.pop(_PENDING, None)
+            if pending:
+                conn.info.setdefault(_COMMITTED, set()).update(pending)
+
+        def on_rollback(conn: Any) -> None:
+            conn.info.pop(_PENDING, None)
+
+        def on_checkin(dbapi_conn: Any, record: Any) -> None:
+            record.info.pop(_PENDING, None)
+            committed = record.info.pop(_COMMITTED, None)
+            if committed:
+                self.bump(*committed)
+
+        event.listen(sync, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync, "commit", on_commit)
+        event.listen(sync, "rollback", on_rollback)
+        event.listen(sync.pool, "checkin", on_checkin)
+
+
+tracker = ChangeTracker(settings.ETAG_MAX_AGE_SECONDS)
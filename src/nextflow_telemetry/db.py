@@ -6,6 +6,9 @@ without pulling in the full FastAPI application.
 from __future__ import annotations
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Boolean,
     Column,
     DateTime,
     Float,
@@ -17,6 +20,7 @@ from sqlalchemy import (
     Table,
     Text,
     UniqueConstraint,
+    event,
     text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
@@ -81,6 +85,15 @@ task_executions_tbl = Table(
     Index("ix_task_executions_process_status", "process", "status"),
     Index("ix_task_executions_utc_time", "utc_time"),
     Index("ix_task_executions_composite_metrics", "workflow_id", "workflow_version", "status"),
+    # Cohort failure analytics (CohortService): per-sample failures by process.
+    # INCLUDE the scope columns so the per-process aggregate is index-only.
+    Index(
+        "ix_task_executions_sample_status_process",
+        "sample_id",
+        "status",
+        "process",
+        postgresql_include=["workflow_id", "workflow_version"],
+    ),
 )
 
 # ---------------------------------------------------------------------------
@@ -104,6 +117,32 @@ samples_tbl = Table(
     Index("ix_samples_biosample_id", "biosample_id"),
 )
 
+# One row per (sample, SRR run): the normalised form of samples.ncbi_accession,
+# kept in step with it by services/accessions.set_accessions. srr is indexed so
+# SRR → sample resolution is an exact btree lookup, not a substring scan.
+sample_accessions_tbl = Table(
+    "sample_accessions",
+    metadata,
+    Column("sample_id", String, ForeignKey("samples.sample_id", ondelete="CASCADE"), primary_key=True),
+    Column("srr", String, primary_key=True),
+    Index("ix_sample_accessions_srr", "srr"),
+)
+
+# Free-text sample search (list_samples ?search=) is ILIKE '%term%', which a
+# btree can't serve; a pg_trgm GIN index can. create_all (tests, fresh dev DBs)
+# needs the extension before the index.
+event.listen(
+    metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+Index(
+    "ix_samples_sample_id_trgm",
+    samples_tbl.c.sample_id,
+    postgresql_using="gin",
+    postgresql_ops={"sample_id": "gin_trgm_ops"},
+)
+
 # ---------------------------------------------------------------------------
 # Collections — named groups of samples (e.g. a BioProject, a cohort)
 # ---------------------------------------------------------------------------
@@ -127,6 +166,51 @@ collection_samples_tbl = Table(
     Column("collection_id", String, ForeignKey("collections.collection_id"), nullable=False),
     Column("sample_id", String, ForeignKey("samples.sample_id"), nullable=False),
     UniqueConstraint("collection_id", "sample_id", name="uq_collection_sample"),
+    # sample → collections lookups (membership lists, cohort joins driven from
+    # jobs/telemetry); the unique constraint only serves collection → samples.
+    Index("ix_collection_samples_sample_id", "sample_id"),
+)
+
+# ---------------------------------------------------------------------------
+# Cohort progress — materialised per-collection completion under the active
+# workflow versions, read by CohortService.leaderboard. Maintained
+# incrementally by services/cohort_progress.py: lifecycle transitions refresh
+# the touched samples' flags in sample_progress and push the deltas to every
+# collection they belong to; add_to_collection adds new members' flags.
+# Invariant: a cohort_progress row equals the sum of its members'
+# sample_progress flags (a missing sample_progress row means all-false).
+# ---------------------------------------------------------------------------
+sample_progress_tbl = Table(
+    "sample_progress",
+    metadata,
+    Column("sample_id", String, ForeignKey("samples.sample_id", ondelete="CASCADE"), primary_key=True),
+    Column("completed", Boolean, nullable=False, server_default=text("false")),
+    Column("failed", Boolean, nullable=False, server_default=text("false")),
+    Column("running", Boolean, nullable=False, server_default=text("false")),
+    Column("last_completed_at", DateTime(timezone=True), nullable=True),
+)
+
+cohort_progress_tbl = Table(
+    "cohort_progress",
+    metadata,
+    Column("collection_id", String, ForeignKey("collections.collection_id", ondelete="CASCADE"),
+           primary_key=True),
+    Column("sample_count", Integer, nullable=False, server_default=text("0")),
+    Column("samples_completed", Integer, nullable=False, server_default=text("0")),
+    Column("samples_failed", Integer, nullable=False, server_default=text("0")),
+    Column("samples_running", Integer, nullable=False, server_default=text("0")),
+    Column("last_completed_at", DateTime(timezone=True), nullable=True),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=text("now()")),
+)
+
+# Workflows whose active version set changed and whose samples' progress
+# flags still need a resync. Written in the registry change's transaction,
+# deleted once the resync has run, so a restart doesn't lose pending work.
+cohort_resync_queue_tbl = Table(
+    "cohort_resync_queue",
+    metadata,
+    Column("workflow_id", String, primary_key=True),
+    Column("queued_at", DateTime(timezone=True), nullable=False, server_default=text("now()")),
 )
 
 # ---------------------------------------------------------------------------
@@ -157,6 +241,33 @@ submissions_tbl = Table(
     Index("ix_submissions_created_at", "created_at"),
 )
 
+# ---------------------------------------------------------------------------
+# ENA filereport cache — per (accession, field list) the current generation
+# and the HTTP validators for conditional revalidation; the raw TSV lives in
+# ena_report_chunks, a bounded run of lines per row, written as the report
+# streams in. See services/ena_cache.py.
+# ---------------------------------------------------------------------------
+ena_reports_tbl = Table(
+    "ena_reports",
+    metadata,
+    Column("accession", String, primary_key=True),
+    Column("fields", String, primary_key=True),
+    Column("generation", BigInteger, nullable=False),
+    Column("etag", String, nullable=True),
+    Column("last_modified", String, nullable=True),
+    Column("fetched_at", DateTime(timezone=True), nullable=False),
+)
+
+ena_report_chunks_tbl = Table(
+    "ena_report_chunks",
+    metadata,
+    Column("accession", String, primary_key=True),
+    Column("fields", String, primary_key=True),
+    Column("generation", BigInteger, primary_key=True),
+    Column("seq", Integer, primary_key=True),
+    Column("body", Text, nullable=False),  # report lines joined by "\n"
+)
+
 # ---------------------------------------------------------------------------
 # Workflow registry — one row per (workflow_id, version) pair
 # revision is intentionally mutable: the composite job key is
@@ -217,6 +328,16 @@ jobs_tbl = Table(
     Index("ix_jobs_status", "status"),
     Index("ix_jobs_sample_id", "sample_id"),
     Index("ix_jobs_composite", "sample_id", "workflow_id", "workflow_version"),
+    # ETL backlog scan: completed jobs of one (workflow, version), oldest
+    # first; sample_id included so the anti-join is index-only.
+    Index(
+        "ix_jobs_completed_by_version",
+        "workflow_id",
+        "workflow_version",
+        "completed_at",
+        postgresql_include=["sample_id"],
+        postgresql_where=text("status = 'completed'"),
+    ),
 )
 
 # ---------------------------------------------------------------------------
@@ -311,6 +432,14 @@ curated_sample_annotations_tbl = Table(
     UniqueConstraint("sample_id", "study_name", name="uq_csa_sample_study"),
     Index("ix_csa_sample_id", "sample_id"),
     Index("ix_csa_study_name", "study_name"),
+    # Attribute filters are `metadata_ @> '{"disease": "IBD"}'`; jsonb_path_ops
+    # only supports containment but is smaller and faster than jsonb_ops for it.
+    Index(
+        "ix_csa_metadata_path_ops",
+        "metadata_",
+        postgresql_using="gin",
+        postgresql_ops={"metadata_": "jsonb_path_ops"},
+    ),
 )
 
 # ---------------------------------------------------------------------------
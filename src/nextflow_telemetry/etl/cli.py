@@ -4,7 +4,10 @@
   nf-etl parse   --sample <id>      dry-run: per-table row counts (no DB/lake)
   nf-etl ingest  [--limit N]        ingest pending completed samples
   nf-etl tick    [--threshold 500]  ingest iff backlog >= threshold or age fallback
+  nf-etl follow  [--batch 25]       long-running: ingest on job-completion NOTIFY
   nf-etl freeze  --out cmgd.duckdb  publish a frozen DuckDB-catalog snapshot
+  nf-etl partition [--rewrite]      set partition keys (workflow/version/data_type)
+  nf-etl compact [--expire-days N]  merge small files, expire old snapshots
 """
 from __future__ import annotations
 
@@ -12,6 +15,8 @@ import argparse
 import asyncio
 import json
 import shutil
+import sys
+import time
 from collections import defaultdict
 
 import duckdb
@@ -68,21 +73,14 @@ async def cmd_tick(a) -> None:
     pg = await watermark.connect()
     await watermark.ensure_table(pg)
     version = await _version(pg, a.workflow, a.version)
-    backlog = await watermark.backlog_count(pg, a.workflow, version)
-    oldest_h = await pg.fetchval(
-        """
-        SELECT extract(epoch FROM (now() - min(j.completed_at))) / 3600 FROM jobs j
-        WHERE j.status = 'completed' AND j.workflow_id = $1 AND j.workflow_version = $2
-          AND NOT EXISTS (SELECT 1 FROM etl_ingested e WHERE e.sample_id = j.sample_id
-              AND e.workflow_id = j.workflow_id AND e.workflow_version = j.workflow_version)
-        """, a.workflow, version)
+    b = await watermark.backlog(pg, a.workflow, version, limit=a.batch)
+    backlog, oldest_h, sids = b["count"], b["oldest_hours"], b["sample_ids"]
     trigger = backlog >= a.threshold or (backlog > 0 and oldest_h and oldest_h >= a.max_age_hours)
     if not trigger:
         age = f"{oldest_h:.1f}h" if oldest_h else "-"
         print(f"backlog {backlog} < {a.threshold} (oldest {age} < {a.max_age_hours}h) — skipping")
         await pg.close()
         return
-    sids = await watermark.pending(pg, a.workflow, version, limit=a.batch)
     con = lake.connect()
     lake.ensure_schema(con)
     summary = await engine.process(pg, con, sids, a.workflow, version, include_markers=a.include_markers)
@@ -91,6 +89,55 @@ async def cmd_tick(a) -> None:
     print(json.dumps(summary))
 
 
+async def cmd_follow(a) -> None:
+    """Long-running follower: wake on ``lifecycle.complete_sample``'s NOTIFY and
+    ingest the backlog in micro-batches.
+
+    Backpressure comes from keeping Postgres as the queue: notifications only set
+    one coalesced wake flag, and every batch re-reads ``watermark.pending``. When
+    the lake writer is slower than completions arrive, the backlog waits in
+    ``jobs`` rather than in memory, and each pass takes the oldest ``--batch``.
+    ``--settle-seconds`` lets a burst of completions land in one batch;
+    ``--poll-seconds`` is the fallback for notifications missed while down.
+    Unpublished samples are set aside until the next poll so they can't wedge
+    the head of the queue.
+    """
+    pg = await watermark.connect()
+    await watermark.ensure_table(pg)
+    version = await _version(pg, a.workflow, a.version)
+    wake = asyncio.Event()
+    await watermark.listen(pg, a.workflow, version, lambda _sid: wake.set())
+    con = lake.connect()
+    lake.ensure_schema(con)
+    print(f"following {a.workflow} {version}", file=sys.stderr, flush=True)
+    deferred: dict[str, float] = {}  # unpublished sample_id -> monotonic time seen
+    wake.set()  # drain whatever completed while we weren't running
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=a.poll_seconds)
+                await asyncio.sleep(a.settle_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            now = time.monotonic()
+            deferred = {s: t for s, t in deferred.items() if now - t < a.poll_seconds}
+            while True:
+                sids = await watermark.pending(pg, a.workflow, version,
+                                               limit=a.batch, exclude=list(deferred))
+                if not sids:
+                    break
+                summary = await engine.process(pg, con, sids, a.workflow, version,
+                                               include_markers=a.include_markers)
+                done = await watermark.ingested_among(pg, sids, a.workflow, version)
+                deferred.update((s, now) for s in sids if s not in done)
+                summary["backlog"] = await watermark.backlog_count(pg, a.workflow, version)
+                print(json.dumps(summary), flush=True)
+    finally:
+        con.close()
+        await pg.close()
+
+
 def cmd_parse(a) -> None:
     """Dry-run: fetch + parse one sample, print per-table row counts. No DB, no lake."""
     specs = SPECS.get((a.workflow, a.version))
@@ -126,6 +173,42 @@ def cmd_freeze(a) -> None:
     print(f"frozen catalog -> {a.out} (data_path={a.https_base})")
 
 
+def _print_stats(action: str, before: dict, after: dict) -> None:
+    tables = {t: {"files_before": before.get(t, {}).get("files", 0),
+                  "files_after": after.get(t, {}).get("files", 0),
+                  "bytes_before": before.get(t, {}).get("bytes", 0),
+                  "bytes_after": after.get(t, {}).get("bytes", 0)}
+              for t in sorted(set(before) | set(after))}
+    totals = {k: sum(v[k] for v in tables.values())
+              for k in ("files_before", "files_after", "bytes_before", "bytes_after")}
+    print(json.dumps({"action": action, "totals": totals, "tables": tables}))
+
+
+def cmd_partition(a) -> None:
+    """Set DuckLake partition keys on every table; --rewrite also moves existing
+    rows into the partitioned layout."""
+    con = lake.connect()
+    lake.ensure_schema(con)
+    before = lake.file_stats(con)
+    lake.set_partitioning(con, rewrite=a.rewrite)
+    after = lake.file_stats(con)
+    con.close()
+    _print_stats("partition", before, after)
+
+
+def cmd_compact(a) -> None:
+    """Merge the small per-sample parquet files into target-size files and expire
+    old snapshots. File deletion (--cleanup) is opt-in — see lake.compact."""
+    con = lake.connect()
+    lake.ensure_schema(con)
+    before = lake.file_stats(con)
+    lake.compact(con, target_file_size=a.target_file_size,
+                 expire_older_than_days=a.expire_days, cleanup=a.cleanup)
+    after = lake.file_stats(con)
+    con.close()
+    _print_stats("compact", before, after)
+
+
 def main(argv: list[str] | None = None) -> None:
     p = argparse.ArgumentParser(prog="nf-etl", description="cMD output-catalog ETL")
     p.add_argument("--workflow", default=WORKFLOW)
@@ -141,20 +224,35 @@ def main(argv: list[str] | None = None) -> None:
     tick.add_argument("--max-age-hours", type=float, default=24.0)
     tick.add_argument("--batch", type=int, default=1000)
     tick.add_argument("--include-markers", action="store_true")
+    fo = sub.add_parser("follow")
+    fo.add_argument("--batch", type=int, default=25)
+    fo.add_argument("--settle-seconds", type=float, default=5.0)
+    fo.add_argument("--poll-seconds", type=float, default=300.0)
+    fo.add_argument("--include-markers", action="store_true")
     pr = sub.add_parser("parse")
     pr.add_argument("--sample", required=True)
     pr.add_argument("--include-markers", action="store_true")
     fr = sub.add_parser("freeze")
     fr.add_argument("--out", required=True)
     fr.add_argument("--https-base", required=True, help="public HTTPS base for the parquet data")
+    pa = sub.add_parser("partition")
+    pa.add_argument("--rewrite", action="store_true",
+                    help="re-insert existing rows so old files are partitioned too")
+    co = sub.add_parser("compact")
+    co.add_argument("--target-file-size", default=lake.TARGET_FILE_SIZE)
+    co.add_argument("--expire-days", type=float, default=None,
+                    help="expire snapshots older than N days (default: keep all)")
+    co.add_argument("--cleanup", action="store_true",
+                    help="delete unreferenced files; only after re-freezing the published catalog")
 
     a = p.parse_args(argv)
-    if a.cmd == "parse":
-        cmd_parse(a)
-    elif a.cmd == "freeze":
-        cmd_freeze(a)
+    sync_cmds = {"parse": cmd_parse, "freeze": cmd_freeze,
+                 "partition": cmd_partition, "compact": cmd_compact}
+    if a.cmd in sync_cmds:
+        sync_cmds[a.cmd](a)
     else:
-        asyncio.run({"status": cmd_status, "ingest": cmd_ingest, "tick": cmd_tick}[a.cmd](a))
+        asyncio.run({"status": cmd_status, "ingest": cmd_ingest, "tick": cmd_tick,
+                     "follow": cmd_follow}[a.cmd](a))
 
 
 if __name__ == "__main__":
@@ -14,8 +14,12 @@ plus DuckLake-managed parquet, not a loose parquet dump. Two catalog backends:
 Data (parquet) lands at ``ETL_LAKE_DATA_PATH`` — a local dir for dev/tests, or
 ``s3://cmgd-data/lake/`` (Cloudflare R2) in prod. When the data path is ``s3://``,
 R2 credentials are read from the rclone ``[r2]`` config (never printed) and
-installed as a DuckDB secret. Partitioning (workflow/version/method/data_type) is
-a follow-up; correctness of ingest doesn't depend on it.
+installed as a DuckDB secret.
+
+Physical layout is maintenance, not ingest: ``nf-etl partition`` sets the coarse
+partition keys (workflow/version/data_type — never sample_id), and ``nf-etl
+compact`` merges the many small per-sample files into target-size ones and
+expires old snapshots. Correctness of ingest doesn't depend on either.
 """
 from __future__ import annotations
 
@@ -29,6 +33,7 @@ import duckdb
 CATALOG = os.environ.get("ETL_LAKE_CATALOG", "/data/cmgd/lake/cmgd_lake.ducklake")
 CATALOG_PG_DB = os.environ.get("ETL_LAKE_CATALOG_PG_DB")  # set → Postgres catalog
 DATA_PATH = os.environ.get("ETL_LAKE_DATA_PATH", "/data/cmgd/lake/data")
+TARGET_FILE_SIZE = os.environ.get("ETL_LAKE_TARGET_FILE_SIZE", "128MB")
 
 
 def _pg_catalog_dsn(db: str) -> str:
@@ -66,6 +71,15 @@ SCHEMAS: dict[str, dict[str, str]] = {
 }
 
 
+# Coarse, low-cardinality partition keys (design doc → Physical layout). Method is
+# the table, so it isn't a key; qc_metrics has no data_type. sample_id is a sort
+# key within partitions, never a partition key (that's the small-files problem).
+PARTITION_KEYS: dict[str, tuple[str, ...]] = {
+    table: ("workflow", "version", "data_type") if "data_type" in cols else ("workflow", "version")
+    for table, cols in SCHEMAS.items()
+}
+
+
 def _r2_secret_sql() -> str | None:
     cfg = configparser.ConfigParser()
     cfg.read(os.path.expanduser("~/.config/rclone/rclone.conf"))
@@ -128,3 +142,58 @@ def replace_sample(con: duckdb.DuckDBPyConnection, table: str, sample_id: str,
         [[r.get(c) for c in cols] for r in rows],
     )
     return len(rows)
+
+
+def file_stats(con: duckdb.DuckDBPyConnection) -> dict[str, dict[str, int]]:
+    """Live data-file count and bytes per lake table (what a reader would open)."""
+    rows = con.execute(
+        "SELECT table_name, file_count, file_size_bytes FROM ducklake_table_info('lake')"
+    ).fetchall()
+    return {t: {"files": int(n or 0), "bytes": int(b or 0)} for t, n, b in rows if t in SCHEMAS}
+
+
+def set_partitioning(con: duckdb.DuckDBPyConnection, rewrite: bool = False) -> None:
+    """Set PARTITION_KEYS on every table. DuckLake only partitions files written
+    *after* the change; ``rewrite`` re-inserts each table's existing rows (sorted
+    by sample_id, for min-max pruning) in one transaction so old files move into
+    the partitioned layout too. The superseded files are left for ``compact``'s
+    snapshot expiry + cleanup to reclaim."""
+    for table, keys in PARTITION_KEYS.items():
+        con.execute(f"ALTER TABLE lake.{table} SET PARTITIONED BY ({', '.join(keys)})")
+        if not rewrite:
+            continue
+        cols = ", ".join(SCHEMAS[table])
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.execute(f"CREATE TEMP TABLE _rewrite AS SELECT {cols} FROM lake.{table}")
+            con.execute(f"DELETE FROM lake.{table}")
+            con.execute(f"INSERT INTO lake.{table} ({cols}) "
+                        f"SELECT {cols} FROM _rewrite ORDER BY sample_id")
+            con.execute("DROP TABLE _rewrite")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+
+def compact(con: duckdb.DuckDBPyConnection, target_file_size: str = TARGET_FILE_SIZE,
+            expire_older_than_days: float | None = None, cleanup: bool = False) -> None:
+    """Merge adjacent small files (within a partition) up to ``target_file_size``,
+    then optionally expire snapshots older than N days.
+
+    ``cleanup`` physically deletes files no live snapshot references. It is off
+    by default: a published frozen catalog may still point at pre-merge parquet
+    (output-catalog-etl-plan → retention couples to publishing), so only delete
+    once the freeze has been re-cut against the compacted snapshot.
+    """
+    if not re.fullmatch(r"\d+(\.\d+)?\s*[KMGT]?i?B", target_file_size, re.IGNORECASE):
+        raise ValueError(f"bad target file size {target_file_size!r} (e.g. '128MB')")
+    con.execute(f"CALL lake.set_option('target_file_size', '{target_file_size}')")
+    con.execute("CALL ducklake_merge_adjacent_files('lake')")
+    if expire_older_than_days is not None:
+        con.execute(
+            "CALL ducklake_expire_snapshots('lake', older_than => now() - to_seconds(?))",
+            [expire_older_than_days * 86400],
+        )
+    if cleanup:
+        con.execute("CALL ducklake_cleanup_old_files('lake', cleanup_all => true)")
@@ -9,10 +9,16 @@ Grounded in 2.2.1 output (July 2026): metaphlan uses ``|``-delimited clade
 lineages with a matching taxid lineage; bracken is a normal-header TSV whose
 ``fraction_total_reads`` is a 0–1 fraction; card_kma.res is a ``#``-header TSV
 with whitespace-padded numerics.
+
+Input is streamed: ``_lines`` decompresses and decodes incrementally, so a
+several-hundred-thousand-line marker file is never held as a decompressed blob,
+a decoded string, and a list of lines at once — only the compressed bytes from
+the fetch plus one line at a time.
 """
 from __future__ import annotations
 
 import gzip
+import io
 import json
 from typing import Iterator
 
@@ -27,9 +33,14 @@ _BRACKEN_LVL = {
 }
 
 
-def _lines(raw: bytes) -> list[str]:
-    text = (gzip.decompress(raw) if raw[:2] == b"\x1f\x8b" else raw).decode("utf-8", "replace")
-    return text.splitlines()
+def _lines(raw: bytes) -> Iterator[str]:
+    """Lazily yield decoded lines (newline stripped) from plain or gzip bytes."""
+    stream: io.BytesIO | gzip.GzipFile = io.BytesIO(raw)
+    if raw[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    with io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="") as text:
+        for line in text:
+            yield line.rstrip("\r\n")
 
 
 def _rows(raw: bytes, comment: str | None = "#"):
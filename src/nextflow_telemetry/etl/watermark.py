@@ -1,16 +1,21 @@
 """Telemetry-side state: which completed samples still need ingesting, and the
 ``etl_ingested`` watermark. Reads pending as ``completed jobs`` anti-joined
 against ``etl_ingested`` — restart- and re-run-safe, and the source of the
-backlog count that drives the tick trigger.
+backlog count that drives the tick trigger. ``backlog`` answers count, oldest
+age and the next batch in one pass. Both read the covering partial index
+``ix_jobs_completed_by_version``.
 """
 from __future__ import annotations
 
 import json
 import os
 import re
+from typing import Callable
 
 import asyncpg  # type: ignore[import-untyped]
 
+from ..services.lifecycle import JOB_COMPLETED_CHANNEL
+
 
 def _uri() -> str:
     return re.sub(r"\+asyncpg", "", os.environ["SQLALCHEMY_URI"])
@@ -36,7 +41,10 @@ async def ensure_table(conn: asyncpg.Connection) -> None:
 
 
 async def pending(conn: asyncpg.Connection, workflow: str, version: str,
-                  limit: int | None = None) -> list[str]:
+                  limit: int | None = None, exclude: list[str] | None = None) -> list[str]:
+    """Oldest-completed-first pending sample ids. ``exclude`` skips ids the caller
+    already knows it can't ingest yet (e.g. not yet published), so they don't
+    wedge the head of a small batch."""
     q = """
         SELECT j.sample_id
         FROM jobs j
@@ -45,12 +53,15 @@ async def pending(conn: asyncpg.Connection, workflow: str, version: str,
               SELECT 1 FROM etl_ingested e
               WHERE e.sample_id = j.sample_id AND e.workflow_id = j.workflow_id
                 AND e.workflow_version = j.workflow_version)
-        ORDER BY j.completed_at
     """
     args: list = [workflow, version]
+    if exclude:
+        args.append(exclude)
+        q += f" AND j.sample_id <> ALL(${len(args)}::text[])"
+    q += " ORDER BY j.completed_at"
     if limit is not None:
-        q += " LIMIT $3"
         args.append(limit)
+        q += f" LIMIT ${len(args)}"
     return [r["sample_id"] for r in await conn.fetch(q, *args)]
 
 
@@ -67,6 +78,59 @@ async def backlog_count(conn: asyncpg.Connection, workflow: str, version: str) -
     )
 
 
+async def backlog(conn: asyncpg.Connection, workflow: str, version: str,
+                  limit: int | None = None) -> dict:
+    """Count, oldest age and the first ``limit`` pending ids in one anti-join.
+
+    The CTE is referenced three times, so Postgres materialises it once; the
+    partial ``ix_jobs_completed_by_version`` index feeds it in ``completed_at``
+    order. ``LIMIT NULL`` is "no limit".
+    """
+    row = await conn.fetchrow(
+        """
+        WITH p AS (
+            SELECT j.sample_id, j.completed_at FROM jobs j
+            WHERE j.status = 'completed' AND j.workflow_id = $1 AND j.workflow_version = $2
+              AND NOT EXISTS (SELECT 1 FROM etl_ingested e
+                  WHERE e.sample_id = j.sample_id AND e.workflow_id = j.workflow_id
+                    AND e.workflow_version = j.workflow_version)
+        )
+        SELECT (SELECT count(*) FROM p) AS n,
+               (SELECT extract(epoch FROM (now() - min(completed_at))) / 3600 FROM p) AS oldest_h,
+               (SELECT array_agg(sample_id ORDER BY completed_at)
+                FROM (SELECT sample_id, completed_at FROM p ORDER BY completed_at LIMIT $3) f) AS ids
+        """,
+        workflow, version, limit,
+    )
+    return {"count": row["n"],
+            "oldest_hours": float(row["oldest_h"]) if row["oldest_h"] is not None else None,
+            "sample_ids": list(row["ids"] or [])}
+
+
+async def listen(conn: asyncpg.Connection, workflow: str, version: str,
+                 on_complete: Callable[[str], None]) -> None:
+    """LISTEN for job completions of this (workflow, version); ``on_complete`` is
+    called with the sample_id. Fired by ``lifecycle.complete_sample`` on commit."""
+    def _cb(_conn, _pid, _channel, payload: str) -> None:
+        d = json.loads(payload)
+        if d.get("workflow_id") == workflow and d.get("workflow_version") == version:
+            on_complete(d["sample_id"])
+
+    await conn.add_listener(JOB_COMPLETED_CHANNEL, _cb)
+
+
+async def ingested_among(conn: asyncpg.Connection, sample_ids: list[str],
+                         workflow: str, version: str) -> set[str]:
+    rows = await conn.fetch(
+        """
+        SELECT sample_id FROM etl_ingested
+        WHERE sample_id = ANY($1::text[]) AND workflow_id = $2 AND workflow_version = $3
+        """,
+        sample_ids, workflow, version,
+    )
+    return {r["sample_id"] for r in rows}
+
+
 async def study_map(conn: asyncpg.Connection, sample_ids: list[str]) -> dict[str, str]:
     """sample_id → a study label. Prefers a study-type collection; falls back to
     any collection's label/id. (Sample↔study is many-to-many; one is picked.)"""
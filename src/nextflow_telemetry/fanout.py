@@ -0,0 +1,73 @@
+"""Run a page's independent read queries concurrently.
+
+Pages such as the process-metrics summary, ``GET /runs/{name}`` and the
+cohort summary issue several aggregates that don't depend on each other.
+Awaited one after another on a single connection, the page takes the sum of
+their latencies. ``fan_out`` spreads them over up to ``budget`` pooled
+connections so it takes roughly the slowest one instead.
+
+The budget is per call — i.e. per request — and each worker connection runs
+queries one at a time, so one page never holds more than ``budget`` of the
+pool's connections. The default (``default_budget``) is
+``FANOUT_CONNECTIONS`` capped at the analytics pool's share per admitted
+request, so a full admission gate of fanned-out pages never wants more
+connections than the pool has. A budget of 1 runs everything on one
+connection, as before. Each query already ran in its own read-committed statement snapshot,
+so splitting them across connections doesn't weaken consistency.
+
+If a query raises, the rest are cancelled and that exception propagates
+unchanged.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .config import settings
+from .replica import Connectable
+
+Query = Callable[[AsyncConnection], Awaitable[Any]]
+
+
+def default_budget() -> int:
+    """``FANOUT_CONNECTIONS``, capped at analytics pool size ÷ admission limit."""
+    budget = settings.FANOUT_CONNECTIONS
+    limit = settings.ADMISSION_LIMITS.get("analytics", 0)
+    if limit > 0:
+        budget = min(budget, settings.DB_POOL_SIZES["analytics"] // limit)
+    return max(1, budget)
+
+
+async def fan_out(engine: Connectable, *queries: Query, budget: int | None = None) -> list[Any]:
+    """Run ``queries`` (each ``async (conn) -> result``); results in argument order.
+
+    ``engine`` is any ``replica.Connectable`` — an ``AsyncEngine`` or a
+    ``replica.ReadEngine``. Pass the slowest queries first: workers take
+    queries in order.
+    """
+    if budget is None:
+        budget = default_budget()
+    results: list[Any] = [None] * len(queries)
+    pending = iter(enumerate(queries))
+
+    async def worker() -> None:
+        async with engine.connect() as conn:
+            for i, query in pending:
+                results[i] = await query(conn)
+
+    workers = max(1, min(budget, len(queries)))
+    if workers == 1:
+        await worker()
+        return results
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
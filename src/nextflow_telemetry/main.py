@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import logging
 import time
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,13 +12,16 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
 from starlette.middleware.sessions import SessionMiddleware
 
+from . import admission, changes, metrics, querystats, replica, slowlog
 from .config import settings
 from .log import logger
 from . import models
+from .responses import JSONResponse, etag_matches
 from .routers.admin import create_admin_router
 from .routers.auth import create_auth_router
 from .routers.cohorts import create_cohorts_router
 from .routers.curated import create_curated_router
+from .routers.dashboard import create_dashboard_router
 from .routers.daemons import create_daemons_router
 from .routers.dispatch import create_dispatch_router
 from .routers.process_metrics import create_process_metrics_router
@@ -25,9 +30,44 @@ from .routers.samples import create_samples_router
 from .routers.submissions import create_submissions_router
 from .routers.task_logs import create_task_logs_router
 from .routers.workflows import create_workflows_router
+from .services import cohort_progress, ena_cache, membership
 from .services.process_metrics import ProcessMetricsService
+from .services.spool import WeblogSpool
 from .services.telemetry import TelemetryService
 
+if TYPE_CHECKING:
+    from .services.lake import LakeService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm the in-process membership index (facets / intersections). Not
+    # fatal: until it loads, those reads fall back to SQL.
+    if not settings.SKIP_DB_INIT:
+        try:
+            await membership.index.load(engine)
+        except Exception:
+            logger.warning("membership.index.load_failed", exc_info=True)
+        # Cohort progress resyncs a previous process queued but didn't run.
+        cohort_progress.resync.schedule(engine)
+    # Weblog spool: replay whatever a previous process left, then keep
+    # draining. If another process holds the directory, ingest stays inline.
+    if spool is not None and spool.open():
+        spool.start_drainer(telemetry_service.ingest)
+    read_engine.start()
+    metrics.loop_lag.start()
+    yield
+    await metrics.loop_lag.stop()
+    await cohort_progress.resync.stop()
+    await membership.index.stop()
+    await ena_cache.stop()
+    await read_engine.stop()
+    if spool is not None:
+        await spool.close()
+    if lake_service is not None:
+        # DuckDB cursors and the catalog attachment hold file handles.
+        lake_service.close()
+
+
 app = FastAPI(
     title="Nextflow Telemetry API",
     description=(
@@ -47,9 +87,60 @@ app = FastAPI(
         "routing to the dead-letter queue."
     ),
     version="0.1.0",
+    lifespan=lifespan,
+    # orjson for every JSON body; see responses.py for the model bypass.
+    default_response_class=JSONResponse,
 )
 
-engine = create_async_engine(settings.SQLALCHEMY_URI)
+# One pool per route class (see admission.py) so dashboard load can't take
+# the connections ingest and dispatch need. `engine` is the analytics /
+# general-purpose pool.
+_pool_kwargs = {
+    "max_overflow": 0,
+    # Records checkout wait for /metrics.
+    "poolclass": metrics.InstrumentedPool,
+    "connect_args": {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+}
+engine = create_async_engine(
+    settings.SQLALCHEMY_URI, pool_size=settings.DB_POOL_SIZES["analytics"], **_pool_kwargs
+)
+ingest_engine = create_async_engine(
+    settings.SQLALCHEMY_URI, pool_size=settings.DB_POOL_SIZES["ingest"], **_pool_kwargs
+)
+dispatch_engine = create_async_engine(
+    settings.SQLALCHEMY_URI, pool_size=settings.DB_POOL_SIZES["dispatch"], **_pool_kwargs
+)
+uploads_engine = create_async_engine(
+    settings.SQLALCHEMY_URI, pool_size=settings.DB_POOL_SIZES["uploads"], **_pool_kwargs
+)
+admission.controller.pools.update(
+    analytics=engine, ingest=ingest_engine, dispatch=dispatch_engine, uploads=uploads_engine
+)
+# Read-only endpoints go through read_engine: the replica when configured and
+# caught up, else `engine`.
+read_engine = replica.ReadEngine(
+    engine,
+    create_async_engine(
+        settings.SQLALCHEMY_READ_URI, pool_size=settings.DB_POOL_SIZES["analytics"], **_pool_kwargs
+    ) if settings.SQLALCHEMY_READ_URI else None,
+    max_lag_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.READ_REPLICA_CHECK_SECONDS,
+)
+if read_engine.replica is not None:
+    admission.controller.pools["replica"] = read_engine.replica
+# Committed writes bump per-domain generations for conditional GETs. A replica
+# may lag by up to its max lag, so don't hand out tags for fresher writes.
+for _eng in (engine, ingest_engine, dispatch_engine, uploads_engine):
+    changes.tracker.track(_eng)
+if read_engine.replica is not None:
+    changes.tracker.settle_seconds = settings.READ_REPLICA_MAX_LAG_SECONDS
+metrics.watch_pools(admission.controller.pools)
+for _eng in admission.controller.pools.values():
+    querystats.instrument(_eng)
+    slowlog.log.track(_eng)
+# Plan slow statements on the analytics pool, not the (small) pool they ran on.
+slowlog.log.explain_engine = engine
+metrics.watch_pending_jobs(engine)
 # Expose engine on app.state so dependencies (e.g. get_current_user) can
 # resolve services without importing the global engine and breaking unit
 # tests that monkeypatch it.
@@ -117,6 +208,61 @@ def _client_ip(request: Request) -> str | None:
     return request.client.host if request.client else None
 
 
+@app.middleware("http")
+async def consistency_middleware(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    # `?consistency=strong` / `X-Consistency: strong`: read the primary, not the replica.
+    if "strong" in (request.query_params.get("consistency"), request.headers.get("x-consistency")):
+        token = replica.consistency.set("strong")
+        try:
+            return await call_next(request)
+        finally:
+            replica.consistency.reset(token)
+    return await call_next(request)
+
+
+# Registered before the access log so it runs inside it: rejections are logged.
+@app.middleware("http")
+async def admission_middleware(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    gate = admission.controller.gate_for(request.method, request.url.path)
+    if gate is None:
+        return await call_next(request)
+    try:
+        async with gate.admit():
+            return await call_next(request)
+    except admission.Saturated:
+        return JSONResponse(
+            {"detail": f"Server busy ({gate.name} requests saturated); retry shortly."},
+            status_code=503,
+            headers={"Retry-After": str(admission.controller.retry_after)},
+        )
+
+
+# Outside admission: a 304 costs no gate slot and no query.
+@app.middleware("http")
+async def conditional_get_middleware(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    if request.method != "GET":
+        return await call_next(request)
+    etag = changes.tracker.etag_for(request.url.path)
+    if etag is None:
+        return await call_next(request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+
 @app.middleware("http")
 async def access_log_middleware(
     request: Request,
@@ -124,7 +270,7 @@ async def access_log_middleware(
 ) -> Response:
     # Level priority: an unhandled exception always logs at ERROR (with
     # traceback), regardless of path. Then /health (Docker healthcheck
-    # noise floor) drops to DEBUG. Everything else logs at INFO. Without
+    # noise floor) and /metrics (Prometheus scrapes) drop to DEBUG. Everything else logs at INFO. Without
     # the error-first check, a real failure hitting /health would be
     # hidden in DEBUG-level logs in production.
     #
@@ -133,6 +279,7 @@ async def access_log_middleware(
     # `SystemExit` should propagate cleanly through async cancellation
     # and graceful-shutdown paths without spamming ERROR access logs.
     started = time.perf_counter()
+    stats, stats_token = querystats.begin()
     response: Response | None = None
     error: Exception | None = None
     try:
@@ -142,12 +289,19 @@ async def access_log_middleware(
         error = exc
         raise
     finally:
-        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        querystats.end(stats_token)
+        elapsed = time.perf_counter() - started
+        duration_ms = round(elapsed * 1000, 1)
         path = request.url.path
         status = response.status_code if response is not None else 500
+        # Route template, not the path: one series per endpoint.
+        route = request.scope.get("route")
+        metrics.http_request_seconds.observe(
+            elapsed, request.method, route.path if route is not None else "<unmatched>", str(status)
+        )
         if error is not None:
             level = logging.ERROR
-        elif path == "/health":
+        elif path in ("/health", "/metrics"):
             level = logging.DEBUG
         else:
             level = logging.INFO
@@ -159,24 +313,49 @@ async def access_log_middleware(
             "client": _client_ip(request),
             "user_agent": request.headers.get("user-agent"),
         }
+        if stats is not None:
+            extra.update(stats.log_fields())
         if error is not None:
             extra["error"] = str(error)
         logger.log(level, "http.request", extra=extra, exc_info=error if error else None)
 
-process_metrics_service = ProcessMetricsService(engine=engine)
-telemetry_service = TelemetryService(engine=engine)
+process_metrics_service = ProcessMetricsService(engine=read_engine)
+telemetry_service = TelemetryService(engine=ingest_engine)
+spool = (
+    WeblogSpool(
+        settings.TELEMETRY_SPOOL_DIR,
+        segment_bytes=settings.TELEMETRY_SPOOL_SEGMENT_BYTES,
+        fsync_seconds=settings.TELEMETRY_SPOOL_FSYNC_MS / 1000,
+    )
+    if settings.TELEMETRY_SPOOL_DIR
+    else None
+)
 
 app.include_router(create_process_metrics_router(process_metrics_service), prefix="/api")
-app.include_router(create_dispatch_router(engine), prefix="/api")
-app.include_router(create_samples_router(engine), prefix="/api")
+app.include_router(create_dispatch_router(dispatch_engine), prefix="/api")
+app.include_router(
+    create_samples_router(engine, read_engine=read_engine, uploads_engine=uploads_engine), prefix="/api"
+)
 app.include_router(create_workflows_router(engine), prefix="/api")
-app.include_router(create_admin_router(engine), prefix="/api")
-app.include_router(create_task_logs_router(engine), prefix="/api")
-app.include_router(create_daemons_router(engine), prefix="/api")
-app.include_router(create_curated_router(engine), prefix="/api")
-app.include_router(create_runs_router(engine), prefix="/api")
-app.include_router(create_cohorts_router(engine), prefix="/api")
-app.include_router(create_submissions_router(engine), prefix="/api")
+app.include_router(create_admin_router(engine, read_engine=read_engine), prefix="/api")
+app.include_router(create_task_logs_router(uploads_engine), prefix="/api")
+app.include_router(create_daemons_router(dispatch_engine), prefix="/api")
+app.include_router(create_curated_router(uploads_engine, read_engine=read_engine), prefix="/api")
+app.include_router(create_runs_router(read_engine, ingest_engine=ingest_engine), prefix="/api")
+app.include_router(create_cohorts_router(read_engine), prefix="/api")
+app.include_router(create_dashboard_router(read_engine), prefix="/api")
+app.include_router(create_submissions_router(uploads_engine, read_engine=engine), prefix="/api")
+lake_service: LakeService | None = None
+if settings.LAKE_API_ENABLED:
+    # Imported here so the default image doesn't need duckdb (the `lake` extra).
+    from .routers.lake import create_lake_router
+    from .services.lake import LakeService
+
+    lake_service = LakeService(
+        pool_size=settings.LAKE_POOL_SIZE,
+        snapshot_ttl=settings.LAKE_SNAPSHOT_TTL_SECONDS,
+    )
+    app.include_router(create_lake_router(lake_service), prefix="/api")
 # /auth/* lives at root (not under /api) so the OAuth redirect URI is a
 # tidy origin-relative path that fits naturally into Google's allowed-redirect
 # list and avoids stuffing /api into user-facing URLs.
@@ -207,9 +386,30 @@ async def healthcheck():
         )
 
 
+@app.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description=(
+        "Prometheus text exposition: request latency by route, DB pool usage and checkout "
+        "wait, weblog events by type, job/run lifecycle transitions, dispatch claim latency "
+        "and batch size, pending jobs per workflow version, and event-loop lag."
+    ),
+    response_class=Response,
+    tags=["system"],
+)
+async def prometheus_metrics() -> Response:
+    return Response(
+        content=await metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+_TELEMETRY_ACK = b'{"status":"ok"}'
+
+
 @app.post(
     "/telemetry",
-    response_model=models.Telemetry,
+    response_model=models.TelemetryAck,
     summary="Ingest a Nextflow weblog event",
     description=(
         "Receives a single event from Nextflow's `-with-weblog` reporter and persists it to the "
@@ -217,7 +417,9 @@ async def healthcheck():
         "state: `started` → marks the workflow run as running; `process_completed` on the "
         "`MARK_COMPLETE` sentinel process → marks the individual sample job as completed; "
         "`completed` → closes the run and sweeps any unfinished jobs (retry or dead-letter). "
-        "Returns the parsed event so Nextflow can confirm receipt."
+        "With `TELEMETRY_SPOOL_DIR` set the event is acknowledged once it is durably "
+        "spooled on local disk and applied to the database in the background. "
+        "Returns a minimal `{\"status\": \"ok\"}` acknowledgement once the event is stored."
     ),
     tags=["telemetry"],
 )
@@ -234,8 +436,13 @@ async def telemetry(body: models.Telemetry):
             pass
 
     logger.debug(body)
-    await telemetry_service.ingest(body)
-    return body
+    metrics.count_weblog_event(body.event)
+    if spool is not None and spool.active:
+        await spool.append(body)
+    else:
+        await telemetry_service.ingest(body)
+    # Pre-rendered: Nextflow ignores the body, so don't re-serialise the event.
+    return Response(content=_TELEMETRY_ACK, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+"""Prometheus metrics, exposed at ``GET /metrics``.
+
+A minimal in-process registry that renders the Prometheus text format
+(0.0.4). The hot paths only do a dict lookup and an add: ``Counter.inc``,
+``Histogram.observe`` (one bisect) and ``Gauge.set``. Anything that needs a
+query or a walk over the pools runs in a scrape hook, once per scrape.
+
+What's instrumented, and where:
+
+- ``http_request_duration_seconds{method,route,status}``: main.py's access
+  log middleware, labelled by route template (``/api/runs/{run_name}``), not
+  the raw path.
+- ``db_pool_*{pool}``: per route-class pool (admission.py). Sizes and
+  checked-out counts come from a scrape hook. Checkout wait is observed by
+  ``InstrumentedPool``, which main.py uses for every engine.
+- ``weblog_events_total{event}``: ``POST /telemetry``, by weblog event type.
+- ``lifecycle_transitions_total{entity,to}``: services/lifecycle.py, counted
+  in rows moved. A transaction that later rolls back is still counted.
+- ``dispatch_claim_duration_seconds{outcome}`` and
+  ``dispatch_claim_batch_size``: services/dispatch.py.
+- ``jobs_pending{workflow_id,workflow_version}``: a scrape hook query.
+- ``event_loop_lag_seconds``: ``LoopLagMonitor``, started by the lifespan.
+  It measures how late a periodic timer fires.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, cast
+
+from sqlalchemy import func, select
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from . import querystats
+from .db import jobs_tbl
+from .log import logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Weblog event types with their own series; anything else counts as "other"
+# (``event`` is client-supplied, so it can't be a free-form label).
+WEBLOG_EVENTS = frozenset(
+    {"started", "process_submitted", "process_started", "process_completed", "error", "completed"}
+)
+
+# Timer period for the event-loop lag probe.
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+
+Labels = tuple[str, ...]
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in self.values.items()
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def clear(self) -> None:
+        self.values = {}
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in self.values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last = +Inf)..., sum, count]
+        self.series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        s = self.series.get(labels)
+        if s is None:
+            s = self.series[labels] = [0.0] * (len(self.buckets) + 3)
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        bounds = (*self.buckets, math.inf)
+        for k, s in self.series.items():
+            cumulative = 0.0
+            for bound, n in zip(bounds, s):
+                cumulative += n
+                le = _labels(self.labelnames, k, f'le="{_fmt(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {_fmt(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(s[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, k)} {_fmt(s[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[_Metric] = []
+        self._hooks: list[Callable[[], Awaitable[None]]] = []
+
+    def add(self, metric: Any) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+    def on_scrape(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Run ``hook`` before each render (to refresh gauges)."""
+        self._hooks.append(hook)
+
+    async def render(self) -> str:
+        for hook in self._hooks:
+            try:
+                await hook()
+            except Exception:
+                # A failed hook leaves its gauges as last scraped.
+                logger.warning("metrics.scrape_hook_failed", exc_info=True)
+        lines: list[str] = []
+        for m in self.metrics:
+            lines.extend(m.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.add(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"),
+))
+pool_size = registry.add(Gauge("db_pool_size", "Configured pool size.", ("pool",)))
+pool_checked_out = registry.add(Gauge("db_pool_checked_out", "Connections in use.", ("pool",)))
+pool_overflow = registry.add(Gauge("db_pool_overflow", "Connections beyond pool_size in use.", ("pool",)))
+pool_wait_seconds = registry.add(Histogram(
+    "db_pool_wait_seconds", "Time to check a connection out of the pool.", ("pool",),
+))
+weblog_events = registry.add(Counter(
+    "weblog_events_total", "Nextflow weblog events received, by event type.", ("event",),
+))
+lifecycle_transitions = registry.add(Counter(
+    "lifecycle_transitions_total", "Job / run status transitions, in rows moved.", ("entity", "to"),
+))
+claim_seconds = registry.add(Histogram(
+    "dispatch_claim_duration_seconds", "Dispatch batch claim latency.", ("outcome",),
+))
+claim_batch_size = registry.add(Histogram(
+    "dispatch_claim_batch_size", "Jobs per claimed dispatch batch.", buckets=SIZE_BUCKETS,
+))
+jobs_pending = registry.add(Gauge(
+    "jobs_pending", "Pending jobs per workflow version.", ("workflow_id", "workflow_version"),
+))
+loop_lag_seconds = registry.add(Gauge("event_loop_lag_seconds", "Latest event-loop lag sample."))
+loop_lag_hist = registry.add(Histogram("event_loop_lag_observed_seconds", "Event-loop lag samples."))
+
+
+def count_weblog_event(event: str) -> None:
+    weblog_events.inc(event if event in WEBLOG_EVENTS else "other")
+
+
+# -- pools ----------------------------------------------------------------
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait in ``db_pool_wait_seconds``
+    (and in the running request's ``querystats``)."""
+
+    metrics_name = "default"
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            pool_wait_seconds.observe(waited, self.metrics_name)
+            stats = querystats.current()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+    def recreate(self) -> InstrumentedPool:
+        # QueuePool.recreate builds ``self.__class__``; typed as the base.
+        pool = cast(InstrumentedPool, super().recreate())
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def watch_pools(pools: dict[str, Any]) -> None:
+    """Label each engine's pool and report its usage on every scrape."""
+    for name, engine in pools.items():
+        if isinstance(engine.pool, InstrumentedPool):
+            engine.pool.metrics_name = name
+
+    async def collect() -> None:
+        for name, engine in pools.items():
+            pool = engine.pool
+            if hasattr(pool, "checkedout"):
+                pool_size.set(pool.size(), name)
+                pool_checked_out.set(pool.checkedout(), name)
+                pool_overflow.set(max(pool.overflow(), 0), name)
+
+    registry.on_scrape(collect)
+
+
+def watch_pending_jobs(engine: Any) -> None:
+    """Report pending jobs per workflow version on every scrape."""
+    stmt = (
+        select(jobs_tbl.c.workflow_id, jobs_tbl.c.workflow_version, func.count())
+        .where(jobs_tbl.c.status == "pending")
+        .group_by(jobs_tbl.c.workflow_id, jobs_tbl.c.workflow_version)
+    )
+
+    async def collect() -> None:
+        async with engine.connect() as conn:
+            rows = (await conn.execute(stmt)).all()
+        jobs_pending.clear()
+        for workflow_id, version, n in rows:
+            jobs_pending.set(n, workflow_id, version)
+
+    registry.on_scrape(collect)
+
+
+# -- event loop -----------------------------------------------------------
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        async def run() -> None:
+            loop = asyncio.get_running_loop()
+            while True:
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(loop.time() - expected, 0.0)
+                loop_lag_seconds.set(lag)
+                loop_lag_hist.observe(lag)
+
+        self._task = asyncio.create_task(run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag = LoopLagMonitor()
@@ -0,0 +1,49 @@
+"""task_executions cohort failure index
+
+Revision ID: 0b1c2d3e
+Revises: fa0b1c2d
+Create Date: 2026-10-19
+
+CohortService's failure analytics (summary.failure_by_process and the
+/failures drill-down) move from `telemetry.trace->>...` JSONB extraction to
+the typed `task_executions` columns. This index serves them: the cohort's
+member samples drive a lookup on (sample_id, status, process), and the
+workflow scope columns are INCLUDEd so the per-process aggregate never visits
+the heap (index-only scan).
+
+Created CONCURRENTLY — see c1d2e3f4 for the autocommit_block rationale.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0b1c2d3e"
+down_revision: Union[str, Sequence[str], None] = "fa0b1c2d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_task_executions_sample_status_process",
+            "task_executions",
+            ["sample_id", "status", "process"],
+            unique=False,
+            postgresql_include=["workflow_id", "workflow_version"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_task_executions_sample_status_process",
+            table_name="task_executions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,44 @@
+"""collection_samples sample_id index
+
+Revision ID: 1c2d3e4f
+Revises: 0b1c2d3e
+Create Date: 2026-10-19
+
+`collection_samples` only had the unique (collection_id, sample_id) index,
+which serves "members of a collection" but not "collections of a sample" —
+the direction every per-sample membership lookup and jobs/telemetry-driven
+cohort join takes. Created CONCURRENTLY (see c1d2e3f4).
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "1c2d3e4f"
+down_revision: Union[str, Sequence[str], None] = "0b1c2d3e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_collection_samples_sample_id",
+            "collection_samples",
+            ["sample_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_collection_samples_sample_id",
+            table_name="collection_samples",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
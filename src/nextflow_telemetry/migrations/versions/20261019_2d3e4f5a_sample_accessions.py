@@ -0,0 +1,70 @@
+"""sample_accessions table and trigram sample search
+
+Revision ID: 2d3e4f5a
+Revises: 1c2d3e4f
+Create Date: 2026-10-19
+
+SRR → sample resolution was `ncbi_accession LIKE '%SRR…%'` over the
+semicolon-joined column: a sequential scan, and a false positive whenever one
+run accession is a prefix of another (SRR1 vs SRR12). Adds:
+
+  - `sample_accessions(sample_id, srr)` — one row per run, btree on srr,
+    backfilled here from samples.ncbi_accession and maintained by
+    services/accessions.set_accessions from then on.
+  - `ix_samples_sample_id_trgm` — pg_trgm GIN index so list_samples'
+    `sample_id ILIKE '%term%'` search stops scanning the catalog.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "2d3e4f5a"
+down_revision: Union[str, Sequence[str], None] = "1c2d3e4f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table(
+        "sample_accessions",
+        sa.Column("sample_id", sa.String(),
+                  sa.ForeignKey("samples.sample_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("srr", sa.String(), primary_key=True),
+    )
+    op.execute(
+        """
+        INSERT INTO sample_accessions (sample_id, srr)
+        SELECT DISTINCT s.sample_id, btrim(a.srr)
+        FROM samples s
+        CROSS JOIN LATERAL unnest(string_to_array(s.ncbi_accession, ';')) AS a(srr)
+        WHERE btrim(a.srr) <> ''
+        """
+    )
+    op.create_index("ix_sample_accessions_srr", "sample_accessions", ["srr"])
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_samples_sample_id_trgm",
+            "samples",
+            ["sample_id"],
+            postgresql_using="gin",
+            postgresql_ops={"sample_id": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_samples_sample_id_trgm",
+            table_name="samples",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_index("ix_sample_accessions_srr", table_name="sample_accessions")
+    op.drop_table("sample_accessions")
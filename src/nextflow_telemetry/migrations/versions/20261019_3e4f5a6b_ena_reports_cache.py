@@ -0,0 +1,52 @@
+"""ena_reports filereport cache
+
+Revision ID: 3e4f5a6b
+Revises: 2d3e4f5a
+Create Date: 2026-10-19
+
+Raw ENA filereport TSV per (accession, field list) with the response's
+ETag / Last-Modified, so a dry-run preview and the submission that follows —
+or a re-registration of the same study — share one network fetch. Policy
+(TTL, stale-while-revalidate) lives in services/ena_cache.py.
+
+The TSV is stored as `ena_report_chunks`, a bounded run of lines per row, so
+neither the fetch nor a cache hit holds a whole 100k-run report in memory.
+`ena_reports.generation` names the complete set of chunks currently served.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "3e4f5a6b"
+down_revision: Union[str, Sequence[str], None] = "2d3e4f5a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ena_reports",
+        sa.Column("accession", sa.String(), primary_key=True),
+        sa.Column("fields", sa.String(), primary_key=True),
+        sa.Column("generation", sa.BigInteger(), nullable=False),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_table(
+        "ena_report_chunks",
+        sa.Column("accession", sa.String(), primary_key=True),
+        sa.Column("fields", sa.String(), primary_key=True),
+        sa.Column("generation", sa.BigInteger(), primary_key=True),
+        sa.Column("seq", sa.Integer(), primary_key=True),
+        sa.Column("body", sa.Text(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ena_report_chunks")
+    op.drop_table("ena_reports")
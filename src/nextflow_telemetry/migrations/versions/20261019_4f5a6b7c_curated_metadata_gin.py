@@ -0,0 +1,44 @@
+"""GIN jsonb_path_ops index on curated_sample_annotations.metadata_
+
+Revision ID: 4f5a6b7c
+Revises: 3e4f5a6b
+Create Date: 2026-10-19
+
+Backs server-side curated attribute filtering (`metadata_ @> {...}`) and the
+facet counts built on it, which the frontend used to do client-side over
+pulled pages. Created CONCURRENTLY (see c1d2e3f4).
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "4f5a6b7c"
+down_revision: Union[str, Sequence[str], None] = "3e4f5a6b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_csa_metadata_path_ops",
+            "curated_sample_annotations",
+            ["metadata_"],
+            postgresql_using="gin",
+            postgresql_ops={"metadata_": "jsonb_path_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_csa_metadata_path_ops",
+            table_name="curated_sample_annotations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,38 @@
+"""cohort_resync_queue: pending cohort_progress resyncs
+
+Revision ID: 5a6b7c8d
+Revises: 4f5a6b7c
+Create Date: 2026-10-19
+
+A registry change (register / promote / pause / retire) changes the active
+version set cohort_progress is counted against, and a background task
+re-derives the workflow's samples afterwards. The pending workflow_ids used
+to live only in memory, so a restart between the change and the resync left
+the leaderboard stale until a manual rebuild. They are now rows here, written
+in the registry change's transaction and drained again on startup.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "5a6b7c8d"
+down_revision: Union[str, Sequence[str], None] = "4f5a6b7c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cohort_resync_queue",
+        sa.Column("workflow_id", sa.String(), primary_key=True),
+        sa.Column("queued_at", sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text("now()")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cohort_resync_queue")
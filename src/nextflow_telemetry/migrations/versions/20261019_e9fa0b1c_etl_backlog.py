@@ -0,0 +1,56 @@
+"""etl_backlog partial index on completed jobs
+
+Revision ID: e9fa0b1c
+Revises: d8e9fa0b
+Create Date: 2026-10-19
+
+The ETL reads its backlog as `completed jobs` anti-joined against
+`etl_ingested`. `ix_jobs_completed_by_version` is a partial index on
+jobs(workflow_id, workflow_version, completed_at) INCLUDE (sample_id) WHERE
+status = 'completed'. The anti-join only ever looks at completed jobs of one
+(workflow, version), oldest first. This index serves that range scan in
+`completed_at` order, so `LIMIT n` stops early. It carries the sample_id the
+anti-join probes `etl_ingested` with, so counting the backlog is an
+index-only scan. Created CONCURRENTLY (see c1d2e3f4 for why
+autocommit_block).
+
+The backlog is always computed, never stored. A counter row per version kept
+by triggers would put every job completion of that version behind one row
+lock.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "e9fa0b1c"
+down_revision: Union[str, Sequence[str], None] = "d8e9fa0b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_jobs_completed_by_version",
+            "jobs",
+            ["workflow_id", "workflow_version", "completed_at"],
+            unique=False,
+            postgresql_concurrently=True,
+            postgresql_include=["sample_id"],
+            postgresql_where=sa.text("status = 'completed'"),
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_jobs_completed_by_version",
+            table_name="jobs",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,99 @@
+"""cohort_progress materialised leaderboard
+
+Revision ID: fa0b1c2d
+Revises: e9fa0b1c
+Create Date: 2026-10-19
+
+CohortService.leaderboard used to join every collection to its samples and
+their active-version jobs and run four COUNT(DISTINCT) aggregates over the
+whole catalog per request. Adds:
+
+  - `sample_progress`  — per-sample completed/failed/running flags under the
+                         active workflow versions (absent row = all false).
+  - `cohort_progress`  — per-collection sums of those flags + member count.
+
+Both are maintained by services/cohort_progress.py from the lifecycle
+transitions and add_to_collection; this migration seeds them from the current
+jobs/membership state (same SQL as cohort_progress.rebuild).
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "fa0b1c2d"
+down_revision: Union[str, Sequence[str], None] = "e9fa0b1c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sample_progress",
+        sa.Column("sample_id", sa.String(),
+                  sa.ForeignKey("samples.sample_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("completed", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("failed", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("running", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        sa.Column("last_completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "cohort_progress",
+        sa.Column("collection_id", sa.String(),
+                  sa.ForeignKey("collections.collection_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("sample_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("samples_completed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("samples_failed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("samples_running", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text("now()")),
+    )
+    op.execute(
+        """
+        INSERT INTO sample_progress (sample_id, completed, failed, running, last_completed_at)
+        SELECT * FROM (
+            SELECT s.sample_id,
+                   coalesce(bool_or(j.status = 'completed'), false) AS completed,
+                   coalesce(bool_or(j.status = 'failed'), false)    AS failed,
+                   coalesce(bool_or(j.status = 'running'), false)   AS running,
+                   max(j.completed_at) FILTER (WHERE j.status = 'completed') AS last_completed_at
+            FROM samples s
+            LEFT JOIN jobs j
+                   ON j.sample_id = s.sample_id
+                  AND EXISTS (
+                      SELECT 1 FROM workflows w
+                      WHERE w.workflow_id = j.workflow_id
+                        AND w.version = j.workflow_version
+                        AND w.status = 'active')
+            GROUP BY s.sample_id
+        ) f
+        WHERE f.completed OR f.failed OR f.running OR f.last_completed_at IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO cohort_progress
+            (collection_id, sample_count, samples_completed, samples_failed,
+             samples_running, last_completed_at, updated_at)
+        SELECT c.collection_id,
+               count(cs.sample_id),
+               count(*) FILTER (WHERE sp.completed),
+               count(*) FILTER (WHERE sp.failed),
+               count(*) FILTER (WHERE sp.running),
+               max(sp.last_completed_at),
+               now()
+        FROM collections c
+        LEFT JOIN collection_samples cs USING (collection_id)
+        LEFT JOIN sample_progress sp USING (sample_id)
+        GROUP BY c.collection_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cohort_progress")
+    op.drop_table("sample_progress")
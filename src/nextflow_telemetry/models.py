@@ -68,6 +68,11 @@ class Telemetry(BaseModel):
     trace: Optional[Any] = Field(default=None, description="Per-task execution details (process name, status, resource usage). Present only on `process_*` events.")
 
 
+class TelemetryAck(BaseModel):
+    """Acknowledgement for an ingested weblog event."""
+    status: str = Field(description="Always 'ok'; the event was stored.")
+
+
 class HealthResponse(BaseModel):
     """Successful health check response."""
     message: str = Field(description="Always 'App Started'.")
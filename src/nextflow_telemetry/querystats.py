@@ -0,0 +1,109 @@
+"""Per-request SQL statistics for the access log.
+
+``access_log_middleware`` (main.py) opens a ``QueryStats`` for a sampled
+request. A contextvar makes it visible to the engine hooks installed by
+``instrument(engine)``, which add up per request:
+
+- the number of statements and the total time spent in them;
+- the time spent waiting to check a connection out of the pool
+  (metrics.InstrumentedPool);
+- the slowest statement and how long it took.
+
+The stats land on the request's ``http.request`` log line as
+``db_statements``, ``db_ms``, ``db_pool_wait_ms``, ``db_slowest_ms`` and
+``db_slowest_sql``. Together with ``duration_ms`` that tells a DB-bound
+request from one that's slow in Python or waiting on the pool.
+
+SQLAlchemy runs its sync hooks in a greenlet that shares the awaiting
+task's context, and ``fan_out`` workers copy it, so a request's concurrent
+queries all count toward the same stats. Work started outside a request
+(the spool drainer, scrape hooks) isn't attributed anywhere.
+
+``QUERY_STATS_SAMPLE_RATE`` is the fraction of requests that get stats;
+unsampled requests skip the per-statement bookkeeping entirely.
+"""
+from __future__ import annotations
+
+import random
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+# Longest slowest-statement text written to the log.
+SLOWEST_SQL_MAX_CHARS = 300
+
+# Key on the connection's ``info`` dict: perf_counter() at cursor execute.
+_STARTED = "querystats.started"
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_sql: str | None = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements += 1
+        self.db_seconds += elapsed
+        if elapsed > self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_sql = statement
+
+    def log_fields(self) -> dict[str, object]:
+        fields: dict[str, object] = {
+            "db_statements": self.statements,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "db_pool_wait_ms": round(self.pool_wait_seconds * 1000, 1),
+        }
+        if self.slowest_sql is not None:
+            fields["db_slowest_ms"] = round(self.slowest_seconds * 1000, 1)
+            fields["db_slowest_sql"] = " ".join(self.slowest_sql.split())[:SLOWEST_SQL_MAX_CHARS]
+        return fields
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("querystats", default=None)
+
+
+def current() -> QueryStats | None:
+    """The running request's stats, or None outside a sampled request."""
+    return _current.get()
+
+
+def begin(sample_rate: float | None = None) -> tuple[QueryStats | None, Token | None]:
+    """Start collecting for this request if it's sampled; pass the token to ``end``."""
+    rate = settings.QUERY_STATS_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None, None
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end(token: Token | None) -> None:
+    if token is not None:
+        _current.reset(token)
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """Time every statement executed through ``engine`` for the running request."""
+    sync = engine.sync_engine
+
+    def before_cursor_execute(conn: Any, *args: Any) -> None:
+        if _current.get() is not None:
+            conn.info[_STARTED] = time.perf_counter()
+
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        started = conn.info.pop(_STARTED, None)
+        stats = _current.get()
+        if started is not None and stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    event.listen(sync, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,167 @@
+"""Read-replica routing for read-only endpoints.
+
+With ``SQLALCHEMY_READ_URI`` set, the read-only services and listings
+(process metrics, cohorts, ``/admin/stats``, ``/runs``, curated and sample
+listings) get a ``ReadEngine`` instead of the primary engine. Each
+``connect()`` / ``begin()`` goes to the replica unless
+
+- the replica is lagging: a background probe measures replay lag every
+  ``READ_REPLICA_CHECK_SECONDS``, and a lag above
+  ``READ_REPLICA_MAX_LAG_SECONDS`` (or a failed probe) sends reads to the
+  primary until a later probe is within bounds. The replica counts as
+  caught up when it has replayed everything it received *and* its WAL
+  receiver is streaming and recently heard from the primary, so an idle
+  primary doesn't make ``pg_last_xact_replay_timestamp()`` look stale but a
+  replica cut off from the primary isn't taken as current.
+- the request asked for read-your-writes: ``?consistency=strong`` or an
+  ``X-Consistency: strong`` header. main.py's middleware sets the
+  ``consistency`` context variable for that request.
+
+Until the first probe succeeds, reads go to the primary. Without
+``SQLALCHEMY_READ_URI`` there is no replica and ``ReadEngine`` always hands
+out the primary, so services can take it unconditionally. It implements
+``Connectable`` — the part of ``AsyncEngine`` the read-side services use —
+and forwards everything else to the engine it picks.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import AbstractAsyncContextManager
+from contextvars import ContextVar
+from typing import Any, Protocol
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .log import logger
+
+# "strong" for requests that must read the primary; set per request by main.py.
+consistency: ContextVar[str] = ContextVar("consistency", default="eventual")
+
+# Inputs to replay_lag(). receipt_age is NULL unless a WAL receiver is
+# streaming (and visible to this role).
+_LAG_SQL = text(
+    """
+    SELECT pg_is_in_recovery() AS in_recovery,
+           pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AS replayed_all,
+           extract(epoch FROM now() - pg_last_xact_replay_timestamp()) AS replay_age,
+           (SELECT extract(epoch FROM now() - last_msg_receipt_time)
+            FROM pg_stat_wal_receiver WHERE status = 'streaming') AS receipt_age
+    """
+)
+
+
+def replay_lag(row: Any, receiver_timeout_seconds: float) -> float:
+    """Seconds the replica is behind, from a ``_LAG_SQL`` row.
+
+    Having replayed everything it received only means caught up while the
+    WAL receiver is streaming and has heard from the primary recently. A
+    disconnected receiver's receive LSN is frozen, so replay always catches
+    up to it; then the age of the last replayed transaction is the lag.
+    """
+    if not row.in_recovery:
+        return 0.0
+    if (
+        row.replayed_all
+        and row.receipt_age is not None
+        and float(row.receipt_age) <= receiver_timeout_seconds
+    ):
+        return 0.0
+    if row.replay_age is None:
+        return float("inf")
+    return float(row.replay_age)
+
+
+class Connectable(Protocol):
+    """What services take as their ``engine``: an ``AsyncEngine``, a
+    ``ReadEngine``, or any other source of connections."""
+
+    def connect(self) -> AbstractAsyncContextManager[AsyncConnection]: ...
+
+    def begin(self) -> AbstractAsyncContextManager[AsyncConnection]: ...
+
+
+class ReadEngine:
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: AsyncEngine | None = None,
+        max_lag_seconds: float = 5.0,
+        check_seconds: float = 2.0,
+        receiver_timeout_seconds: float = 60.0,
+    ) -> None:
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        # How long a streaming receiver may go without a message from the
+        # primary and still count as connected. An idle primary only sends
+        # keepalives every wal_sender_timeout / 2 (30s by default).
+        self.receiver_timeout_seconds = receiver_timeout_seconds
+        self.lag_seconds: float | None = None  # last probe; None = unknown / failed
+        self._prober: asyncio.Task | None = None
+
+    @property
+    def replica_usable(self) -> bool:
+        return (
+            self.replica is not None
+            and self.lag_seconds is not None
+            and self.lag_seconds <= self.max_lag_seconds
+        )
+
+    def pick(self) -> AsyncEngine:
+        if self.replica is None or consistency.get() == "strong" or not self.replica_usable:
+            return self.primary
+        return self.replica
+
+    def connect(self) -> AsyncConnection:
+        return self.pick().connect()
+
+    def begin(self) -> AbstractAsyncContextManager[AsyncConnection]:
+        return self.pick().begin()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.pick(), name)
+
+    # -- lag probe ----------------------------------------------------------
+
+    async def check(self) -> None:
+        """Measure the replica's replay lag once."""
+        if self.replica is None:
+            return
+        was_usable = self.replica_usable
+        try:
+            async with self.replica.connect() as conn:
+                row = (await conn.execute(_LAG_SQL)).one()
+            self.lag_seconds = replay_lag(row, self.receiver_timeout_seconds)
+        except Exception:
+            self.lag_seconds = None
+            if was_usable:
+                logger.warning("replica.probe_failed", exc_info=True)
+        if self.replica_usable != was_usable:
+            logger.info(
+                "replica.routing_changed",
+                extra={"lag_seconds": self.lag_seconds, "replica_usable": self.replica_usable},
+            )
+
+    def start(self) -> None:
+        if self.replica is None or self._prober is not None:
+            return
+
+        async def run() -> None:
+            while True:
+                await self.check()
+                await asyncio.sleep(self.check_seconds)
+
+        self._prober = asyncio.create_task(run())
+
+    async def stop(self) -> None:
+        if self._prober is not None:
+            self._prober.cancel()
+            try:
+                await self._prober
+            except asyncio.CancelledError:
+                pass
+            self._prober = None
@@ -0,0 +1,48 @@
+"""JSON response rendering.
+
+``JSONResponse`` is the app's ``default_response_class``: FastAPI's orjson
+response plus the one type our SQL rows carry that orjson won't encode —
+``Decimal`` (numeric expressions such as ``peak_rss / 1073741824.0``).
+
+Routes with a ``response_model`` are still validated and encoded by FastAPI
+before rendering; only the final dump is orjson. Heavy read endpoints whose
+rows come straight from SQL return ``JSONResponse(payload)`` themselves,
+which skips that re-validation entirely (the ``response_model`` stays on the
+route for the OpenAPI schema). Datetimes are then rendered by orjson as
+RFC 3339 (``+00:00`` rather than ``Z``).
+
+``etag_matches`` is the ``If-None-Match`` check for routes that answer
+conditional GETs with ``304 Not Modified``.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an ``If-None-Match`` header value matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    want = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == want for tag in if_none_match.split(","))
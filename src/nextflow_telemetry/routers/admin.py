@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import datetime
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from .. import admission, slowlog
+from ..replica import Connectable
 from ..db import daemon_agents_tbl, dead_letter_tbl, jobs_tbl, samples_tbl, workflow_runs_tbl, workflows_tbl
 from ..services import lifecycle
 from ..services.lifecycle import RUN_TERMINAL_STATUSES, JobStatus, RunStatus
@@ -22,8 +25,55 @@ _DAEMON_ACTIVE_THRESHOLD = datetime.timedelta(minutes=2)
 _HEARTBEAT_STALE_MINUTES_DEFAULT = 15.0
 
 
-def create_admin_router(engine: AsyncEngine) -> APIRouter:
+async def catalog_stats(conn) -> dict:
+    """Sample/workflow totals, job and run counts by status, unresolved dead letters.
+
+    Shared by ``GET /admin/stats`` and the dashboard snapshot.
+    """
+    samples_total = (await conn.execute(
+        select(func.count()).select_from(samples_tbl)
+    )).scalar_one()
+    workflows_total = (await conn.execute(
+        select(func.count()).select_from(workflows_tbl)
+    )).scalar_one()
+    jobs_rows = (await conn.execute(
+        select(jobs_tbl.c.status, func.count())
+        .group_by(jobs_tbl.c.status)
+    )).all()
+    # Same breakdown, but only jobs whose workflow version is active.
+    # workflow_pk identifies the exact (workflow_id, version) row, so the
+    # join is precise — retired-version jobs are excluded (#114/#116).
+    jobs_active_rows = (await conn.execute(
+        select(jobs_tbl.c.status, func.count())
+        .select_from(
+            jobs_tbl.join(workflows_tbl, jobs_tbl.c.workflow_pk == workflows_tbl.c.id)
+        )
+        .where(workflows_tbl.c.status == "active")
+        .group_by(jobs_tbl.c.status)
+    )).all()
+    runs_rows = (await conn.execute(
+        select(workflow_runs_tbl.c.status, func.count())
+        .group_by(workflow_runs_tbl.c.status)
+    )).all()
+    dlq_unresolved = (await conn.execute(
+        select(func.count()).select_from(dead_letter_tbl)
+        .where(dead_letter_tbl.c.resolved_at.is_(None))
+    )).scalar_one()
+
+    return {
+        "samples": samples_total,
+        "workflows": workflows_total,
+        "jobs_by_status": {status: count for status, count in jobs_rows},
+        "jobs_by_status_active": {status: count for status, count in jobs_active_rows},
+        "runs_by_status": {status: count for status, count in runs_rows},
+        "dead_letter_unresolved": dlq_unresolved,
+    }
+
+
+def create_admin_router(engine: AsyncEngine, read_engine: Connectable | None = None) -> APIRouter:
+    """Maintenance writes use ``engine``; /stats reads ``read_engine`` (default: ``engine``)."""
     router = APIRouter(prefix="/admin", tags=["admin"])
+    stats_engine = read_engine or engine
     reconcile_svc = ReconcileService(engine=engine)
 
     @router.post(
@@ -289,44 +339,38 @@ def create_admin_router(engine: AsyncEngine) -> APIRouter:
         ),
     )
     async def stats():
-        async with engine.begin() as conn:
-            samples_total = (await conn.execute(
-                select(func.count()).select_from(samples_tbl)
-            )).scalar_one()
-            workflows_total = (await conn.execute(
-                select(func.count()).select_from(workflows_tbl)
-            )).scalar_one()
-            jobs_rows = (await conn.execute(
-                select(jobs_tbl.c.status, func.count())
-                .group_by(jobs_tbl.c.status)
-            )).all()
-            # Same breakdown, but only jobs whose workflow version is active.
-            # workflow_pk identifies the exact (workflow_id, version) row, so the
-            # join is precise — retired-version jobs are excluded (#114/#116).
-            jobs_active_rows = (await conn.execute(
-                select(jobs_tbl.c.status, func.count())
-                .select_from(
-                    jobs_tbl.join(workflows_tbl, jobs_tbl.c.workflow_pk == workflows_tbl.c.id)
-                )
-                .where(workflows_tbl.c.status == "active")
-                .group_by(jobs_tbl.c.status)
-            )).all()
-            runs_rows = (await conn.execute(
-                select(workflow_runs_tbl.c.status, func.count())
-                .group_by(workflow_runs_tbl.c.status)
-            )).all()
-            dlq_unresolved = (await conn.execute(
-                select(func.count()).select_from(dead_letter_tbl)
-                .where(dead_letter_tbl.c.resolved_at.is_(None))
-            )).scalar_one()
+        async with stats_engine.connect() as conn:
+            return await catalog_stats(conn)
 
-        return {
-            "samples": samples_total,
-            "workflows": workflows_total,
-            "jobs_by_status": {status: count for status, count in jobs_rows},
-            "jobs_by_status_active": {status: count for status, count in jobs_active_rows},
-            "runs_by_status": {status: count for status, count in runs_rows},
-            "dead_letter_unresolved": dlq_unresolved,
-        }
+    @router.get(
+        "/admission",
+        summary="Admission gates and connection pools per route class",
+        description=(
+            "For each route class (ingest, dispatch, uploads, analytics): the "
+            "concurrency limit, requests in flight, requests waiting for a slot, "
+            "the queue bound, and requests rejected with 503 since startup; plus "
+            "each class's connection pool size and checked-out connections. "
+            "In-process only — one API worker's view."
+        ),
+    )
+    async def admission_stats():
+        return admission.controller.snapshot()
+
+    @router.get(
+        "/slow-queries",
+        summary="Slow statements, aggregated by fingerprint",
+        description=(
+            "Statements that took at least `SLOW_QUERY_MS`, from a ring buffer of the "
+            "last `SLOW_QUERY_BUFFER_SIZE`, grouped by normalized SQL fingerprint: "
+            "count, p50 / p95 / max duration, last seen, parameter types, and the "
+            "latest `EXPLAIN (FORMAT JSON)` plan (captured in the background, so it "
+            "may be null for a moment). Ordered by p95, slowest first. In-process "
+            "only — one API worker's view."
+        ),
+    )
+    async def slow_queries(
+        include_plans: Annotated[bool, Query(description="Include each fingerprint's EXPLAIN plan.")] = True,
+    ):
+        return slowlog.log.snapshot(include_plans=include_plans)
 
     return router
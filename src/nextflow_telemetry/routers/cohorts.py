@@ -15,8 +15,8 @@ from typing import Annotated, Optional
 
 from fastapi import APIRouter, HTTPException, Path, Query
 from pydantic import BaseModel, Field
-from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ..replica import Connectable
 from ..services.cohort import CohortService
 
 
@@ -101,7 +101,7 @@ class CohortFailuresResponse(BaseModel):
     rows: list[CohortFailureRow]
 
 
-def create_cohorts_router(engine: AsyncEngine) -> APIRouter:
+def create_cohorts_router(engine: Connectable) -> APIRouter:
     router = APIRouter(prefix="/cohorts", tags=["cohorts"])
     svc = CohortService(engine=engine)
 
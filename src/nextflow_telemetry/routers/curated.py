@@ -11,6 +11,7 @@ from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ..replica import Connectable
 from ..services.curated import CuratedService
 
 
@@ -56,14 +57,42 @@ class AnnotationResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class AnnotationPageResponse(BaseModel):
+    """One page of annotations matching an attribute filter."""
+    items: list[AnnotationResponse]
+    total: int
+
+
+class FacetValueResponse(BaseModel):
+    value: str
+    count: int
+
+
+class FacetResponse(BaseModel):
+    """Distinct-sample counts per value of one curated metadata key."""
+    key: str
+    total: int
+    values: list[FacetValueResponse]
+
+
+_ATTR_DOC = (
+    "Metadata filter as `key:value`; repeat it. Different keys must all "
+    "match, several values for one key match any of them."
+)
+
+
 # ---------------------------------------------------------------------------
 # Router factory
 # ---------------------------------------------------------------------------
 
-def create_curated_router(engine: AsyncEngine) -> APIRouter:
-    """Return a router for curated annotation endpoints, injected with *engine*."""
+def create_curated_router(engine: AsyncEngine, read_engine: Connectable | None = None) -> APIRouter:
+    """Return a router for curated annotation endpoints, injected with *engine*.
+
+    Imports write through *engine*; the listings read *read_engine* (default: *engine*).
+    """
     router = APIRouter(prefix="/curated", tags=["curated"])
     svc = CuratedService(engine=engine)
+    read_svc = CuratedService(engine=read_engine or engine)
 
     # -----------------------------------------------------------------------
     # Import
@@ -89,10 +118,10 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
         pubmed_id: str | None = Form(default=None, description="PubMed ID for the study."),
         doi: str | None = Form(default=None, description="DOI for the study."),
     ):
-        content = await file.read()
         try:
+            # Parsed straight off the spooled upload, not read into memory whole.
             summary = await svc.import_tsv(
-                tsv_content=content,
+                tsv_content=file.file,
                 study_name=study_name,
                 source_file=file.filename,
                 pubmed_id=pubmed_id,
@@ -122,7 +151,7 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
         description="Returns all imported studies ordered by name.",
     )
     async def list_studies():
-        rows = await svc.list_studies()
+        rows = await read_svc.list_studies()
         return [_study_to_response(r) for r in rows]
 
     @router.get(
@@ -132,7 +161,7 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
         description="Returns a single study record. Returns 404 if the study does not exist.",
     )
     async def get_study(study_name: str):
-        row = await svc.get_study(study_name)
+        row = await read_svc.get_study(study_name)
         if row is None:
             raise HTTPException(status_code=404, detail=f"Study '{study_name}' not found")
         return _study_to_response(row)
@@ -148,9 +177,54 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
         limit: int = Query(default=100, ge=1, le=1000, description="Maximum rows to return."),
         offset: int = Query(default=0, ge=0, description="Number of rows to skip."),
     ):
-        rows = await svc.list_study_samples(study_name, limit=limit, offset=offset)
+        rows = await read_svc.list_study_samples(study_name, limit=limit, offset=offset)
         return [_annotation_to_response(r) for r in rows]
 
+    # -----------------------------------------------------------------------
+    # Attribute filtering / facets
+    # -----------------------------------------------------------------------
+
+    @router.get(
+        "/samples",
+        response_model=AnnotationPageResponse,
+        summary="Filter curated samples by metadata attributes",
+        description=(
+            "Annotation records whose metadata matches every `attr` filter "
+            "(e.g. `?attr=disease:IBD&attr=country:USA`), optionally within one "
+            "study. Values are matched exactly, as stored in the TSV."
+        ),
+    )
+    async def filter_samples(
+        attr: list[str] = Query(default=[], description=_ATTR_DOC),
+        study_name: str | None = Query(default=None, description="Restrict to one study."),
+        limit: int = Query(default=100, ge=1, le=1000, description="Maximum rows to return."),
+        offset: int = Query(default=0, ge=0, description="Number of rows to skip."),
+    ):
+        rows, total = await read_svc.filter_samples(
+            _parse_attrs(attr), study_name=study_name, limit=limit, offset=offset
+        )
+        return AnnotationPageResponse(
+            items=[_annotation_to_response(r) for r in rows], total=total
+        )
+
+    @router.get(
+        "/facets/{key}",
+        response_model=FacetResponse,
+        summary="Value counts for a curated metadata key",
+        description=(
+            "Distinct samples per value of `key` (e.g. `disease`, `country`, "
+            "`body_site`) among samples matching the `attr` filters; filters on "
+            "`key` itself are ignored. Cached for a few minutes and refreshed by "
+            "imports, so counts can briefly trail imports made on other workers."
+        ),
+    )
+    async def facet_counts(
+        key: str,
+        attr: list[str] = Query(default=[], description=_ATTR_DOC),
+        study_name: str | None = Query(default=None, description="Restrict to one study."),
+    ):
+        return await read_svc.facet_counts(key, _parse_attrs(attr), study_name=study_name)
+
     # -----------------------------------------------------------------------
     # Samples (cross-study lookup)
     # -----------------------------------------------------------------------
@@ -165,7 +239,7 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
         ),
     )
     async def get_sample_annotations(sample_id: str):
-        rows = await svc.get_sample_annotations(sample_id)
+        rows = await read_svc.get_sample_annotations(sample_id)
         return [_annotation_to_response(r) for r in rows]
 
     return router
@@ -175,6 +249,17 @@ def create_curated_router(engine: AsyncEngine) -> APIRouter:
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _parse_attrs(attr: list[str]) -> dict[str, list[str]]:
+    """``["disease:IBD", "disease:CRC", "country:USA"]`` -> ``{key: [values]}``."""
+    attrs: dict[str, list[str]] = {}
+    for a in attr:
+        key, sep, value = a.partition(":")
+        if not sep or not key:
+            raise HTTPException(status_code=400, detail=f"attr must be key:value, got {a!r}")
+        attrs.setdefault(key, []).append(value)
+    return attrs
+
+
 def _study_to_response(row: Any) -> StudyResponse:
     from ..services.curated import StudyRow
     r: StudyRow = row
@@ -25,6 +25,16 @@ def _row_to_response(row: dict) -> DaemonAgentResponse:
     )
 
 
+async def list_agents(conn, active_only: bool = False) -> list[DaemonAgentResponse]:
+    """All daemon agents, most recently seen first."""
+    stmt = select(daemon_agents_tbl).order_by(daemon_agents_tbl.c.last_seen_at.desc())
+    rows = (await conn.execute(stmt)).mappings().all()
+    agents = [_row_to_response(dict(r)) for r in rows]
+    if active_only:
+        agents = [a for a in agents if a.is_active]
+    return agents
+
+
 def create_daemons_router(engine: AsyncEngine) -> APIRouter:
     router = APIRouter(prefix="/daemons", tags=["daemons"])
 
@@ -92,13 +102,8 @@ def create_daemons_router(engine: AsyncEngine) -> APIRouter:
         ),
     )
     async def list_daemons(active_only: bool = False) -> list[DaemonAgentResponse]:
-        stmt = select(daemon_agents_tbl).order_by(daemon_agents_tbl.c.last_seen_at.desc())
         async with engine.connect() as conn:
-            rows = (await conn.execute(stmt)).mappings().all()
-        agents = [_row_to_response(dict(r)) for r in rows]
-        if active_only:
-            agents = [a for a in agents if a.is_active]
-        return agents
+            return await list_agents(conn, active_only)
 
     @router.delete(
         "/{agent_id:path}",
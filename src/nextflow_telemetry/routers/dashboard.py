@@ -0,0 +1,144 @@
+"""Dashboard snapshot — one poll for the Overview / Infra / Metrics pages.
+
+Those pages used to fire ``/admin/stats``, ``/process-metrics/running``,
+``/process-metrics/summary``, ``/cohorts/leaderboard``, ``/daemons`` and
+``/runs`` on every poll, each doing its own DB work. ``GET
+/api/dashboard/snapshot`` returns all six from one read-only
+``REPEATABLE READ`` transaction, so the numbers agree with each other.
+
+The snapshot is computed at most once per ``DASHBOARD_SNAPSHOT_TTL_SECONDS``
+per process and shared by every viewer. Concurrent pollers that find it
+expired wait for a single rebuild. It carries a weak ``ETag`` over the data,
+excluding its timestamp, so a poll with a matching ``If-None-Match`` gets an
+empty ``304``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import APIRouter, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ..config import settings
+from ..models import DaemonAgentResponse
+from ..replica import Connectable
+from ..responses import dumps, etag_matches
+from ..services.cohort import CohortService
+from ..services.process_metrics import ProcessMetricsService
+from .admin import catalog_stats
+from .cohorts import CohortLeaderboardRow
+from .daemons import list_agents
+from .runs import runs_page
+
+
+class DashboardSnapshotResponse(BaseModel):
+    generated_at_utc: datetime
+    stats: dict[str, Any] = Field(description="Same as GET /api/admin/stats.")
+    running: dict[str, Any] = Field(description="Same as GET /api/process-metrics/running.")
+    summary: dict[str, Any] = Field(description="Same as GET /api/process-metrics/summary (default window).")
+    cohorts: list[CohortLeaderboardRow] = Field(description="Same as GET /api/cohorts/leaderboard.")
+    daemons: list[DaemonAgentResponse] = Field(description="Same as GET /api/daemons.")
+    runs: dict[str, Any] = Field(description="Same as GET /api/runs (first page).")
+
+
+class _OneConnection:
+    """``Connectable`` that hands every ``connect()`` the same connection.
+
+    Lets the services run inside the snapshot's transaction. Users take
+    turns: an asyncpg connection runs one statement at a time. ``begin()``
+    is the same: the (read-only) transaction is already open.
+    """
+
+    def __init__(self, conn: AsyncConnection) -> None:
+        self._conn = conn
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[AsyncConnection]:
+        async with self._lock:
+            yield self._conn
+
+    def begin(self) -> AbstractAsyncContextManager[AsyncConnection]:
+        return self.connect()
+
+
+@dataclass
+class _Snapshot:
+    body: bytes
+    etag: str
+    expires: float
+
+
+def create_dashboard_router(engine: Connectable, ttl_seconds: float | None = None) -> APIRouter:
+    router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+    ttl = settings.DASHBOARD_SNAPSHOT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    cached: _Snapshot | None = None
+    rebuilding = asyncio.Lock()
+
+    async def build() -> _Snapshot:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(
+                isolation_level="REPEATABLE READ", postgresql_readonly=True
+            )
+            async with conn.begin():
+                one = _OneConnection(conn)
+                metrics = ProcessMetricsService(engine=one)
+                stats = await catalog_stats(conn)
+                running = await metrics.running()
+                summary = await metrics.summary()
+                cohorts = await CohortService(engine=one).leaderboard()
+                daemons = [a.model_dump() for a in await list_agents(conn)]
+                runs = await runs_page(conn)
+        # The snapshot has one timestamp; per-section ones would change the
+        # ETag on every rebuild.
+        running.pop("generated_at_utc", None)
+        summary.pop("generated_at_utc", None)
+        data = {
+            "stats": stats,
+            "running": running,
+            "summary": summary,
+            "cohorts": cohorts,
+            "daemons": daemons,
+            "runs": runs,
+        }
+        etag = 'W/"' + hashlib.blake2b(dumps(data), digest_size=16).hexdigest() + '"'
+        body = dumps({"generated_at_utc": datetime.now(timezone.utc), **data})
+        return _Snapshot(body=body, etag=etag, expires=time.monotonic() + ttl)
+
+    async def current() -> _Snapshot:
+        nonlocal cached
+        if cached is None or cached.expires <= time.monotonic():
+            async with rebuilding:
+                if cached is None or cached.expires <= time.monotonic():
+                    cached = await build()
+        return cached
+
+    @router.get(
+        "/snapshot",
+        response_model=DashboardSnapshotResponse,
+        responses={304: {"description": "Unchanged since the snapshot named in If-None-Match."}},
+        summary="Everything the dashboard polls, in one consistent snapshot",
+        description=(
+            "Admin stats, in-flight tasks, the process summary (default 7-day window), the "
+            "cohort leaderboard, daemons and the first page of runs, read in one "
+            "REPEATABLE READ transaction. Shared across viewers for "
+            "`DASHBOARD_SNAPSHOT_TTL_SECONDS`. Send the returned `ETag` back as "
+            "`If-None-Match` to get `304 Not Modified` while the data is unchanged."
+        ),
+    )
+    async def snapshot(request: Request) -> Response:
+        snap = await current()
+        headers = {"ETag": snap.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), snap.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=snap.body, media_type="application/json", headers=headers)
+
+    return router
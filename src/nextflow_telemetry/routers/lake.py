@@ -0,0 +1,142 @@
+"""Read-only output-catalog router (``/api/lake/*``).
+
+Thin wrapper over LakeService:
+  - GET /api/lake/snapshot                         — the pinned DuckLake snapshot
+  - GET /api/lake/samples/{sample_id}/{table}      — one sample's profile rows
+  - GET /api/lake/studies/{study_name}/{table}     — a study's profile rows
+  - GET /api/lake/matrix                           — sample×taxon matrix (Parquet / Arrow IPC)
+
+Every response reads the same pinned snapshot (returned as ``snapshot_id`` /
+``X-Lake-Snapshot``), so paging through a study or pairing a profile with a
+matrix export sees one consistent lake. Only mounted when LAKE_API_ENABLED.
+"""
+from __future__ import annotations
+
+from typing import Annotated, Any, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Path, Query, Response
+from pydantic import BaseModel, Field
+
+from ..services.lake import MATRIX_METHODS, PROFILE_TABLES, LakeService, arrow_available
+
+LakeTable = Literal[PROFILE_TABLES]  # type: ignore[valid-type]
+
+_MEDIA = {"parquet": "application/vnd.apache.parquet",
+          "arrow": "application/vnd.apache.arrow.stream"}
+
+
+class LakeSnapshotResponse(BaseModel):
+    snapshot_id: int = Field(description="DuckLake snapshot every /lake read is currently pinned to.")
+    pinned_seconds_ago: float
+
+
+class LakeRowsResponse(BaseModel):
+    table: str
+    snapshot_id: int
+    rows: list[dict[str, Any]] = Field(description="Rows in the lake table's own column names and units.")
+
+
+def create_lake_router(svc: LakeService) -> APIRouter:
+    router = APIRouter(prefix="/lake", tags=["lake"])
+
+    async def _profile(table: str, **filters: Any) -> LakeRowsResponse:
+        try:
+            res = await svc.profile(table, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return LakeRowsResponse(table=table, **res)
+
+    @router.get(
+        "/snapshot",
+        response_model=LakeSnapshotResponse,
+        summary="Pinned lake snapshot",
+        description=(
+            "The DuckLake snapshot reads are pinned to. The pin advances on its "
+            "own every few minutes; `refresh=true` re-reads it from the catalog now."
+        ),
+    )
+    async def get_snapshot(
+        refresh: Annotated[bool, Query(description="Re-pin to the latest snapshot.")] = False,
+    ) -> LakeSnapshotResponse:
+        try:
+            return LakeSnapshotResponse(**await svc.snapshot(refresh=refresh))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    @router.get(
+        "/samples/{sample_id}/{table}",
+        response_model=LakeRowsResponse,
+        summary="Per-sample profile",
+        description="Rows of one lake table for a sample, optionally scoped to a workflow/version and rank.",
+    )
+    async def sample_profile(
+        sample_id: Annotated[str, Path(description="Content-addressed sample_id.")],
+        table: Annotated[LakeTable, Path(description="Lake table.")],
+        workflow: Annotated[Optional[str], Query()] = None,
+        version: Annotated[Optional[str], Query()] = None,
+        rank: Annotated[Optional[str], Query(description="Taxonomic rank (taxonomic_profile_* only).")] = None,
+        limit: Annotated[int, Query(ge=1, le=100000)] = 10000,
+    ) -> LakeRowsResponse:
+        return await _profile(table, sample_id=sample_id, workflow=workflow, version=version,
+                              rank=rank, limit=limit)
+
+    @router.get(
+        "/studies/{study_name}/{table}",
+        response_model=LakeRowsResponse,
+        summary="Per-study profile",
+        description="Rows of one lake table for every sample in a study, ordered by sample_id.",
+    )
+    async def study_profile(
+        study_name: Annotated[str, Path(description="Study label as written by the ETL.")],
+        table: Annotated[LakeTable, Path(description="Lake table.")],
+        workflow: Annotated[Optional[str], Query()] = None,
+        version: Annotated[Optional[str], Query()] = None,
+        rank: Annotated[Optional[str], Query(description="Taxonomic rank (taxonomic_profile_* only).")] = None,
+        limit: Annotated[int, Query(ge=1, le=1000000)] = 100000,
+    ) -> LakeRowsResponse:
+        return await _profile(table, study_name=study_name, workflow=workflow, version=version,
+                              rank=rank, limit=limit)
+
+    @router.get(
+        "/matrix",
+        summary="Sample×taxon matrix export",
+        description=(
+            "One row per sample, one column per clade, values in the method's "
+            "native units (metaphlan `relative_abundance`, bracken "
+            "`fraction_total_reads`). Scope by `study_name` and/or repeated "
+            "`sample_id`. Returned as Parquet or an Arrow IPC stream."
+        ),
+        response_class=Response,
+        responses={200: {"content": {m: {} for m in _MEDIA.values()}}},
+    )
+    async def matrix(
+        method: Annotated[str, Query(description=f"One of {sorted(MATRIX_METHODS)}.")] = "metaphlan",
+        rank: Annotated[str, Query()] = "species",
+        study_name: Annotated[Optional[str], Query()] = None,
+        sample_id: Annotated[Optional[list[str]], Query()] = None,
+        workflow: Annotated[Optional[str], Query()] = None,
+        version: Annotated[Optional[str], Query()] = None,
+        format: Annotated[Literal["parquet", "arrow"], Query()] = "parquet",
+    ) -> Response:
+        if format == "arrow" and not arrow_available():
+            raise HTTPException(status_code=501, detail="Arrow export needs pyarrow; use format=parquet")
+        try:
+            res = await svc.matrix(method, format, rank=rank, study_name=study_name,
+                                   sample_ids=sample_id, workflow=workflow, version=version)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        ext = "parquet" if format == "parquet" else "arrows"
+        return Response(
+            content=res["body"],
+            media_type=_MEDIA[format],
+            headers={
+                "X-Lake-Snapshot": str(res["snapshot_id"]),
+                "Content-Disposition": f'attachment; filename="{method}_{rank}_matrix.{ext}"',
+            },
+        )
+
+    return router
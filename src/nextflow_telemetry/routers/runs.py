@@ -40,6 +40,9 @@ from ..models import (
     WrapperLogEvent,
     WrapperStartedEvent,
 )
+from ..fanout import fan_out
+from ..replica import Connectable
+from ..responses import JSONResponse
 from ..db import task_logs_tbl, telemetry_tbl, workflow_runs_tbl, jobs_tbl, task_executions_tbl
 from ..services import lifecycle
 
@@ -109,8 +112,42 @@ _WRAPPER_LOG_TYPE = "wrapper_output_log"
 _run_event_adapter: TypeAdapter[RunEvent] = TypeAdapter(RunEvent)
 
 
-def create_runs_router(engine: AsyncEngine) -> APIRouter:
+async def runs_page(
+    conn,
+    *,
+    status: str | None = None,
+    workflow_id: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> dict:
+    """One page of workflow_runs, newest first, each with its ``classification``."""
+    now = datetime.now(timezone.utc)
+    stmt = select(workflow_runs_tbl).order_by(workflow_runs_tbl.c.claimed_at.desc().nullslast())
+    if status:
+        stmt = stmt.where(workflow_runs_tbl.c.status == status)
+    if workflow_id:
+        stmt = stmt.where(workflow_runs_tbl.c.workflow_id == workflow_id)
+    count_stmt = select(func.count()).select_from(workflow_runs_tbl)
+    if status:
+        count_stmt = count_stmt.where(workflow_runs_tbl.c.status == status)
+    if workflow_id:
+        count_stmt = count_stmt.where(workflow_runs_tbl.c.workflow_id == workflow_id)
+
+    rows = (await conn.execute(stmt.limit(limit).offset(offset))).mappings().all()
+    total = (await conn.execute(count_stmt)).scalar_one()
+
+    runs = []
+    for r in rows:
+        d = dict(r)
+        d["classification"] = _classify_run(d, now)
+        runs.append(d)
+    return {"total": total, "limit": limit, "offset": offset, "runs": runs}
+
+
+def create_runs_router(engine: Connectable, ingest_engine: AsyncEngine | None = None) -> APIRouter:
+    """Run events write through ``ingest_engine`` (default: ``engine``); reads use ``engine``."""
     router = APIRouter(prefix="/runs", tags=["runs"])
+    event_engine = ingest_engine or engine
 
     @router.post(
         "/{run_name}/event",
@@ -192,7 +229,7 @@ def create_runs_router(engine: AsyncEngine) -> APIRouter:
         wrapper_output_log_uploaded = False
         now = datetime.now(timezone.utc)
 
-        async with engine.begin() as conn:
+        async with event_engine.begin() as conn:
             # 1. Resolve workflow_id / version / run_id from the existing
             # workflow_runs row if known. run_id is Nextflow's own UUID which
             # we don't have at wrapper time — we copy whatever has been recorded
@@ -328,28 +365,12 @@ def create_runs_router(engine: AsyncEngine) -> APIRouter:
         limit: int = Query(default=50, ge=1, le=500),
         offset: int = Query(default=0, ge=0),
     ):
-        now = datetime.now(timezone.utc)
-        stmt = select(workflow_runs_tbl).order_by(workflow_runs_tbl.c.claimed_at.desc().nullslast())
-        if status:
-            stmt = stmt.where(workflow_runs_tbl.c.status == status)
-        if workflow_id:
-            stmt = stmt.where(workflow_runs_tbl.c.workflow_id == workflow_id)
-        count_stmt = select(func.count()).select_from(workflow_runs_tbl)
-        if status:
-            count_stmt = count_stmt.where(workflow_runs_tbl.c.status == status)
-        if workflow_id:
-            count_stmt = count_stmt.where(workflow_runs_tbl.c.workflow_id == workflow_id)
-
         async with engine.connect() as conn:
-            rows = (await conn.execute(stmt.limit(limit).offset(offset))).mappings().all()
-            total = (await conn.execute(count_stmt)).scalar_one()
-
-        runs = []
-        for r in rows:
-            d = dict(r)
-            d["classification"] = _classify_run(d, now)
-            runs.append(d)
-        return {"total": total, "limit": limit, "offset": offset, "runs": runs}
+            page = await runs_page(
+                conn, status=status, workflow_id=workflow_id, limit=limit, offset=offset
+            )
+        # Rows straight from SQL: skip FastAPI's jsonable_encoder pass.
+        return JSONResponse(page)
 
     @router.get(
         "/{run_name}",
@@ -363,26 +384,28 @@ def create_runs_router(engine: AsyncEngine) -> APIRouter:
     )
     async def get_run(run_name: Annotated[str, Path(description="Nextflow run name.")]):
         now = datetime.now(timezone.utc)
-        async with engine.connect() as conn:
-            row = (await conn.execute(
+
+        async def fetch_run_row(conn):
+            return (await conn.execute(
                 select(workflow_runs_tbl).where(workflow_runs_tbl.c.run_name == run_name)
             )).mappings().first()
-            if not row:
-                raise HTTPException(status_code=404, detail=f"No workflow run with name '{run_name}'")
 
-            task_counts = (await conn.execute(
+        async def fetch_task_counts(conn):
+            return (await conn.execute(
                 select(task_executions_tbl.c.status, func.count())
                 .where(task_executions_tbl.c.run_name == run_name)
                 .group_by(task_executions_tbl.c.status)
             )).all()
 
-            job_counts = (await conn.execute(
+        async def fetch_job_counts(conn):
+            return (await conn.execute(
                 select(jobs_tbl.c.status, func.count())
                 .where(jobs_tbl.c.run_name == run_name)
                 .group_by(jobs_tbl.c.status)
             )).all()
 
-            failed_tasks = (await conn.execute(
+        async def fetch_failed_tasks(conn):
+            return (await conn.execute(
                 select(
                     task_executions_tbl.c.process,
                     task_executions_tbl.c.sample_id,
@@ -398,13 +421,27 @@ def create_runs_router(engine: AsyncEngine) -> APIRouter:
                 .order_by(task_executions_tbl.c.utc_time.desc())
             )).mappings().all()
 
-            log_types = (await conn.execute(
+        async def fetch_log_types(conn):
+            return (await conn.execute(
                 select(task_logs_tbl.c.log_type).where(
                     task_logs_tbl.c.run_name == run_name,
                     task_logs_tbl.c.log_type.in_([_NEXTFLOW_LOG_TYPE, _WRAPPER_LOG_TYPE]),
                 )
             )).scalars().all()
 
+        # All five are independent; an unknown run just wastes four cheap
+        # index lookups before the 404.
+        failed_tasks, row, task_counts, job_counts, log_types = await fan_out(
+            engine,
+            fetch_failed_tasks,
+            fetch_run_row,
+            fetch_task_counts,
+            fetch_job_counts,
+            fetch_log_types,
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail=f"No workflow run with name '{run_name}'")
+
         d = dict(row)
         d["classification"] = _classify_run(d, now)
         d["task_status_counts"] = {(s or "unknown"): n for s, n in task_counts}
@@ -412,7 +449,7 @@ def create_runs_router(engine: AsyncEngine) -> APIRouter:
         d["failed_tasks"] = [dict(r) for r in failed_tasks]
         d["nextflow_log_available"] = _NEXTFLOW_LOG_TYPE in log_types
         d["wrapper_output_log_available"] = _WRAPPER_LOG_TYPE in log_types
-        return d
+        return JSONResponse(d)
 
     return router
 
@@ -1,13 +1,16 @@
 """Sample catalog router."""
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field, field_validator
 from sqlalchemy.ext.asyncio import AsyncEngine
 
-from ..services.sample import SampleService
+from ..replica import Connectable
+from ..services.sample import BULK_CHUNK_ROWS, SampleService
 from ..utils import parse_srrs
 
 
@@ -59,6 +62,78 @@ class CollectionFacetsResponse(BaseModel):
     collections: list[CollectionFacet] = Field(description="Per-collection sample counts across the whole catalog, largest first. Overlap-allowed (a sample may be in several collections), so counts need not sum to total.")
 
 
+class CollectionIntersectionResponse(BaseModel):
+    collections: list[str] = Field(description="The requested collection ids (deduplicated, sorted).")
+    count: int = Field(description="Number of samples that belong to every requested collection.")
+    sample_ids: list[str] = Field(description="Up to `limit` of those samples, in registration order.")
+
+
+class SampleBulkOutcome(BaseModel):
+    line: int = Field(description="1-based line number in the request body (TSV: the header is line 1).")
+    sample_id: str | None = Field(default=None, description="Registered sample_id (supplied, or derived from the SRRs).")
+    status: str = Field(description="'created', 'updated' or 'invalid'.")
+    error: str | None = Field(default=None, description="Why the row was rejected (invalid rows only).")
+
+
+class SampleBulkResponse(BaseModel):
+    received: int = Field(description="Data rows read from the body (blank lines excluded).")
+    created: int
+    updated: int
+    invalid: int
+    results: list[SampleBulkOutcome] = Field(description="One outcome per data row, in input order.")
+
+
+_NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"}
+_TSV_TYPES = {"text/tab-separated-values", "text/tsv"}
+_BULK_FIELDS = ("sample_id", "ncbi_accession", "biosample_id", "collection", "metadata")
+
+
+async def _body_lines(request: Request) -> AsyncIterator[tuple[int, str]]:
+    """(line_no, text) for each line of the streamed body, without buffering it whole."""
+    buf = b""
+    n = 0
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for raw in lines:
+            n += 1
+            yield n, raw.decode("utf-8", errors="replace").rstrip("\r")
+    if buf:
+        yield n + 1, buf.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def _bulk_rows(request: Request, tsv: bool) -> AsyncIterator[dict[str, Any]]:
+    """Parse NDJSON objects or TSV records (header row first) into register rows."""
+    header: list[str] | None = None
+    async for n, line in _body_lines(request):
+        if not line.strip():
+            continue
+        if tsv:
+            cells = line.split("\t")
+            if header is None:
+                header = [c.strip().lower() for c in cells]
+                continue
+            row: dict[str, Any] = {k: v.strip() or None for k, v in zip(header, cells) if k in _BULK_FIELDS}
+            if row.get("metadata"):
+                try:
+                    row["metadata"] = json.loads(row["metadata"])
+                except ValueError:
+                    yield {"line": n, "error": "metadata column is not valid JSON"}
+                    continue
+        else:
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                yield {"line": n, "error": "not valid JSON"}
+                continue
+            if not isinstance(obj, dict):
+                yield {"line": n, "error": "expected a JSON object"}
+                continue
+            row = {k: obj.get(k) for k in _BULK_FIELDS}
+        row["line"] = n
+        yield row
+
+
 def _row_to_response(row: dict) -> SampleResponse:
     return SampleResponse(
         id=row["id"],
@@ -72,9 +147,18 @@ def _row_to_response(row: dict) -> SampleResponse:
     )
 
 
-def create_samples_router(engine: AsyncEngine) -> APIRouter:
+def create_samples_router(
+    engine: AsyncEngine,
+    read_engine: Connectable | None = None,
+    uploads_engine: AsyncEngine | None = None,
+) -> APIRouter:
+    """Registration writes through ``engine`` (``POST /samples/bulk`` through
+    ``uploads_engine``, the uploads pool it is gated as); listings read
+    ``read_engine``. Both default to ``engine``."""
     router = APIRouter(prefix="/samples", tags=["samples"])
     svc = SampleService(engine=engine)
+    read_svc = SampleService(engine=read_engine or engine)
+    bulk_svc = SampleService(engine=uploads_engine or engine)
 
     @router.post(
         "",
@@ -98,13 +182,53 @@ def create_samples_router(engine: AsyncEngine) -> APIRouter:
         )
         return _row_to_response(row)
 
+    @router.post(
+        "/bulk",
+        response_model=SampleBulkResponse,
+        summary="Register or update many samples",
+        description=(
+            "Bulk form of `POST /samples` for whole studies. The body is streamed: "
+            "NDJSON (`application/x-ndjson`, one register object per line) or TSV "
+            "(`text/tab-separated-values`, header row naming `ncbi_accession` and "
+            "optionally `sample_id`, `biosample_id`, `collection`, `metadata` as JSON). "
+            "`sample_id` defaults to the content-addressed id of the SRRs. Rows are "
+            f"written in transactions of {BULK_CHUNK_ROWS}; a bad row is reported as "
+            "`invalid` without failing the rest. Returns one outcome per data row."
+        ),
+        openapi_extra={"requestBody": {"content": {
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "text/tab-separated-values": {"schema": {"type": "string"}},
+        }}},
+    )
+    async def register_bulk(request: Request):
+        ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if ctype not in _NDJSON_TYPES | _TSV_TYPES:
+            raise HTTPException(
+                status_code=415,
+                detail="Send application/x-ndjson or text/tab-separated-values",
+            )
+        results: list[dict] = []
+        chunk: list[dict] = []
+        async for row in _bulk_rows(request, tsv=ctype in _TSV_TYPES):
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_ROWS:
+                results.extend(await bulk_svc.register_bulk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(await bulk_svc.register_bulk(chunk))
+        counts = {k: sum(1 for r in results if r["status"] == k) for k in ("created", "updated", "invalid")}
+        return SampleBulkResponse(
+            received=len(results), **counts,
+            results=[SampleBulkOutcome(**r) for r in results],
+        )
+
     @router.get(
         "",
         response_model=SampleListResponse,
         summary="List samples (paginated, filterable)",
         description=(
             "Returns a page of samples plus the total matching count. Filter "
-            "server-side with `search` (case-insensitive `sample_id` substring) "
+            "server-side with `search` (case-insensitive `sample_id` substring, or an exact SRR run accession) "
             "and `collection` (exact collection membership), so the catalog stays "
             "usable well past the old client-side 1000-row ceiling (#118)."
         ),
@@ -112,10 +236,10 @@ def create_samples_router(engine: AsyncEngine) -> APIRouter:
     async def list_samples(
         limit: int = Query(default=100, ge=1, le=1000, description="Maximum number of samples to return."),
         offset: int = Query(default=0, ge=0, description="Number of samples to skip."),
-        search: str | None = Query(default=None, description="Case-insensitive substring match on sample_id."),
+        search: str | None = Query(default=None, description="Case-insensitive substring match on sample_id, or an exact SRR run accession."),
         collection: str | None = Query(default=None, description="Exact collection id — returns samples that are members of that collection."),
     ):
-        rows, total = await svc.list_samples(limit=limit, offset=offset, search=search, collection=collection)
+        rows, total = await read_svc.list_samples(limit=limit, offset=offset, search=search, collection=collection)
         return SampleListResponse(
             items=[_row_to_response(r) for r in rows],
             total=total, limit=limit, offset=offset,
@@ -133,20 +257,40 @@ def create_samples_router(engine: AsyncEngine) -> APIRouter:
         ),
     )
     async def collection_facets():
-        total, collections = await svc.collection_facets()
+        total, collections = await read_svc.collection_facets()
         return CollectionFacetsResponse(total=total, collections=[CollectionFacet(**c) for c in collections])
 
+    @router.get(
+        "/membership",
+        response_model=CollectionIntersectionResponse,
+        summary="Samples in every given collection",
+        description=(
+            "Intersection of collection memberships: pass `collection` once per "
+            "collection (e.g. `?collection=A&collection=B`). Returns how many "
+            "samples belong to all of them and the first `limit` sample ids."
+        ),
+    )
+    async def collection_intersection(
+        collection: list[str] = Query(..., description="Collection id; repeat for each collection to intersect."),
+        limit: int = Query(1000, ge=0, le=100000),
+    ):
+        count, sample_ids = await read_svc.collection_intersection(collection, limit=limit)
+        return CollectionIntersectionResponse(
+            collections=sorted(set(collection)), count=count, sample_ids=sample_ids,
+        )
+
     @router.get(
         "/by-srr/{srr_accession}",
         response_model=SampleResponse,
         summary="Look up a sample by SRR accession",
         description=(
-            "Returns the sample whose `ncbi_accession` contains the given SRR. "
-            "Returns 404 if no sample is registered with that accession."
+            "Returns the sample whose `ncbi_accession` includes exactly the given SRR "
+            "(newest first if several do). Returns 404 if no sample is registered "
+            "with that accession."
         ),
     )
     async def get_by_srr(srr_accession: str):
-        row = await svc.get_by_srr(srr_accession)
+        row = await read_svc.get_by_srr(srr_accession)
         if not row:
             raise HTTPException(status_code=404, detail=f"No sample found with SRR '{srr_accession}'")
         return _row_to_response(row)
@@ -161,7 +305,7 @@ def create_samples_router(engine: AsyncEngine) -> APIRouter:
         ),
     )
     async def get_by_biosample(biosample_id: str):
-        rows = await svc.get_by_biosample(biosample_id)
+        rows = await read_svc.get_by_biosample(biosample_id)
         return [_row_to_response(r) for r in rows]
 
     @router.get(
@@ -171,7 +315,7 @@ def create_samples_router(engine: AsyncEngine) -> APIRouter:
         description="Retrieves a single sample by its `sample_id`. Returns 404 if not found.",
     )
     async def get_sample(sample_id: str):
-        row = await svc.get(sample_id)
+        row = await read_svc.get(sample_id)
         if not row:
             raise HTTPException(status_code=404, detail=f"Sample '{sample_id}' not found")
         return _row_to_response(row)
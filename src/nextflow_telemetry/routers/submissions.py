@@ -34,7 +34,7 @@ class SubmissionReceipt(BaseModel):
     collection_id: str
     source: str = Field(description="Provenance: 'bioproject' or 'sra_study'.")
     type: str = Field(description="Kind: 'project' for accession-registered collections.")
-    status: str = Field(description="'succeeded', 'dry_run', or 'failed'.")
+    status: str = Field(description="'succeeded', 'dry_run', or 'failed' ('running' is only ever seen via GET while a submission is in flight).")
     samples_found: int = Field(description="Distinct samples the accession expanded to.")
     samples_added: int = Field(description="Samples newly registered by this submission.")
     samples_existing: int = Field(description="Samples that already existed (membership added, metadata untouched).")
@@ -49,9 +49,11 @@ class SubmissionReceipt(BaseModel):
     )
 
 
-def create_submissions_router(engine: AsyncEngine) -> APIRouter:
+def create_submissions_router(engine: AsyncEngine, read_engine: AsyncEngine | None = None) -> APIRouter:
+    """Submissions write through ``engine``; lookups read ``read_engine`` (default: ``engine``)."""
     router = APIRouter(prefix="/submissions", tags=["submissions"])
     svc = SubmissionService(engine=engine)
+    read_svc = SubmissionService(engine=read_engine or engine)
 
     @router.post(
         "",
@@ -84,10 +86,14 @@ def create_submissions_router(engine: AsyncEngine) -> APIRouter:
         "/{submission_id}",
         response_model=dict[str, Any],
         summary="Look up a submission by ID",
-        description="Returns the submission record (provenance receipt). 404 if unknown.",
+        description=(
+            "Returns the submission record (provenance receipt). 404 if unknown. "
+            "While a large accession is still being fetched/registered the record has "
+            "`status='running'` and `metadata_.progress` (phase, runs_fetched / members_written)."
+        ),
     )
     async def get_submission(submission_id: str):
-        row = await svc.get(submission_id)
+        row = await read_svc.get(submission_id)
         if not row:
             raise HTTPException(status_code=404, detail=f"Submission '{submission_id}' not found")
         return row
@@ -0,0 +1,70 @@
+"""SRR → sample index — the write seam for ``sample_accessions``.
+
+``samples.ncbi_accession`` stores the canonical ``SRR1;SRR2`` string, which is
+what clients send and read back, but it can't be looked up by one run without a
+substring scan (and ``contains('SRR1')`` also matches SRR12). Every path that
+writes ``ncbi_accession`` (SampleService.register, SubmissionService._register)
+calls `set_accessions` in the same transaction so the normalised
+``sample_accessions(sample_id, srr)`` rows always mirror it.
+"""
+from __future__ import annotations
+
+from sqlalchemy import delete, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..db import sample_accessions_tbl
+from ..utils import parse_srrs
+
+
+async def set_accessions(conn: AsyncConnection, accessions: dict[str, str]) -> None:
+    """Make each sample's ``sample_accessions`` rows match its ncbi_accession.
+
+    ``accessions`` maps sample_id → semicolon-separated SRRs (as stored on
+    ``samples``). Runs no longer listed are removed; new ones inserted.
+    """
+    if not accessions:
+        return
+    pairs = list(dict.fromkeys(
+        (sid, srr) for sid, acc in accessions.items() for srr in parse_srrs(acc)
+    ))
+    c = sample_accessions_tbl.c
+    await conn.execute(
+        delete(sample_accessions_tbl).where(
+            c.sample_id.in_(list(accessions)),
+            tuple_(c.sample_id, c.srr).not_in(pairs),
+        )
+    )
+    if pairs:
+        await conn.execute(
+            pg_insert(sample_accessions_tbl)
+            .values([{"sample_id": sid, "srr": srr} for sid, srr in pairs])
+            .on_conflict_do_nothing()
+        )
+
+
+async def set_accessions_from(conn: AsyncConnection, source: str) -> None:
+    """Set-based `set_accessions` for rows already in the database.
+
+    ``source`` is a SELECT yielding ``(sample_id, ncbi_accession)`` — typically
+    over a staging table — so large registrations don't ship every SRR back
+    through bind parameters.
+    """
+    await conn.execute(text(
+        f"""
+        DELETE FROM sample_accessions a
+        USING ({source}) AS src(sample_id, ncbi_accession)
+        WHERE a.sample_id = src.sample_id
+          AND a.srr <> ALL(string_to_array(src.ncbi_accession, ';'))
+        """
+    ))
+    await conn.execute(text(
+        f"""
+        INSERT INTO sample_accessions (sample_id, srr)
+        SELECT DISTINCT src.sample_id, btrim(r.srr)
+        FROM ({source}) AS src(sample_id, ncbi_accession)
+        CROSS JOIN LATERAL unnest(string_to_array(src.ncbi_accession, ';')) AS r(srr)
+        WHERE btrim(r.srr) <> ''
+        ON CONFLICT DO NOTHING
+        """
+    ))
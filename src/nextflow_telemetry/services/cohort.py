@@ -17,8 +17,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import TextClause, text
+
+from ..fanout import fan_out
+from ..replica import Connectable
+from ..statements import statement
 
 
 _JOB_STATUSES = ("pending", "claimed", "submitted", "running", "completed", "failed")
@@ -26,7 +29,7 @@ _JOB_STATUSES = ("pending", "claimed", "submitted", "running", "completed", "fai
 
 @dataclass
 class CohortService:
-    engine: AsyncEngine
+    engine: Connectable
 
     async def list_cohorts(self) -> list[dict]:
         """Return all collections with sample counts, ordered newest first."""
@@ -43,6 +46,23 @@ class CohortService:
         async with self.engine.connect() as conn:
             return [dict(r) for r in (await conn.execute(sql)).mappings()]
 
+    @staticmethod
+    def _scope_mask(
+        workflow_id: str | None,
+        workflow_version: str | None,
+        include_all_workflows: bool,
+    ) -> int:
+        """Bitmask of the ``_workflow_scope`` mode, the cache key for its statements.
+
+        bit 0 workflow_id, bit 1 workflow_version, bit 2 all workflows (only
+        when neither is given, since explicit scoping ignores it). 0 is the
+        active-version default.
+        """
+        mask = (1 if workflow_id else 0) | (2 if workflow_version else 0)
+        if not mask and include_all_workflows:
+            mask = 4
+        return mask
+
     @staticmethod
     def _workflow_scope(
         alias: str,
@@ -91,34 +111,26 @@ class CohortService:
         active workflow version ÷ distinct samples in the cohort — but computed
         for all cohorts in a single query. Sorted laggards-first (least complete,
         then largest) so the study that needs attention floats to the top.
+
+        Reads the materialised ``cohort_progress`` table (services/
+        cohort_progress.py), which lifecycle transitions and membership writes
+        keep current, so this is an ordered scan of one row per collection
+        rather than a catalog-wide aggregate.
         """
         sql = text(
             """
             SELECT c.collection_id,
                    c.source,
                    c.label,
-                   COUNT(DISTINCT cs.sample_id) AS sample_count,
-                   COUNT(DISTINCT cs.sample_id) FILTER (
-                       WHERE j.status = 'completed') AS samples_completed,
-                   COUNT(DISTINCT cs.sample_id) FILTER (
-                       WHERE j.status = 'failed') AS samples_failed,
-                   COUNT(DISTINCT cs.sample_id) FILTER (
-                       WHERE j.status = 'running') AS samples_running,
-                   MAX(j.completed_at) FILTER (
-                       WHERE j.status = 'completed') AS last_completed_at
+                   coalesce(p.sample_count, 0)      AS sample_count,
+                   coalesce(p.samples_completed, 0) AS samples_completed,
+                   coalesce(p.samples_failed, 0)    AS samples_failed,
+                   coalesce(p.samples_running, 0)   AS samples_running,
+                   p.last_completed_at
             FROM collections c
-            LEFT JOIN collection_samples cs USING (collection_id)
-            LEFT JOIN jobs j
-                   ON j.sample_id = cs.sample_id
-                  AND EXISTS (
-                      SELECT 1 FROM workflows w
-                      WHERE w.workflow_id = j.workflow_id
-                        AND w.version = j.workflow_version
-                        AND w.status = 'active')
-            GROUP BY c.collection_id, c.source, c.label
-            ORDER BY (CASE WHEN COUNT(DISTINCT cs.sample_id) = 0 THEN 0
-                           ELSE COUNT(DISTINCT cs.sample_id) FILTER (WHERE j.status = 'completed')::float
-                                / COUNT(DISTINCT cs.sample_id) END) ASC,
+            LEFT JOIN cohort_progress p USING (collection_id)
+            ORDER BY (CASE WHEN coalesce(p.sample_count, 0) = 0 THEN 0
+                           ELSE p.samples_completed::float / p.sample_count END) ASC,
                      sample_count DESC,
                      c.collection_id ASC
             """
@@ -146,6 +158,33 @@ class CohortService:
             )
         return out
 
+    @staticmethod
+    def _failure_by_process_sql(scope: str, mask: int | None = None) -> TextClause:
+        """Per-process failure counts for a cohort, on ``task_executions``.
+
+        Reads only typed columns covered by ``ix_task_executions_sample_status_process``
+        (sample_id, status, process INCLUDE workflow_id, workflow_version), so
+        it is an index-only scan per member sample instead of detoasting every
+        ``telemetry.trace``. ``scope`` is a ``_workflow_scope("te", ...)``
+        fragment. tests/test_cohorts_router.py pins the plan. Pass the scope's
+        ``_scope_mask`` to get the cached statement.
+        """
+        sql = f"""
+            SELECT te.process,
+                   COUNT(*) AS failed_count,
+                   COUNT(DISTINCT te.sample_id) AS sample_count
+            FROM collection_samples cs
+            JOIN task_executions te ON te.sample_id = cs.sample_id
+            WHERE cs.collection_id = :cid
+              AND te.status IN ('FAILED', 'ABORTED')
+              {scope}
+            GROUP BY te.process
+            ORDER BY failed_count DESC, te.process
+            """
+        if mask is None:
+            return text(sql)
+        return statement("cohort.failure_by_process", mask, lambda: sql)
+
     async def summary(
         self,
         collection_id: str,
@@ -160,8 +199,21 @@ class CohortService:
         cohort's samples that have a completed job in scope, not completed job
         rows over total job rows. See docs/study-sample-version-identity.md.
         """
-        async with self.engine.connect() as conn:
-            exists = (
+        params: dict = {"cid": collection_id}
+        if workflow_id:
+            params["workflow_id"] = workflow_id
+        if workflow_version:
+            params["workflow_version"] = workflow_version
+        mask = self._scope_mask(workflow_id, workflow_version, include_all_workflows)
+        job_scope = self._workflow_scope(
+            "j", workflow_id, workflow_version, include_all_workflows
+        )
+        te_scope = self._workflow_scope(
+            "te", workflow_id, workflow_version, include_all_workflows
+        )
+
+        async def fetch_cohort(conn):
+            return (
                 await conn.execute(
                     text(
                         "SELECT collection_id, source, label "
@@ -170,10 +222,9 @@ class CohortService:
                     {"cid": collection_id},
                 )
             ).mappings().first()
-            if not exists:
-                return None
 
-            sample_count = (
+        async def fetch_sample_count(conn):
+            return (
                 await conn.execute(
                     text(
                         "SELECT COUNT(*) AS n FROM collection_samples WHERE collection_id = :cid"
@@ -182,22 +233,11 @@ class CohortService:
                 )
             ).scalar() or 0
 
-            params: dict = {"cid": collection_id}
-            if workflow_id:
-                params["workflow_id"] = workflow_id
-            if workflow_version:
-                params["workflow_version"] = workflow_version
-            job_scope = self._workflow_scope(
-                "j", workflow_id, workflow_version, include_all_workflows
-            )
-            tel_scope = self._workflow_scope(
-                "t", workflow_id, workflow_version, include_all_workflows
-            )
-
-            status_rows = (
+        async def fetch_status_rows(conn):
+            return (
                 await conn.execute(
-                    text(
-                        f"""
+                    statement(
+                        "cohort.job_status", mask, lambda: f"""
                         SELECT j.status,
                                COUNT(*) AS n,
                                COUNT(DISTINCT j.sample_id) AS n_samples
@@ -211,43 +251,39 @@ class CohortService:
                     params,
                 )
             ).mappings().all()
-            counts = {s: 0 for s in _JOB_STATUSES}
-            samples_completed = 0
-            for r in status_rows:
-                if r["status"] in counts:
-                    counts[r["status"]] = r["n"]
-                if r["status"] == "completed":
-                    samples_completed = r["n_samples"]
-            total = sum(counts.values())
-            # Completeness of the STUDY: distinct completed samples over all
-            # samples in the cohort — a sample with no job yet counts as
-            # incomplete. Denominator is sample_count, not total_jobs (#116).
-            completion_pct = (
-                (samples_completed / sample_count * 100.0) if sample_count > 0 else 0.0
-            )
 
-            failure_rows = (
-                await conn.execute(
-                    text(
-                        f"""
-                        SELECT t.trace->>'process' AS process,
-                               COUNT(*) AS failed_count,
-                               COUNT(DISTINCT t.sample_id) AS sample_count
-                        FROM telemetry t
-                        JOIN collection_samples cs ON cs.sample_id = t.sample_id
-                        WHERE cs.collection_id = :cid
-                          AND t.event = 'process_completed'
-                          AND t.trace->>'status' IN ('FAILED', 'ABORTED')
-                          {tel_scope}
-                          AND t.trace->>'process' IS NOT NULL
-                        GROUP BY t.trace->>'process'
-                        ORDER BY failed_count DESC, process
-                        """
-                    ),
-                    params,
-                )
+        async def fetch_failure_rows(conn):
+            return (
+                await conn.execute(self._failure_by_process_sql(te_scope, mask), params)
             ).mappings().all()
 
+        # Independent reads, run side by side (fanout.py). An unknown cohort
+        # costs three empty aggregates before returning None.
+        status_rows, failure_rows, exists, sample_count = await fan_out(
+            self.engine,
+            fetch_status_rows,
+            fetch_failure_rows,
+            fetch_cohort,
+            fetch_sample_count,
+        )
+        if not exists:
+            return None
+
+        counts = {s: 0 for s in _JOB_STATUSES}
+        samples_completed = 0
+        for r in status_rows:
+            if r["status"] in counts:
+                counts[r["status"]] = r["n"]
+            if r["status"] == "completed":
+                samples_completed = r["n_samples"]
+        total = sum(counts.values())
+        # Completeness of the STUDY: distinct completed samples over all
+        # samples in the cohort — a sample with no job yet counts as
+        # incomplete. Denominator is sample_count, not total_jobs (#116).
+        completion_pct = (
+            (samples_completed / sample_count * 100.0) if sample_count > 0 else 0.0
+        )
+
         return {
             "collection_id": collection_id,
             "source": exists["source"],
@@ -284,7 +320,8 @@ class CohortService:
     ) -> list[dict]:
         """Return failed task occurrences for a given (cohort, process).
 
-        One row per process_completed FAILED/ABORTED event. Includes task_hash
+        One row per FAILED/ABORTED task execution (``task_executions`` holds
+        one row per process_completed event). Includes task_hash
         so the UI can link straight to the existing log viewer. Caller is
         responsible for checking that the cohort exists (use cohort_exists)
         — this method returns an empty list for unknown cohorts.
@@ -296,29 +333,29 @@ class CohortService:
             params["workflow_id"] = workflow_id
         if workflow_version:
             params["workflow_version"] = workflow_version
+        mask = self._scope_mask(workflow_id, workflow_version, include_all_workflows)
         wf_filter = self._workflow_scope(
-            "t", workflow_id, workflow_version, include_all_workflows
+            "te", workflow_id, workflow_version, include_all_workflows
         )
 
-        sql = text(
-            f"""
-            SELECT t.id AS telemetry_id,
-                   t.sample_id,
-                   t.run_name,
-                   t.utc_time,
-                   t.trace->>'name'   AS task_name,
-                   t.trace->>'hash'   AS task_hash,
-                   t.trace->>'status' AS status,
-                   t.trace->>'exit'   AS exit_code,
-                   coalesce(nullif(t.trace->>'attempt',''),'0')::int AS attempt
-            FROM telemetry t
-            JOIN collection_samples cs ON cs.sample_id = t.sample_id
+        sql = statement(
+            "cohort.failures_for_process", mask, lambda: f"""
+            SELECT te.telemetry_id,
+                   te.sample_id,
+                   te.run_name,
+                   te.utc_time,
+                   te.name      AS task_name,
+                   te.task_hash,
+                   te.status,
+                   te.exit_code,
+                   te.attempt
+            FROM collection_samples cs
+            JOIN task_executions te ON te.sample_id = cs.sample_id
             WHERE cs.collection_id = :cid
-              AND t.event = 'process_completed'
-              AND t.trace->>'status' IN ('FAILED', 'ABORTED')
-              AND t.trace->>'process' = :process
+              AND te.status IN ('FAILED', 'ABORTED')
+              AND te.process = :process
               {wf_filter}
-            ORDER BY t.utc_time DESC
+            ORDER BY te.utc_time DESC
             LIMIT :limit
             """
         )
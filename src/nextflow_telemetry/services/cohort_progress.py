@@ -0,0 +1,329 @@
+"""Materialised cohort completion — the write side of the leaderboard.
+
+``cohort_progress`` holds one row per collection: member count plus how many
+members are completed / failed / running under the active workflow versions
+(same semantics as CohortService.summary — distinct samples). It is kept
+current incrementally instead of being aggregated over the whole catalog on
+every leaderboard request:
+
+- ``refresh_samples`` — called by the lifecycle transitions with the samples
+  whose jobs they moved. Recomputes those samples' flags from ``jobs``,
+  compares with the stored ``sample_progress`` row and adds the difference to
+  every collection the sample belongs to. Cost is O(touched samples × their
+  collections), not O(catalog).
+- ``add_members`` — called by ``add_to_collection`` with the newly attached
+  samples; bumps sample_count and adds their current flags.
+- ``resync`` — when the *active version set* changes (WorkflowService
+  register/promote/retire), the flags of every sample with jobs of that
+  workflow can change at once. WorkflowService queues the workflow in
+  ``cohort_resync_queue`` inside its transaction (``queue_resync``) and wakes
+  the drain after its commit; a background task re-runs ``refresh_samples``
+  over those samples in chunks, one short transaction each. Until it gets
+  there the leaderboard lags the registry by that long. The queue is a table,
+  so a restart resumes it instead of dropping it.
+- ``rebuild`` — full recompute under a table lock. The repair path after
+  out-of-band SQL (and what the migration ran); never on a request path.
+
+Like lifecycle, ``refresh_samples`` and ``add_members`` take the caller's
+``AsyncConnection`` and run inside its transaction, so the job write and the
+counter update commit together. ``refresh_samples`` row-locks the touched
+``sample_progress`` rows (in sample_id order) before reading them, so two
+transactions moving jobs of the same sample serialise instead of applying the
+same delta twice. It then locks the ``cohort_progress`` rows it will update,
+in collection_id order. ``add_members`` locks its samples the same way before
+reading their flags. Every writer takes sample rows before cohort rows and
+each set in sorted order, so concurrent writers queue rather than deadlock.
+
+``last_completed_at`` only moves forward incrementally; a reset that un-does
+the most recent completion leaves it until the next rebuild.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.types import String
+
+logger = logging.getLogger(__name__)
+
+# Samples per resync transaction.
+RESYNC_CHUNK = 1000
+
+# Per-sample flags under the active workflow versions, for the samples in
+# CTE `s(sample_id)`. Shared by refresh_samples and rebuild.
+_FLAGS = """
+    SELECT s.sample_id,
+           coalesce(bool_or(j.status = 'completed'), false) AS completed,
+           coalesce(bool_or(j.status = 'failed'), false)    AS failed,
+           coalesce(bool_or(j.status = 'running'), false)   AS running,
+           max(j.completed_at) FILTER (WHERE j.status = 'completed') AS last_completed_at
+    FROM s
+    LEFT JOIN jobs j
+           ON j.sample_id = s.sample_id
+          AND EXISTS (
+              SELECT 1 FROM workflows w
+              WHERE w.workflow_id = j.workflow_id
+                AND w.version = j.workflow_version
+                AND w.status = 'active')
+    GROUP BY s.sample_id
+"""
+
+_SIDS = bindparam("sids", type_=ARRAY(String))
+
+
+async def refresh_samples(conn: AsyncConnection, sample_ids: list[str]) -> None:
+    """Re-derive the given samples' flags and push the deltas to their cohorts."""
+    sids = sorted(set(sample_ids))
+    if not sids:
+        return
+    # Make sure every touched sample has a row to lock (absent == all-false,
+    # so inserting the default doesn't change any cohort total), then lock.
+    await conn.execute(
+        text(
+            "INSERT INTO sample_progress (sample_id) SELECT unnest(:sids) "
+            "ON CONFLICT (sample_id) DO NOTHING"
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+    await conn.execute(
+        text(
+            "SELECT 1 FROM sample_progress WHERE sample_id = ANY(:sids) "
+            "ORDER BY sample_id FOR UPDATE"
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+    await conn.execute(
+        text(
+            "SELECT 1 FROM cohort_progress WHERE collection_id IN ("
+            "SELECT collection_id FROM collection_samples WHERE sample_id = ANY(:sids)) "
+            "ORDER BY collection_id FOR UPDATE"
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+    await conn.execute(
+        text(
+            f"""
+            WITH s AS (SELECT unnest(:sids) AS sample_id),
+            new AS ({_FLAGS}),
+            d AS (
+                SELECT new.sample_id,
+                       new.completed::int - old.completed::int AS dc,
+                       new.failed::int - old.failed::int       AS df,
+                       new.running::int - old.running::int     AS dr,
+                       new.last_completed_at
+                FROM new JOIN sample_progress old USING (sample_id)
+            ),
+            upd AS (
+                UPDATE sample_progress sp
+                SET completed = new.completed, failed = new.failed,
+                    running = new.running, last_completed_at = new.last_completed_at
+                FROM new WHERE sp.sample_id = new.sample_id
+            )
+            UPDATE cohort_progress cp
+            SET samples_completed = cp.samples_completed + agg.dc,
+                samples_failed    = cp.samples_failed + agg.df,
+                samples_running   = cp.samples_running + agg.dr,
+                last_completed_at = GREATEST(cp.last_completed_at, agg.lc),
+                updated_at        = now()
+            FROM (
+                SELECT cs.collection_id, sum(d.dc) AS dc, sum(d.df) AS df, sum(d.dr) AS dr,
+                       max(d.last_completed_at) AS lc
+                FROM d JOIN collection_samples cs USING (sample_id)
+                WHERE d.dc <> 0 OR d.df <> 0 OR d.dr <> 0 OR d.last_completed_at IS NOT NULL
+                GROUP BY cs.collection_id
+            ) agg
+            WHERE cp.collection_id = agg.collection_id
+            """
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+
+
+async def add_members(conn: AsyncConnection, collection_id: str, sample_ids: list[str]) -> None:
+    """Account for samples just attached to ``collection_id``.
+
+    ``sample_ids`` must be only the *newly inserted* memberships — re-attaching
+    an existing member would double-count it.
+
+    Takes the same sample-then-cohort locks as ``refresh_samples`` before
+    reading the samples' flags. Otherwise a concurrent refresh of one of these
+    samples, which can't see the uncommitted membership row, and this read of
+    its pre-refresh flags would both miss the status change for the cohort.
+    """
+    sids = sorted(set(sample_ids))
+    if not sids:
+        return
+    await conn.execute(
+        text(
+            "INSERT INTO sample_progress (sample_id) SELECT unnest(:sids) "
+            "ON CONFLICT (sample_id) DO NOTHING"
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+    await conn.execute(
+        text(
+            "SELECT 1 FROM sample_progress WHERE sample_id = ANY(:sids) "
+            "ORDER BY sample_id FOR UPDATE"
+        ).bindparams(_SIDS),
+        {"sids": sids},
+    )
+    await conn.execute(
+        text(
+            """
+            INSERT INTO cohort_progress AS cp
+                (collection_id, sample_count, samples_completed, samples_failed,
+                 samples_running, last_completed_at, updated_at)
+            SELECT :cid, count(*),
+                   count(*) FILTER (WHERE sp.completed),
+                   count(*) FILTER (WHERE sp.failed),
+                   count(*) FILTER (WHERE sp.running),
+                   max(sp.last_completed_at), now()
+            FROM unnest(:sids) AS s(sample_id)
+            LEFT JOIN sample_progress sp USING (sample_id)
+            ON CONFLICT (collection_id) DO UPDATE SET
+                sample_count      = cp.sample_count + EXCLUDED.sample_count,
+                samples_completed = cp.samples_completed + EXCLUDED.samples_completed,
+                samples_failed    = cp.samples_failed + EXCLUDED.samples_failed,
+                samples_running   = cp.samples_running + EXCLUDED.samples_running,
+                last_completed_at = GREATEST(cp.last_completed_at, EXCLUDED.last_completed_at),
+                updated_at        = now()
+            """
+        ).bindparams(_SIDS),
+        {"cid": collection_id, "sids": sids},
+    )
+
+
+async def queue_resync(conn: AsyncConnection, workflow_id: str) -> None:
+    """Record that ``workflow_id``'s samples need a resync.
+
+    Call inside the registry change's transaction, then ``resync.schedule``
+    after it commits.
+    """
+    await conn.execute(
+        text(
+            "INSERT INTO cohort_resync_queue (workflow_id, queued_at) VALUES (:wf, now()) "
+            "ON CONFLICT (workflow_id) DO UPDATE SET queued_at = now()"
+        ),
+        {"wf": workflow_id},
+    )
+
+
+class Resync:
+    """Background ``refresh_samples`` over the queued workflows' samples.
+
+    The queue is the ``cohort_resync_queue`` table, so pending work survives a
+    restart; main's lifespan calls ``schedule`` on startup to drain what a
+    previous process left. One task drains it, so a burst of registry changes
+    costs one pass per workflow, not one per call. A row is deleted only if it
+    wasn't re-queued while its resync ran. A resync that fails leaves its row
+    for the next ``schedule``.
+    """
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        # Set by schedule(); a running drain re-reads the queue before exiting.
+        self._woken = False
+
+    def schedule(self, engine: AsyncEngine) -> None:
+        """Drain the queue in the background, unless a drain is already running."""
+        self._woken = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain(engine))
+
+    async def _drain(self, engine: AsyncEngine) -> None:
+        while True:
+            self._woken = False
+            async with engine.connect() as conn:
+                row = (await conn.execute(text(
+                    "SELECT workflow_id, queued_at FROM cohort_resync_queue "
+                    "ORDER BY workflow_id LIMIT 1"
+                ))).one_or_none()
+            if row is None:
+                if self._woken:
+                    continue
+                return
+            workflow_id: str = row.workflow_id
+            queued_at = row.queued_at
+            try:
+                await self.run(engine, workflow_id)
+            except Exception:
+                # Left queued; rebuild() is the repair path if this keeps failing.
+                logger.warning(
+                    "cohort_progress.resync_failed", extra={"workflow_id": workflow_id}, exc_info=True
+                )
+                return
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "DELETE FROM cohort_resync_queue "
+                        "WHERE workflow_id = :wf AND queued_at = :queued_at"
+                    ),
+                    {"wf": workflow_id, "queued_at": queued_at},
+                )
+
+    async def run(self, engine: AsyncEngine, workflow_id: str) -> None:
+        """Refresh every sample with jobs of ``workflow_id``, chunk by chunk."""
+        async with engine.connect() as conn:
+            sids: list[str] = list((await conn.execute(
+                text("SELECT DISTINCT sample_id FROM jobs WHERE workflow_id = :wf ORDER BY sample_id"),
+                {"wf": workflow_id},
+            )).scalars())
+        for i in range(0, len(sids), RESYNC_CHUNK):
+            async with engine.begin() as conn:
+                await refresh_samples(conn, sids[i:i + RESYNC_CHUNK])
+        logger.info(
+            "cohort_progress.resynced", extra={"workflow_id": workflow_id, "samples": len(sids)}
+        )
+
+    async def stop(self) -> None:
+        """Cancel the drain (shutdown). Queued rows stay for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+resync = Resync()
+
+
+async def rebuild(conn: AsyncConnection) -> None:
+    """Recompute sample_progress and cohort_progress from scratch."""
+    await conn.execute(text("LOCK TABLE sample_progress, cohort_progress IN EXCLUSIVE MODE"))
+    await conn.execute(text("DELETE FROM sample_progress"))
+    await conn.execute(
+        text(
+            f"""
+            WITH s AS (SELECT sample_id FROM samples)
+            INSERT INTO sample_progress (sample_id, completed, failed, running, last_completed_at)
+            SELECT * FROM ({_FLAGS}) f
+            WHERE f.completed OR f.failed OR f.running OR f.last_completed_at IS NOT NULL
+            """
+        )
+    )
+    await conn.execute(text("DELETE FROM cohort_progress"))
+    await conn.execute(
+        text(
+            """
+            INSERT INTO cohort_progress
+                (collection_id, sample_count, samples_completed, samples_failed,
+                 samples_running, last_completed_at, updated_at)
+            SELECT c.collection_id,
+                   count(cs.sample_id),
+                   count(*) FILTER (WHERE sp.completed),
+                   count(*) FILTER (WHERE sp.failed),
+                   count(*) FILTER (WHERE sp.running),
+                   max(sp.last_completed_at),
+                   now()
+            FROM collections c
+            LEFT JOIN collection_samples cs USING (collection_id)
+            LEFT JOIN sample_progress sp USING (sample_id)
+            GROUP BY c.collection_id
+            """
+        )
+    )
@@ -12,6 +12,7 @@ from typing import Any
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from . import cohort_progress, membership
 from ..db import collection_samples_tbl, collections_tbl
 
 
@@ -31,7 +32,9 @@ async def add_to_collection(
     membership" stays atomic in the caller's `engine.begin()` block. Idempotent:
     re-attaching an existing (collection, sample) pair is a no-op; re-declaring a
     collection only bumps `updated_at`. The samples must already be inserted in
-    the same transaction (FK on `collection_samples.sample_id`).
+    the same transaction (FK on `collection_samples.sample_id`). New members are
+    added to the collection's `cohort_progress` row in the same transaction, and
+    to the in-process membership index when it commits.
     """
     now = datetime.now(timezone.utc)
     await conn.execute(
@@ -51,8 +54,14 @@ async def add_to_collection(
         )
     )
     if sample_ids:
-        await conn.execute(
+        result = await conn.execute(
             pg_insert(collection_samples_tbl)
             .values([{"collection_id": collection_id, "sample_id": sid} for sid in sample_ids])
             .on_conflict_do_nothing(constraint="uq_collection_sample")
+            .returning(collection_samples_tbl.c.sample_id)
         )
+        # Only the memberships actually inserted count toward cohort_progress.
+        added = list(result.scalars())
+        if added:
+            await cohort_progress.add_members(conn, collection_id, added)
+            membership.record_members(conn, collection_id, added)
@@ -6,20 +6,37 @@ keyed by the content-addressed sample_id (md5 of sorted SRR accessions).
 """
 from __future__ import annotations
 
+import asyncio
+import codecs
 import csv
 import io
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from collections.abc import Iterator
+from typing import IO, Any
 
-from sqlalchemy import select
+from sqlalchemy import distinct, func, literal_column, or_, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.dml import ReturningInsert
 
+from ..config import settings
 from ..db import curated_sample_annotations_tbl, curated_studies_tbl
+from ..replica import Connectable
 from ..utils import parse_srrs, srrs_to_sample_id
 
 
+# Annotation rows per upsert statement / transaction (5 binds each).
+IMPORT_CHUNK_ROWS = 1000
+# Bytes per read of the up-front UTF-8 check.
+_UTF8_CHECK_BLOCK = 1 << 20
+
+# Facet results cached in-process: (key, filters, study) -> (computed_at, result).
+# Bounded; the oldest entry is evicted first. Cleared by import_tsv.
+FACET_CACHE_MAX_ENTRIES = 512
+_facet_cache: dict[tuple, tuple[float, dict[str, Any]]] = {}
+
+
 # ---------------------------------------------------------------------------
 # Data-transfer objects
 # ---------------------------------------------------------------------------
@@ -70,11 +87,11 @@ class AnnotationRow:
 class CuratedService:
     """Business logic for curated study imports and queries."""
 
-    engine: AsyncEngine
+    engine: Connectable
 
     async def import_tsv(
         self,
-        tsv_content: bytes,
+        tsv_content: bytes | IO[bytes],
         study_name: str,
         source_file: str | None = None,
         pubmed_id: str | None = None,
@@ -83,99 +100,95 @@ class CuratedService:
         """Parse a TSV and upsert rows into curated_studies / curated_sample_annotations.
 
         Steps:
-        1. Decode the bytes as UTF-8 and parse with csv.DictReader (tab-separated).
+        1. Check the whole input decodes as UTF-8 (block by block, then rewind;
+           a binary file must be seekable, as an upload's spooled file is), so
+           a bad byte late in the file is a ValueError before anything is
+           written. Then wrap it in a UTF-8 text stream and parse it
+           incrementally with csv.DictReader (tab-separated). The check and
+           the parsing read a blocking file, so they run in worker threads.
         2. Locate the ncbi_accession column case-insensitively; raise ValueError if absent.
-        3. For each row:
+        3. Upsert curated_studies (preserving existing metadata_ when the new
+           import has no pubmed_id/doi).
+        4. For each row:
            - If ncbi_accession is null/empty → record as a dropped row.
            - If parse_srrs() returns an empty list → record as a dropped row.
            - Otherwise compute sample_id = srrs_to_sample_id(parse_srrs(ncbi_accession))
              and build a metadata_ JSONB from all columns except ncbi_accession
              (None and empty-string keys are excluded to avoid JSONB errors).
-        4. Upsert curated_studies first (preserving existing metadata_ when new
-           import has no pubmed_id/doi), then bulk-upsert all annotation rows.
-        5. Return an ImportSummary.
+           Rows are upserted IMPORT_CHUNK_ROWS at a time, each chunk in its own
+           transaction, so memory and bind parameters stay bounded whatever
+           the file size. Re-importing is idempotent, so an import interrupted
+           part-way is repaired by running it again.
+        5. Return an ImportSummary. rows_updated comes from the upsert itself
+           (``RETURNING xmax = 0``), not a pre-query.
         """
-        text = tsv_content.decode("utf-8")
-        reader = csv.DictReader(io.StringIO(text), delimiter="\t")
-
-        if reader.fieldnames is None:
-            return ImportSummary(
-                study_name=study_name,
-                rows_loaded=0,
-                rows_updated=0,
-                rows_dropped=0,
-            )
-
-        # Case-insensitive lookup for the ncbi_accession column
-        fieldnames: list[str] = list(reader.fieldnames)
-        accession_col: str | None = None
-        for col in fieldnames:
-            if col.lower() == "ncbi_accession":
-                accession_col = col
-                break
-        if accession_col is None:
-            raise ValueError(
-                "TSV is missing an 'ncbi_accession' column (case-insensitive). "
-                f"Found columns: {fieldnames}"
-            )
-
-        now = datetime.now(timezone.utc)
-        study_meta: dict[str, Any] = {}
-        if pubmed_id is not None:
-            study_meta["pubmed_id"] = pubmed_id
-        if doi is not None:
-            study_meta["doi"] = doi
-
-        annotation_rows: list[dict[str, Any]] = []
-        dropped: list[DroppedRow] = []
-
-        for row_index, row in enumerate(reader):
-            raw_accession: str = (row.get(accession_col) or "").strip()
-
-            # Derive a human-readable subject label for dropped-row reporting.
-            subject_id: str | None = (
-                row.get("subject_id")
-                or row.get("sample_id")
-                or row.get("Subject_id")
-                or row.get("Sample_id")
-            )
-
-            if not raw_accession:
-                dropped.append(DroppedRow(row_index=row_index, subject_id=subject_id))
-                continue
-
-            # Fix #2: treat rows where parse_srrs yields no valid SRRs as dropped.
-            srrs = parse_srrs(raw_accession)
-            if not srrs:
-                dropped.append(
-                    DroppedRow(
-                        row_index=row_index,
-                        subject_id=subject_id,
-                    )
+        raw = io.BytesIO(tsv_content) if isinstance(tsv_content, bytes) else tsv_content
+        await asyncio.to_thread(_check_utf8, raw)
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            reader = csv.DictReader(stream, delimiter="\t")
+
+            # Reading the header line reads the file too.
+            header = await asyncio.to_thread(lambda: reader.fieldnames)
+            if header is None:
+                return ImportSummary(
+                    study_name=study_name,
+                    rows_loaded=0,
+                    rows_updated=0,
+                    rows_dropped=0,
                 )
-                continue
 
-            sample_id = srrs_to_sample_id(srrs)
-
-            # Fix #3: exclude None keys (csv.DictReader overflow columns) and the
-            # accession column itself from the metadata_ dict to avoid JSONB errors.
-            acol = accession_col
-            meta: dict[str, Any] = {
-                k: v
-                for k, v in row.items()
-                if k is not None and k != "" and k != acol
-            }
+            # Case-insensitive lookup for the ncbi_accession column
+            fieldnames: list[str] = list(header)
+            accession_col: str | None = None
+            for col in fieldnames:
+                if col.lower() == "ncbi_accession":
+                    accession_col = col
+                    break
+            if accession_col is None:
+                raise ValueError(
+                    "TSV is missing an 'ncbi_accession' column (case-insensitive). "
+                    f"Found columns: {fieldnames}"
+                )
 
-            annotation_rows.append({
-                "sample_id": sample_id,
-                "study_name": study_name,
-                "ncbi_accession": raw_accession,
-                "metadata_": meta,
-                "loaded_at": now,
-            })
+            now = datetime.now(timezone.utc)
+            study_meta: dict[str, Any] = {}
+            if pubmed_id is not None:
+                study_meta["pubmed_id"] = pubmed_id
+            if doi is not None:
+                study_meta["doi"] = doi
+            await self._upsert_study(study_name, source_file, study_meta, now)
+
+            dropped: list[DroppedRow] = []
+            rows = enumerate(reader)
+            rows_loaded = rows_updated = 0
+            while True:
+                # Parsing reads the (blocking) upload file: off the event loop.
+                chunk = await asyncio.to_thread(
+                    _parse_chunk, rows, accession_col, study_name, now, dropped
+                )
+                if not chunk:
+                    break
+                loaded, updated = await self._upsert_annotations(list(chunk.values()))
+                rows_loaded += loaded
+                rows_updated += updated
+        finally:
+            # Don't let the wrapper close the caller's file.
+            stream.detach()
+
+        _facet_cache.clear()
+        return ImportSummary(
+            study_name=study_name,
+            rows_loaded=rows_loaded,
+            rows_updated=rows_updated,
+            rows_dropped=len(dropped),
+            dropped_rows=dropped,
+        )
 
+    async def _upsert_study(
+        self, study_name: str, source_file: str | None, study_meta: dict[str, Any], now: datetime
+    ) -> None:
         async with self.engine.begin() as conn:
-            # 1. Upsert the study record.
             # Fix #1: only update metadata_ when the new import provides non-empty
             # study_meta — this prevents overwriting previously stored pubmed_id/doi
             # with NULL when re-importing without those fields.
@@ -202,44 +215,20 @@ class CuratedService:
             )
             await conn.execute(study_stmt)
 
-            # Fix #4: count pre-existing annotation rows for this study to compute
-            # rows_updated accurately.
-            existing_sample_ids: set[str] = set()
-            if annotation_rows:
-                candidate_ids = [r["sample_id"] for r in annotation_rows]
-                existing_result = await conn.execute(
-                    select(curated_sample_annotations_tbl.c.sample_id).where(
-                        curated_sample_annotations_tbl.c.study_name == study_name,
-                        curated_sample_annotations_tbl.c.sample_id.in_(candidate_ids),
-                    )
-                )
-                existing_sample_ids = {row[0] for row in existing_result}
-
-            rows_updated = len(existing_sample_ids)
-
-            # Fix #5: bulk-upsert all annotation rows in a single round-trip instead
-            # of one execute() call per row.
-            if annotation_rows:
-                ann_insert = pg_insert(curated_sample_annotations_tbl).values(
-                    annotation_rows
-                )
-                ann_stmt = ann_insert.on_conflict_do_update(
-                    constraint="uq_csa_sample_study",
-                    set_={
-                        "ncbi_accession": ann_insert.excluded.ncbi_accession,
-                        "metadata_": ann_insert.excluded.metadata_,
-                        "loaded_at": ann_insert.excluded.loaded_at,
-                    },
-                )
-                await conn.execute(ann_stmt)
-
-        return ImportSummary(
-            study_name=study_name,
-            rows_loaded=len(annotation_rows),
-            rows_updated=rows_updated,
-            rows_dropped=len(dropped),
-            dropped_rows=dropped,
-        )
+    async def _upsert_annotations(self, rows: list[dict[str, Any]]) -> tuple[int, int]:
+        """Upsert one chunk; returns (rows written, rows that already existed)."""
+        ann_insert = pg_insert(curated_sample_annotations_tbl).values(rows)
+        ann_stmt: ReturningInsert[tuple[bool]] = ann_insert.on_conflict_do_update(
+            constraint="uq_csa_sample_study",
+            set_={
+                "ncbi_accession": ann_insert.excluded.ncbi_accession,
+                "metadata_": ann_insert.excluded.metadata_,
+                "loaded_at": ann_insert.excluded.loaded_at,
+            },
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        async with self.engine.begin() as conn:
+            inserted = (await conn.execute(ann_stmt)).scalars().all()
+        return len(inserted), sum(1 for i in inserted if not i)
 
     async def list_studies(self) -> list[StudyRow]:
         """Return all studies ordered by name."""
@@ -284,11 +273,169 @@ class CuratedService:
             )
             return [_map_annotation(row) for row in result.mappings()]
 
+    async def filter_samples(
+        self,
+        attrs: dict[str, list[str]],
+        study_name: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> tuple[list[AnnotationRow], int]:
+        """Annotations whose metadata matches every attribute in *attrs*.
+
+        Keys are ANDed; the values given for one key are ORed (``disease`` in
+        IBD or CRC). Each condition is a ``metadata_ @> {key: value}``
+        containment, served by the ix_csa_metadata_path_ops GIN index.
+        Returns (page, total matching rows).
+        """
+        t = curated_sample_annotations_tbl
+        where = _attribute_filter(attrs, study_name)
+        async with self.engine.connect() as conn:
+            total = (await conn.execute(select(func.count()).select_from(t).where(*where))).scalar_one()
+            result = await conn.execute(
+                select(t).where(*where).order_by(t.c.id).limit(limit).offset(offset)
+            )
+            return [_map_annotation(row) for row in result.mappings()], total
+
+    async def facet_counts(
+        self, key: str, attrs: dict[str, list[str]] | None = None, study_name: str | None = None
+    ) -> dict[str, Any]:
+        """Distinct-sample counts per value of metadata key *key*.
+
+        Scoped by the same filters as filter_samples, so a UI can show "how many
+        samples per country, given disease=IBD". Filters on *key* itself are
+        ignored (the facet shows all its values, as in a faceted search). Rows
+        without *key* are left out. Returns ``{"key", "total", "values":
+        [{"value", "count"}]}``, largest first; ``total`` is the distinct
+        samples in scope. Cached for CURATED_FACET_TTL_SECONDS.
+        """
+        scope = {k: sorted(v) for k, v in (attrs or {}).items() if k != key}
+        cache_key = (key, tuple(sorted((k, tuple(v)) for k, v in scope.items())), study_name)
+        ttl = settings.CURATED_FACET_TTL_SECONDS
+        hit = _facet_cache.get(cache_key)
+        if hit is not None and time.monotonic() - hit[0] < ttl:
+            return hit[1]
+
+        t = curated_sample_annotations_tbl
+        where = _attribute_filter(scope, study_name)
+        value = t.c.metadata_[key].astext
+        n = func.count(distinct(t.c.sample_id))
+        async with self.engine.connect() as conn:
+            total = (await conn.execute(select(n).where(*where))).scalar_one()
+            rows = (await conn.execute(
+                select(value.label("value"), n.label("count"))
+                .where(*where, value.is_not(None))
+                .group_by(value)
+                .order_by(n.desc(), value)
+            )).all()
+        result = {
+            "key": key,
+            "total": total,
+            "values": [{"value": v, "count": c} for v, c in rows],
+        }
+        if ttl > 0:
+            if len(_facet_cache) >= FACET_CACHE_MAX_ENTRIES:
+                _facet_cache.pop(next(iter(_facet_cache)))
+            _facet_cache[cache_key] = (time.monotonic(), result)
+        return result
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _parse_chunk(
+    rows: Iterator[tuple[int, dict[str, Any]]],
+    accession_col: str,
+    study_name: str,
+    now: datetime,
+    dropped: list[DroppedRow],
+) -> dict[str, dict[str, Any]]:
+    """Read up to IMPORT_CHUNK_ROWS annotation rows off ``rows``, keyed by sample_id.
+
+    A sample repeated within a chunk keeps its last row (one upsert can't
+    touch a row twice). Skipped rows are appended to ``dropped``. Empty once
+    the input is exhausted.
+    """
+    chunk: dict[str, dict[str, Any]] = {}
+    for row_index, row in rows:
+        raw_accession: str = (row.get(accession_col) or "").strip()
+
+        # Derive a human-readable subject label for dropped-row reporting.
+        subject_id: str | None = (
+            row.get("subject_id")
+            or row.get("sample_id")
+            or row.get("Subject_id")
+            or row.get("Sample_id")
+        )
+
+        if not raw_accession:
+            dropped.append(DroppedRow(row_index=row_index, subject_id=subject_id))
+            continue
+
+        # Fix #2: treat rows where parse_srrs yields no valid SRRs as dropped.
+        srrs = parse_srrs(raw_accession)
+        if not srrs:
+            dropped.append(
+                DroppedRow(
+                    row_index=row_index,
+                    subject_id=subject_id,
+                )
+            )
+            continue
+
+        sample_id = srrs_to_sample_id(srrs)
+
+        # Fix #3: exclude None keys (csv.DictReader overflow columns) and the
+        # accession column itself from the metadata_ dict to avoid JSONB errors.
+        meta: dict[str, Any] = {
+            k: v
+            for k, v in row.items()
+            if k is not None and k != "" and k != accession_col
+        }
+
+        chunk[sample_id] = {
+            "sample_id": sample_id,
+            "study_name": study_name,
+            "ncbi_accession": raw_accession,
+            "metadata_": meta,
+            "loaded_at": now,
+        }
+        if len(chunk) >= IMPORT_CHUNK_ROWS:
+            break
+    return chunk
+
+
+def _check_utf8(raw: IO[bytes]) -> None:
+    """Raise ValueError unless ``raw`` decodes as UTF-8; leaves it where it was."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    start = raw.tell()
+    offset = 0
+    try:
+        while block := raw.read(_UTF8_CHECK_BLOCK):
+            try:
+                decoder.decode(block)
+            except UnicodeDecodeError as exc:
+                raise ValueError(f"TSV is not valid UTF-8 (near byte {offset + exc.start})") from exc
+            offset += len(block)
+        try:
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError as exc:
+            raise ValueError("TSV is not valid UTF-8 (truncated at the end)") from exc
+    finally:
+        raw.seek(start)
+
+
+def _attribute_filter(attrs: dict[str, list[str]], study_name: str | None) -> list[Any]:
+    """WHERE clauses: one containment OR-group per key, plus the study scope."""
+    t = curated_sample_annotations_tbl
+    where: list[Any] = []
+    if study_name is not None:
+        where.append(t.c.study_name == study_name)
+    for key, values in attrs.items():
+        where.append(or_(*[t.c.metadata_.contains({key: v}) for v in values]))
+    return where
+
+
 def _map_study(row: Any) -> StudyRow:
     return StudyRow(
         id=row["id"],
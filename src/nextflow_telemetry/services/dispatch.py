@@ -12,6 +12,7 @@ HTTPException or a Pydantic model.
 from __future__ import annotations
 
 import sys
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any
@@ -19,6 +20,7 @@ from typing import Any
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from .. import metrics
 from ..db import jobs_tbl, samples_tbl, workflows_tbl
 from . import lifecycle
 
@@ -66,6 +68,22 @@ class DispatchService:
         Returns None when there are no pending jobs matching the filter
         (the caller maps that to HTTP 204).
         """
+        started = time.perf_counter()
+        batch = await self._claim(limit, workflow_id, workflow_version)
+        elapsed = time.perf_counter() - started
+        if batch is None:
+            metrics.claim_seconds.observe(elapsed, "empty")
+        else:
+            metrics.claim_seconds.observe(elapsed, "claimed")
+            metrics.claim_batch_size.observe(len(batch.jobs))
+        return batch
+
+    async def _claim(
+        self,
+        limit: int,
+        workflow_id: list[str] | None,
+        workflow_version: str | None,
+    ) -> ClaimedBatch | None:
         now = datetime.now(timezone.utc)
 
         async with self.engine.begin() as conn:
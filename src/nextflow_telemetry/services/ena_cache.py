@@ -0,0 +1,256 @@
+"""ENA filereport cache — one network fetch per study, not one per request.
+
+Every submission and dry-run preview used to re-download the accession's full
+run list. Reports are now kept per accession + requested field list, with the
+response's ETag / Last-Modified:
+
+- **fresh** (younger than ``ENA_CACHE_TTL_SECONDS``) — served from the table;
+  a dry run followed by the real submission is a single fetch.
+- **stale** (up to ``ENA_CACHE_MAX_STALE_SECONDS``) — served from the table
+  while one background task per key re-fetches it.
+- **expired / absent** — fetched inline, conditionally when validators are
+  stored (a 304 just bumps ``fetched_at``). Lines are handed to the caller as
+  they stream in either way.
+
+Storage is incremental in both directions. A fetch writes every
+``CHUNK_LINES`` lines as an ``ena_report_chunks`` row under a new
+``generation``; once the whole report arrived, ``ena_reports`` is pointed at
+that generation. A cache hit reads the chunks back one row per round trip.
+Neither side holds more than a chunk of the report in memory. The previous
+generation is kept until the next one is published, so a reader that started
+on it isn't cut short; older ones are deleted then, and a fetch that fails
+part-way deletes its own chunks.
+
+Empty reports (204 / no runs) aren't cached, so a project that just went
+public isn't hidden behind a cached "no runs". The fetch itself is supplied
+by the caller (``submission._fetch_lines``) so this module owns only policy.
+
+``report_lines`` works on a connection the caller already holds (the
+submission reserves one next to its transaction) and commits each cache
+write on it as it goes; only a background refresh checks out its own.
+Background refreshes are cancelled by ``stop()`` (main's lifespan).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, Callable
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ..config import settings
+from ..db import ena_report_chunks_tbl, ena_reports_tbl
+from ..log import logger
+
+# fetch(accession, meta) streams report lines. On entry meta may carry stored
+# "etag" / "last_modified" validators; the fetch sets meta["status"] and the
+# response's validators.
+Fetch = Callable[[str, dict[str, Any]], AsyncGenerator[str, None]]
+
+# Report lines per ena_report_chunks row: what a fetch buffers before a
+# write, and what a cache hit reads per round trip.
+CHUNK_LINES = 1000
+
+# Background refreshes in flight, one per key (also keeps the tasks referenced).
+_refreshing: dict[tuple[str, str], asyncio.Task] = {}
+
+
+def _key(table: Any, accession: str, fields: str) -> tuple:
+    return (table.c.accession == accession, table.c.fields == fields)
+
+
+async def _load(conn: AsyncConnection, accession: str, fields: str) -> dict | None:
+    row = (await conn.execute(
+        select(ena_reports_tbl).where(*_key(ena_reports_tbl, accession, fields))
+    )).mappings().one_or_none()
+    await conn.commit()
+    return dict(row) if row else None
+
+
+async def _replay(
+    conn: AsyncConnection, accession: str, fields: str, generation: int
+) -> AsyncGenerator[str, None]:
+    """Stored report lines of ``generation``, one chunk per query."""
+    c = ena_report_chunks_tbl.c
+    seq = -1
+    while True:
+        row = (await conn.execute(
+            select(c.seq, c.body)
+            .where(*_key(ena_report_chunks_tbl, accession, fields),
+                   c.generation == generation, c.seq > seq)
+            .order_by(c.seq)
+            .limit(1)
+        )).one_or_none()
+        await conn.commit()
+        if row is None:
+            return
+        seq = row.seq
+        for line in row.body.split("\n"):
+            yield line
+
+
+async def _write_chunk(
+    conn: AsyncConnection, accession: str, fields: str, generation: int, seq: int,
+    lines: list[str],
+) -> None:
+    await conn.execute(ena_report_chunks_tbl.insert().values(
+        accession=accession, fields=fields, generation=generation, seq=seq,
+        body="\n".join(lines),
+    ))
+    await conn.commit()
+
+
+async def _publish(
+    conn: AsyncConnection, accession: str, fields: str, generation: int,
+    meta: dict[str, Any], previous: int | None,
+) -> None:
+    """Point the cache at ``generation`` and drop chunks older than ``previous``.
+
+    A newer generation published concurrently wins; ours is dropped instead.
+    """
+    values = {
+        "generation": generation,
+        "etag": meta.get("etag"),
+        "last_modified": meta.get("last_modified"),
+        "fetched_at": datetime.now(timezone.utc),
+    }
+    published = (await conn.execute(
+        pg_insert(ena_reports_tbl)
+        .values(accession=accession, fields=fields, **values)
+        .on_conflict_do_update(
+            index_elements=["accession", "fields"], set_=values,
+            where=ena_reports_tbl.c.generation < generation,
+        )
+    )).rowcount
+    c = ena_report_chunks_tbl.c
+    key = _key(ena_report_chunks_tbl, accession, fields)
+    if not published:
+        await conn.execute(delete(ena_report_chunks_tbl).where(*key, c.generation == generation))
+    elif previous is not None:
+        await conn.execute(delete(ena_report_chunks_tbl).where(*key, c.generation < previous))
+    await conn.commit()
+
+
+async def _discard(conn: AsyncConnection, accession: str, fields: str, generation: int) -> None:
+    """Best-effort cleanup of a fetch that didn't complete."""
+    try:
+        await conn.rollback()
+        await conn.execute(delete(ena_report_chunks_tbl).where(
+            *_key(ena_report_chunks_tbl, accession, fields),
+            ena_report_chunks_tbl.c.generation == generation,
+        ))
+        await conn.commit()
+    except Exception:
+        logger.warning("ena_cache.discard_failed", extra={"accession": accession}, exc_info=True)
+
+
+async def _touch(conn: AsyncConnection, accession: str, fields: str) -> None:
+    await conn.execute(
+        update(ena_reports_tbl)
+        .where(*_key(ena_reports_tbl, accession, fields))
+        .values(fetched_at=datetime.now(timezone.utc))
+    )
+    await conn.commit()
+
+
+async def _fetch_and_store(
+    conn: AsyncConnection, accession: str, fields: str, fetch: Fetch, cached: dict | None
+) -> AsyncGenerator[str, None]:
+    """Fetch (conditionally, if ``cached``), yielding the current report lines."""
+    meta: dict[str, Any] = {}
+    if cached:
+        meta = {"etag": cached["etag"], "last_modified": cached["last_modified"]}
+    generation = time.time_ns()
+    chunk: list[str] = []
+    seq = n_lines = 0
+    try:
+        async with aclosing(fetch(accession, meta)) as fetched:
+            async for line in fetched:
+                n_lines += 1
+                chunk.append(line)
+                yield line
+                if len(chunk) >= CHUNK_LINES:
+                    await _write_chunk(conn, accession, fields, generation, seq, chunk)
+                    seq += 1
+                    chunk = []
+        if meta.get("status") == 304 and cached:
+            await _touch(conn, accession, fields)
+            async with aclosing(_replay(conn, accession, fields, cached["generation"])) as stored:
+                async for line in stored:
+                    yield line
+        elif n_lines > 1:  # more than a header
+            if chunk:
+                await _write_chunk(conn, accession, fields, generation, seq, chunk)
+                seq += 1
+            await _publish(conn, accession, fields, generation, meta,
+                           cached["generation"] if cached else None)
+    except BaseException:
+        if seq:
+            await _discard(conn, accession, fields, generation)
+        raise
+
+
+def _refresh_in_background(
+    engine: AsyncEngine, accession: str, fields: str, fetch: Fetch, cached: dict
+) -> None:
+    key = (accession, fields)
+    if key in _refreshing:
+        return
+
+    async def run() -> None:
+        try:
+            async with engine.connect() as conn:
+                async with aclosing(_fetch_and_store(conn, accession, fields, fetch, cached)) as lines:
+                    async for _ in lines:
+                        pass
+        except Exception:
+            logger.warning("ena_cache.refresh_failed", extra={"accession": accession}, exc_info=True)
+        finally:
+            _refreshing.pop(key, None)
+
+    _refreshing[key] = asyncio.create_task(run())
+
+
+async def stop() -> None:
+    """Cancel background refreshes in flight (shutdown)."""
+    tasks = list(_refreshing.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def report_lines(
+    conn: AsyncConnection, accession: str, fields: str, fetch: Fetch
+) -> AsyncGenerator[str, None]:
+    """The accession's filereport lines (header first), cached per the module policy.
+
+    Cache reads and writes run on ``conn``, each committed on its own; it must
+    not be inside a transaction the caller cares about.
+    """
+    ttl = settings.ENA_CACHE_TTL_SECONDS
+    # Inner generators are closed explicitly (aclosing), so their cleanup runs
+    # on ``conn`` while the caller still holds it.
+    if ttl <= 0:
+        async with aclosing(fetch(accession, {})) as fetched:
+            async for line in fetched:
+                yield line
+        return
+
+    cached = await _load(conn, accession, fields)
+    if cached:
+        age = (datetime.now(timezone.utc) - cached["fetched_at"]).total_seconds()
+        if age < ttl or age < settings.ENA_CACHE_MAX_STALE_SECONDS:
+            if age >= ttl:
+                _refresh_in_background(conn.engine, accession, fields, fetch, cached)
+            async with aclosing(_replay(conn, accession, fields, cached["generation"])) as stored:
+                async for line in stored:
+                    yield line
+            return
+    async with aclosing(_fetch_and_store(conn, accession, fields, fetch, cached)) as lines:
+        async for line in lines:
+            yield line
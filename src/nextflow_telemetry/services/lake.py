@@ -0,0 +1,268 @@
+"""Read-only query service over the DuckLake output catalog (``/api/lake/*``).
+
+Until now the lake was only readable through ad-hoc DuckDB sessions, each of
+which attached the catalog and scanned parquet cold. This service keeps one
+read-only attachment (``etl.lake.connect(read_only=True)``) per API process and
+hands out a small pool of DuckDB cursors on it, so every request shares:
+
+- **the attachment** — the catalog is attached once, not per query;
+- **DuckDB's parquet metadata / file caches** — footers and (on DuckDB ≥ 1.3)
+  remote file blocks are reused across requests;
+- **a pinned snapshot** — every read is ``AT (VERSION => pinned)``. The pin is
+  re-read from the catalog at most every ``snapshot_ttl`` seconds, so a burst of
+  queries sees one consistent lake and the catalog isn't consulted per query;
+- **a result cache** — LRU keyed by (snapshot, query), bounded by the total
+  rows it holds (``cache_rows``); a result over a quarter of that isn't cached.
+  Entries die with the snapshot they were read at, so the cache never serves
+  data older than the pin.
+
+DuckDB calls block, so the public coroutines run them in the default thread
+pool; a cursor is checked out for the duration and returned to the pool.
+
+duckdb lives in the optional ``lake`` extra. ``main`` only imports this module
+when ``LAKE_API_ENABLED`` is set, so the default API image stays lean.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import duckdb
+
+from ..etl import lake
+
+# Tables a profile query may read. marker_* are per-marker and too wide for a
+# per-sample JSON response; read them from the published catalog instead.
+PROFILE_TABLES = ("taxonomic_profile_metaphlan", "taxonomic_profile_bracken", "resistome", "qc_metrics")
+
+# sample×taxon matrix: method → (table, value column in its native units).
+MATRIX_METHODS = {
+    "metaphlan": ("taxonomic_profile_metaphlan", "relative_abundance"),
+    "bracken": ("taxonomic_profile_bracken", "fraction_total_reads"),
+}
+
+_CACHE_SETTINGS = ("SET parquet_metadata_cache = true", "SET enable_external_file_cache = true")
+
+
+def arrow_available() -> bool:
+    """Arrow IPC export needs pyarrow; Parquet export does not."""
+    try:
+        import pyarrow  # type: ignore[import]  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class LakeService:
+    """Pooled, snapshot-pinned reader. Connects lazily on first use."""
+
+    def __init__(
+        self,
+        pool_size: int = 4,
+        snapshot_ttl: float = 300.0,
+        cache_rows: int = 200_000,
+        connect: Callable[..., duckdb.DuckDBPyConnection] = lake.connect,
+    ) -> None:
+        self.pool_size = pool_size
+        self.snapshot_ttl = snapshot_ttl
+        self.cache_rows = cache_rows
+        self._connect = connect
+        self._base: duckdb.DuckDBPyConnection | None = None
+        self._pool: queue.LifoQueue[duckdb.DuckDBPyConnection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._snapshot: int | None = None
+        self._pinned_at = 0.0
+        self._cache: OrderedDict[tuple, list[dict[str, Any]]] = OrderedDict()
+        self._cached_total = 0  # rows across all cache entries
+
+    # -- pool / snapshot ----------------------------------------------------
+
+    def _open(self) -> None:
+        with self._lock:
+            if self._base is not None:
+                return
+            base = self._connect(read_only=True)
+            for sql in _CACHE_SETTINGS:
+                try:
+                    base.execute(sql)
+                except duckdb.Error:
+                    pass  # setting not in this DuckDB version
+            for _ in range(self.pool_size):
+                self._pool.put(base.cursor())
+            self._base = base
+
+    def _with_cursor(self, fn: Callable[[duckdb.DuckDBPyConnection], Any]) -> Any:
+        self._open()
+        cur = self._pool.get()
+        try:
+            return fn(cur)
+        finally:
+            self._pool.put(cur)
+
+    async def _run(self, fn: Callable[[duckdb.DuckDBPyConnection], Any]) -> Any:
+        return await asyncio.to_thread(self._with_cursor, fn)
+
+    def _pin(self, cur: duckdb.DuckDBPyConnection, force: bool = False) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._snapshot is not None and now - self._pinned_at < self.snapshot_ttl:
+                return self._snapshot
+        row = cur.execute("SELECT max(snapshot_id) FROM ducklake_snapshots('lake')").fetchone()
+        sid = row[0] if row is not None else None
+        if sid is None:
+            raise LookupError("the lake has no snapshots")
+        with self._lock:
+            if sid != self._snapshot:
+                self._cache.clear()
+                self._cached_total = 0
+            self._snapshot, self._pinned_at = int(sid), now
+            return self._snapshot
+
+    def _cached_rows(self, cur: duckdb.DuckDBPyConnection, key: tuple,
+                     build: Callable[[int], tuple[str, list]]) -> dict[str, Any]:
+        sid = self._pin(cur)
+        with self._lock:
+            hit = self._cache.get((sid, *key))
+            if hit is not None:
+                self._cache.move_to_end((sid, *key))
+                return {"snapshot_id": sid, "rows": hit}
+        sql, params = build(sid)
+        cur.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+        if len(rows) <= self.cache_rows // 4:
+            with self._lock:
+                old = self._cache.pop((sid, *key), None)
+                self._cached_total -= len(old) if old is not None else 0
+                self._cache[(sid, *key)] = rows
+                self._cached_total += len(rows)
+                while self._cached_total > self.cache_rows:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_total -= len(evicted)
+        return {"snapshot_id": sid, "rows": rows}
+
+    async def snapshot(self, refresh: bool = False) -> dict[str, Any]:
+        """The pinned snapshot id and its age; ``refresh`` re-pins now."""
+        def go(cur):
+            sid = self._pin(cur, force=refresh)
+            return {"snapshot_id": sid, "pinned_seconds_ago": round(time.monotonic() - self._pinned_at, 1)}
+        return await self._run(go)
+
+    def close(self) -> None:
+        with self._lock:
+            while not self._pool.empty():
+                self._pool.get_nowait().close()
+            if self._base is not None:
+                self._base.close()
+                self._base = None
+
+    # -- queries -------------------------------------------------------------
+
+    @staticmethod
+    def _where(table: str, filters: dict[str, Any]) -> tuple[str, list]:
+        cols = lake.SCHEMAS[table]
+        clauses, params = [], []
+        for col, val in filters.items():
+            if val is None:
+                continue
+            if col not in cols:
+                raise ValueError(f"{table} has no column {col!r} to filter on")
+            clauses.append(f"{col} = ?")
+            params.append(val)
+        return " AND ".join(clauses) or "true", params
+
+    async def profile(
+        self,
+        table: str,
+        *,
+        sample_id: str | None = None,
+        study_name: str | None = None,
+        workflow: str | None = None,
+        version: str | None = None,
+        rank: str | None = None,
+        limit: int = 10000,
+    ) -> dict[str, Any]:
+        """Rows of one profile table for a sample or a study, at the pinned
+        snapshot: ``{"snapshot_id": int, "rows": [...]}``."""
+        if table not in PROFILE_TABLES:
+            raise ValueError(f"unknown lake table {table!r}")
+        filters = {"sample_id": sample_id, "study_name": study_name,
+                   "workflow": workflow, "version": version, "rank": rank}
+        where, params = self._where(table, filters)
+        cols = ", ".join(lake.SCHEMAS[table])
+
+        def build(sid: int) -> tuple[str, list]:
+            return (f"SELECT {cols} FROM lake.{table} AT (VERSION => {sid}) WHERE {where} "
+                    f"ORDER BY sample_id LIMIT ?", [*params, limit])
+
+        key = ("profile", table, *filters.values(), limit)
+        return await self._run(lambda cur: self._cached_rows(cur, key, build))
+
+    async def matrix(
+        self,
+        method: str,
+        fmt: str,
+        *,
+        rank: str = "species",
+        study_name: str | None = None,
+        sample_ids: list[str] | None = None,
+        workflow: str | None = None,
+        version: str | None = None,
+    ) -> dict[str, Any]:
+        """sample×taxon matrix (one row per sample, one column per clade) as
+        Parquet or Arrow IPC stream bytes: ``{"snapshot_id": int, "body": bytes}``.
+        LookupError when nothing matches."""
+        if method not in MATRIX_METHODS:
+            raise ValueError(f"unknown method {method!r}; expected one of {sorted(MATRIX_METHODS)}")
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"unknown format {fmt!r}; expected 'parquet' or 'arrow'")
+        table, value = MATRIX_METHODS[method]
+        where, params = self._where(table, {"rank": rank, "study_name": study_name,
+                                            "workflow": workflow, "version": version})
+        if sample_ids:
+            where += " AND sample_id = ANY(?)"
+            params.append(sample_ids)
+
+        def go(cur: duckdb.DuckDBPyConnection) -> dict[str, Any]:
+            sid = self._pin(cur)
+            # PIVOT can't take bind parameters, so filter into a per-cursor temp
+            # table first and pivot that.
+            cur.execute(
+                f"CREATE OR REPLACE TEMP TABLE _matrix AS SELECT sample_id, clade_name, {value} AS v "
+                f"FROM lake.{table} AT (VERSION => {sid}) WHERE {where}", params)
+            count = cur.execute("SELECT count(*) FROM _matrix").fetchone()
+            if count is None or not count[0]:
+                cur.execute("DROP TABLE _matrix")
+                raise LookupError("no profile rows match")
+            pivot = "PIVOT _matrix ON clade_name USING first(v) GROUP BY sample_id ORDER BY sample_id"
+            try:
+                return {"snapshot_id": sid, "body": self._export(cur, pivot, fmt)}
+            finally:
+                cur.execute("DROP TABLE IF EXISTS _matrix")
+
+        return await self._run(go)
+
+    @staticmethod
+    def _export(cur: duckdb.DuckDBPyConnection, query: str, fmt: str) -> bytes:
+        if fmt == "arrow":
+            import pyarrow as pa  # type: ignore[import]
+
+            tbl = cur.execute(query).arrow()
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, tbl.schema) as w:
+                w.write_table(tbl)
+            return sink.getvalue().to_pybytes()
+        fd, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            cur.execute(f"COPY ({query}) TO '{path}' (FORMAT parquet)")
+            with open(path, "rb") as fh:
+                return fh.read()
+        finally:
+            os.unlink(path)
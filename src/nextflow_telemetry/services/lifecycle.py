@@ -34,6 +34,12 @@ str | None) — routers are responsible for turning "no match" into a 404
 where that's the right HTTP behaviour; this module itself never touches
 HTTP.
 
+Cohort progress: every transition that moves a job into or out of a status
+the leaderboard counts (running / completed / failed) ends by calling
+``cohort_progress.refresh_samples`` for the samples it touched, in the same
+transaction. claim / mark_submitted / requeue_expired only move between
+pending, claimed and submitted, which aren't counted, so they don't.
+
 Deliberate CARVE-OUTS — NOT owned by this module:
   - Job *birth*: creating the initial ``pending`` rows is
     ``ReconcileService.reconcile_jobs`` (services/reconcile.py). That's an
@@ -51,14 +57,17 @@ Deliberate CARVE-OUTS — NOT owned by this module:
 """
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from enum import StrEnum
 from typing import TypedDict
 
-from sqlalchemy import case, select, update
+from sqlalchemy import case, func, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from . import cohort_progress
+from .. import metrics
 from ..db import dead_letter_tbl, jobs_tbl, workflow_runs_tbl, workflows_tbl
 
 
@@ -90,6 +99,18 @@ RUN_TERMINAL_STATUSES = frozenset(
 
 _SWEEP_REASON_DEFAULT = "run completed without MARK_COMPLETE"
 
+# Postgres NOTIFY channel fired (on commit) when `complete_sample` completes a
+# job. Payload is JSON {sample_id, workflow_id, workflow_version}. Listened to
+# by `nf-etl follow` so freshly completed samples reach the lake without
+# waiting for the next cron tick.
+JOB_COMPLETED_CHANNEL = "job_completed"
+
+
+def _transitioned(entity: str, to: str, rows: int) -> None:
+    """Count ``rows`` moved to ``to`` in ``lifecycle_transitions_total``."""
+    if rows > 0:
+        metrics.lifecycle_transitions.inc(entity, to, amount=rows)
+
 
 class RunFields(TypedDict):
     """Fields for the workflow_runs row created by `claim`."""
@@ -126,7 +147,7 @@ async def claim(
             claimed_at=run_fields["claimed_at"],
         )
     )
-    await conn.execute(
+    result = await conn.execute(
         update(jobs_tbl)
         .where(
             jobs_tbl.c.id.in_(job_ids),
@@ -134,6 +155,8 @@ async def claim(
         )
         .values(run_name=run_name, status=JobStatus.claimed)
     )
+    _transitioned("run", RunStatus.claimed, 1)
+    _transitioned("job", JobStatus.claimed, result.rowcount)
 
 
 async def mark_submitted(
@@ -167,7 +190,7 @@ async def mark_submitted(
 
     # Advance jobs from `claimed` to `submitted` — distinct from `running`,
     # which is set only when the weblog `started` event arrives.
-    await conn.execute(
+    result = await conn.execute(
         update(jobs_tbl)
         .where(
             jobs_tbl.c.run_name == run_name,
@@ -175,6 +198,8 @@ async def mark_submitted(
         )
         .values(status=JobStatus.submitted)
     )
+    _transitioned("run", RunStatus.submitted, 1)
+    _transitioned("job", JobStatus.submitted, result.rowcount)
     return True
 
 
@@ -194,7 +219,7 @@ async def mark_running(
     `started_at`/`run_id` on a run already `running`. Mirrors
     services/telemetry.py's `started` handling.
     """
-    await conn.execute(
+    run = await conn.execute(
         update(workflow_runs_tbl)
         .where(
             workflow_runs_tbl.c.run_name == run_name,
@@ -202,14 +227,19 @@ async def mark_running(
         )
         .values(run_id=run_id, status=RunStatus.running, started_at=now)
     )
-    await conn.execute(
+    result = await conn.execute(
         update(jobs_tbl)
         .where(
             jobs_tbl.c.run_name == run_name,
             jobs_tbl.c.status.in_([JobStatus.claimed, JobStatus.submitted]),
         )
         .values(status=JobStatus.running)
+        .returning(jobs_tbl.c.sample_id)
     )
+    sample_ids = list(result.scalars())
+    _transitioned("run", RunStatus.running, run.rowcount)
+    _transitioned("job", JobStatus.running, len(sample_ids))
+    await cohort_progress.refresh_samples(conn, sample_ids)
 
 
 async def complete_sample(
@@ -226,6 +256,10 @@ async def complete_sample(
     Guarded against terminal job states: a late MARK_COMPLETE will not flip a
     job that already `failed` (which would leave a `completed` row with
     failure fields still populated) or re-touch one already `completed`.
+
+    Each completed job also sends a ``JOB_COMPLETED_CHANNEL`` notification.
+    NOTIFY is transactional, so listeners only hear about it once the caller
+    commits — and not at all if it rolls back.
     """
     result = await conn.execute(
         update(jobs_tbl)
@@ -235,8 +269,16 @@ async def complete_sample(
             jobs_tbl.c.status.notin_([JobStatus.completed, JobStatus.failed]),
         )
         .values(status=JobStatus.completed, completed_at=now)
+        .returning(jobs_tbl.c.workflow_id, jobs_tbl.c.workflow_version)
     )
-    return result.rowcount or 0
+    completed = result.mappings().all()
+    _transitioned("job", JobStatus.completed, len(completed))
+    for row in completed:
+        payload = json.dumps({"sample_id": sample_id, **row})
+        await conn.execute(select(func.pg_notify(JOB_COMPLETED_CHANNEL, payload)))
+    if completed:
+        await cohort_progress.refresh_samples(conn, [sample_id])
+    return len(completed)
 
 
 async def close_run(
@@ -284,6 +326,7 @@ async def close_run(
         .where(workflow_runs_tbl.c.run_name == run_name)
         .values(**values)
     )
+    _transitioned("run", terminal, 1)
     return prior_status
 
 
@@ -340,6 +383,8 @@ async def sweep_incomplete(
     swept = result.mappings().all()
 
     dlq_rows = [r for r in swept if r["status"] == JobStatus.failed]
+    _transitioned("job", JobStatus.failed, len(dlq_rows))
+    _transitioned("job", JobStatus.pending, len(swept) - len(dlq_rows))
     if dlq_rows:
         await conn.execute(
             pg_insert(dead_letter_tbl)
@@ -360,6 +405,7 @@ async def sweep_incomplete(
             .on_conflict_do_nothing(constraint="uq_dlq_job_id")
         )
 
+    await cohort_progress.refresh_samples(conn, [r["sample_id"] for r in swept])
     return len(swept)
 
 
@@ -381,7 +427,7 @@ async def requeue_expired(conn: AsyncConnection, cutoff: datetime) -> int:
     expired_run_names = [r[0] for r in result.fetchall()]
 
     if expired_run_names:
-        await conn.execute(
+        requeued = await conn.execute(
             update(jobs_tbl)
             .where(
                 jobs_tbl.c.run_name.in_(expired_run_names),
@@ -389,6 +435,8 @@ async def requeue_expired(conn: AsyncConnection, cutoff: datetime) -> int:
             )
             .values(status=JobStatus.pending, run_name=None)
         )
+        _transitioned("run", RunStatus.expired, len(expired_run_names))
+        _transitioned("job", JobStatus.pending, requeued.rowcount)
 
     return len(expired_run_names)
 
@@ -409,7 +457,7 @@ async def requeue_dead_letter(
     if not job_ids:
         return 0
 
-    await conn.execute(
+    result = await conn.execute(
         update(jobs_tbl)
         .where(jobs_tbl.c.id.in_(job_ids))
         .values(
@@ -419,7 +467,11 @@ async def requeue_dead_letter(
             failed_at=None,
             failure_reason=None,
         )
+        .returning(jobs_tbl.c.sample_id)
     )
+    sample_ids = list(result.scalars())
+    _transitioned("job", JobStatus.pending, len(sample_ids))
+    await cohort_progress.refresh_samples(conn, sample_ids)
     await conn.execute(
         update(dead_letter_tbl)
         .where(dead_letter_tbl.c.id.in_(dlq_ids))
@@ -452,5 +504,9 @@ async def reset_jobs_to_pending(
             failed_at=None,
             failure_reason=None,
         )
+        .returning(jobs_tbl.c.sample_id)
     )
-    return result.rowcount or 0
+    sample_ids = list(result.scalars())
+    _transitioned("job", JobStatus.pending, len(sample_ids))
+    await cohort_progress.refresh_samples(conn, sample_ids)
+    return len(sample_ids)
@@ -0,0 +1,233 @@
+"""In-process collection membership index.
+
+Facet counts, "samples in A and B" intersections and membership lists used to
+be a ``collection_samples`` GROUP BY / join per request. This module keeps the
+whole membership relation in memory as one bitset per collection over a dense
+sample ordinal, so those reads are set algebra with no DB round trip.
+
+Bitsets are plain Python ints (bit *i* = sample ordinal *i*): ``&``/``|`` are
+C-speed, ``int.bit_count`` is a popcount, and at catalog scale (~10^5 samples)
+a collection costs at most a few KB. Ordinals are assigned in load order and
+only ever appended, so a bit never changes meaning while the process runs.
+
+Lifecycle:
+
+- ``index.load(engine)`` at startup (main's lifespan) reads every sample and
+  membership row. Until that has succeeded — startup skipped via
+  ``TELEMETRY_SKIP_DB_INIT``, or the load failed — callers fall back to SQL.
+- ``record_members`` / ``record_samples`` are called by the write seams
+  (``add_to_collection``, ``SampleService.register``) with the caller's
+  connection. The change is applied when that connection commits and dropped
+  if it rolls back, so the index never shows uncommitted membership.
+- Other API workers / hosts write too, so once the index is older than
+  ``MEMBERSHIP_INDEX_TTL_SECONDS`` ``ensure_fresh`` starts a reload in a
+  background task and keeps answering from the current state. That bounds how
+  stale a cross-process write can look, and no request waits on a reload.
+  Writes committed while a reload runs are replayed onto the new state, since
+  its scan may have started before them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..config import settings
+from ..db import collection_samples_tbl, samples_tbl
+from ..replica import Connectable
+
+logger = logging.getLogger(__name__)
+
+# A (re)load yields to the event loop every this many rows.
+_YIELD_EVERY = 10_000
+
+
+def _bitset(ordinals: list[int], size: int) -> int:
+    """Int with bit ``i`` set for each ``i`` in ``ordinals`` (all < ``size``)."""
+    buf = bytearray((size + 7) // 8)
+    for i in ordinals:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+class MembershipIndex:
+    def __init__(self) -> None:
+        self._ordinal: dict[str, int] = {}
+        self._ids: list[str] = []
+        self._bits: dict[str, int] = {}
+        self.loaded_at: float | None = None
+        self._reload: asyncio.Task | None = None
+        # Ops applied while a load runs, replayed onto its result.
+        self._replay: list[tuple[str | None, list[str]]] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    # -- building -----------------------------------------------------------
+
+    async def load(self, engine: Connectable) -> None:
+        """(Re)build from the database. Replaces state atomically."""
+        ordinal: dict[str, int] = {}
+        ids: list[str] = []
+        bits: dict[str, int] = {}
+        self._replay = []
+        try:
+            async with engine.connect() as conn:
+                sample_rows = await conn.execute(
+                    select(samples_tbl.c.sample_id).order_by(samples_tbl.c.id)
+                )
+                for (sid,) in sample_rows.tuples():
+                    ordinal[sid] = len(ids)
+                    ids.append(sid)
+                    if not len(ids) % _YIELD_EVERY:
+                        await asyncio.sleep(0)
+                member_rows = await conn.execute(
+                    select(collection_samples_tbl.c.collection_id, collection_samples_tbl.c.sample_id)
+                )
+                members: dict[str, list[int]] = {}
+                for n, (cid, sid) in enumerate(member_rows.tuples(), 1):
+                    if not n % _YIELD_EVERY:
+                        await asyncio.sleep(0)
+                    i = ordinal.get(sid)
+                    if i is None:  # sample inserted after our samples scan
+                        i = ordinal[sid] = len(ids)
+                        ids.append(sid)
+                    members.setdefault(cid, []).append(i)
+            # Each bitset is built once from a byte buffer: OR-ing one bit at a
+            # time into an int copies the whole int per row.
+            n = 0
+            for cid, ords in members.items():
+                bits[cid] = _bitset(ords, len(ids))
+                n += len(ords)
+                if n >= _YIELD_EVERY:
+                    n = 0
+                    await asyncio.sleep(0)
+            replay = self._replay
+        finally:
+            self._replay = None
+        self._ordinal, self._ids, self._bits = ordinal, ids, bits
+        self.loaded_at = time.monotonic()
+        self.apply(replay)
+
+    async def ensure_fresh(self, engine: Connectable) -> bool:
+        """Start a background reload if older than the TTL. Returns False when
+        the index was never loaded (startup skipped or failed) so the caller
+        uses SQL; until a reload lands (or if it fails) the previous state is
+        served."""
+        if self.loaded_at is None:
+            return False
+        stale = time.monotonic() - self.loaded_at >= settings.MEMBERSHIP_INDEX_TTL_SECONDS
+        if stale and (self._reload is None or self._reload.done()):
+            self._reload = asyncio.get_running_loop().create_task(self._reload_in_background(engine))
+        return True
+
+    async def _reload_in_background(self, engine: Connectable) -> None:
+        try:
+            await self.load(engine)
+        except Exception:
+            logger.warning("membership.index.reload_failed", exc_info=True)
+
+    async def stop(self) -> None:
+        """Cancel a reload in flight (shutdown)."""
+        if self._reload is not None:
+            self._reload.cancel()
+            try:
+                await self._reload
+            except asyncio.CancelledError:
+                pass
+            self._reload = None
+
+    def _ord(self, sample_id: str) -> int:
+        i = self._ordinal.get(sample_id)
+        if i is None:
+            i = self._ordinal[sample_id] = len(self._ids)
+            self._ids.append(sample_id)
+        return i
+
+    def apply(self, ops: Iterable[tuple[str | None, list[str]]]) -> None:
+        """Apply committed writes: (collection_id, sample_ids); None = samples only."""
+        ops = list(ops)
+        if self._replay is not None:
+            self._replay.extend(ops)
+        if not self.loaded:
+            return
+        for cid, sample_ids in ops:
+            mask = 0
+            for sid in sample_ids:
+                mask |= 1 << self._ord(sid)
+            if cid is not None:
+                self._bits[cid] = self._bits.get(cid, 0) | mask
+
+    # -- reads --------------------------------------------------------------
+
+    @property
+    def total(self) -> int:
+        return len(self._ids)
+
+    def facets(self) -> list[dict]:
+        """[{collection, count}] largest first, ties by collection id."""
+        counts = [(cid, b.bit_count()) for cid, b in self._bits.items()]
+        counts.sort(key=lambda c: (-c[1], c[0]))
+        return [{"collection": cid, "count": n} for cid, n in counts]
+
+    def intersection(self, collection_ids: list[str]) -> int:
+        """Bitset of samples in *every* given collection (0 if any is unknown)."""
+        if not collection_ids:
+            return 0
+        acc = self._bits.get(collection_ids[0], 0)
+        for cid in collection_ids[1:]:
+            acc &= self._bits.get(cid, 0)
+        return acc
+
+    def sample_ids(self, bits: int, limit: int | None = None) -> list[str]:
+        """Sample ids for the set bits, in ordinal (registration) order."""
+        out: list[str] = []
+        while bits and (limit is None or len(out) < limit):
+            low = bits & -bits
+            out.append(self._ids[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+
+index = MembershipIndex()
+
+# Writes recorded on a connection, applied on its commit. Keyed weakly by the
+# sync Connection so an abandoned connection doesn't pin its list.
+_pending: "weakref.WeakKeyDictionary[Connection, list[tuple[str | None, list[str]]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _on_commit(sync_conn: Connection) -> None:
+    index.apply(_pending.pop(sync_conn, []))
+
+
+def _on_rollback(sync_conn: Connection) -> None:
+    _pending.pop(sync_conn, None)
+
+
+def _record(conn: AsyncConnection, op: tuple[str | None, list[str]]) -> None:
+    sync = conn.sync_connection
+    if sync is None:
+        return
+    if not event.contains(sync, "commit", _on_commit):
+        event.listen(sync, "commit", _on_commit)
+        event.listen(sync, "rollback", _on_rollback)
+    _pending.setdefault(sync, []).append(op)
+
+
+def record_members(conn: AsyncConnection, collection_id: str, sample_ids: list[str]) -> None:
+    """Note membership written on ``conn``; applied to the index on commit."""
+    _record(conn, (collection_id, list(sample_ids)))
+
+
+def record_samples(conn: AsyncConnection, sample_ids: list[str]) -> None:
+    """Note newly registered samples (for ``total``); applied on commit."""
+    _record(conn, (None, list(sample_ids)))
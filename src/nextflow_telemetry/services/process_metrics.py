@@ -1,16 +1,45 @@
 from __future__ import annotations
 
 import datetime as dt
+import functools
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Literal
 
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..fanout import fan_out
+from ..replica import Connectable
+from ..statements import statement
 
 
 _DEFAULT_WINDOW_DAYS = 7
 
+# Optional filters in mask-bit order: (bind name, condition on table alias {a}).
+_FILTERS = (
+    ("window_days", "{a}.utc_time >= now() - make_interval(days => :window_days)"),
+    ("window_hours", "{a}.utc_time >= now() - make_interval(hours => :window_hours)"),
+    ("since", "{a}.utc_time >= :since"),
+    ("until", "{a}.utc_time <= :until"),
+    ("workflow_id", "{a}.workflow_id = :workflow_id"),
+    ("workflow_version", "{a}.workflow_version = :workflow_version"),
+    ("run_name", "{a}.run_name = :run_name"),
+    ("sample_id", "{a}.sample_id = :sample_id"),
+    ("process", "{a}.process = :process"),
+    ("status", "{a}.status = :status"),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _fragment(mask: int, table_alias: str) -> str:
+    """The ``and ...`` WHERE fragment for the filters set in ``mask``."""
+    clauses = [
+        cond.format(a=table_alias)
+        for bit, (_, cond) in enumerate(_FILTERS)
+        if mask >> bit & 1
+    ]
+    return (" and " + " and ".join(clauses)) if clauses else ""
+
 
 def _normalize_window(
     *,
@@ -39,7 +68,7 @@ def _normalize_window(
 
 @dataclass
 class ProcessMetricsService:
-    engine: AsyncEngine
+    engine: Connectable
 
     def _filter_clause(
         self,
@@ -52,54 +81,34 @@ class ProcessMetricsService:
         workflow_version: str | None = None,
         run_name: str | None = None,
         sample_id: str | None = None,
+        process: str | None = None,
+        status: str | None = None,
         table_alias: str = "t",
-    ) -> tuple[str, dict[str, Any]]:
-        """Build a composable WHERE fragment and bind-params dict for telemetry/task_executions queries."""
-        clauses: list[str] = []
-        params: dict[str, Any] = {}
-        a = table_alias
+    ) -> tuple[int, str, dict[str, Any]]:
+        """Validate the filters; return (filter mask, WHERE fragment, bind params).
 
+        The mask records which filters are present and fixes the fragment, so
+        callers key their cached statements (statements.py) on it.
+        """
         if window_days is not None and window_hours is not None:
             raise ValueError("Provide only one of window_days or window_hours, not both.")
-
-        if window_days is not None:
-            if window_days < 1:
-                raise ValueError("window_days must be >= 1")
-            clauses.append(f"{a}.utc_time >= now() - make_interval(days => :window_days)")
-            params["window_days"] = window_days
-
-        if window_hours is not None:
-            if window_hours < 1:
-                raise ValueError("window_hours must be >= 1")
-            clauses.append(f"{a}.utc_time >= now() - make_interval(hours => :window_hours)")
-            params["window_hours"] = window_hours
-
-        if since is not None:
-            clauses.append(f"{a}.utc_time >= :since")
-            params["since"] = since
-
-        if until is not None:
-            clauses.append(f"{a}.utc_time <= :until")
-            params["until"] = until
-
-        if workflow_id is not None:
-            clauses.append(f"{a}.workflow_id = :workflow_id")
-            params["workflow_id"] = workflow_id
-
-        if workflow_version is not None:
-            clauses.append(f"{a}.workflow_version = :workflow_version")
-            params["workflow_version"] = workflow_version
-
-        if run_name is not None:
-            clauses.append(f"{a}.run_name = :run_name")
-            params["run_name"] = run_name
-
-        if sample_id is not None:
-            clauses.append(f"{a}.sample_id = :sample_id")
-            params["sample_id"] = sample_id
-
-        fragment = (" and " + " and ".join(clauses)) if clauses else ""
-        return fragment, params
+        if window_days is not None and window_days < 1:
+            raise ValueError("window_days must be >= 1")
+        if window_hours is not None and window_hours < 1:
+            raise ValueError("window_hours must be >= 1")
+
+        values = (
+            window_days, window_hours, since, until,
+            workflow_id, workflow_version, run_name, sample_id,
+            process, status,
+        )
+        mask = 0
+        params: dict[str, Any] = {}
+        for bit, ((name, _), value) in enumerate(zip(_FILTERS, values)):
+            if value is not None:
+                mask |= 1 << bit
+                params[name] = value
+        return mask, _fragment(mask, table_alias), params
 
     async def summary(
         self,
@@ -124,23 +133,17 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
             run_name=run_name, sample_id=sample_id,
         )
-        fc2, _ = self._filter_clause(
-            window_days=window_days, window_hours=window_hours,
-            since=since, until=until,
-            workflow_id=workflow_id, workflow_version=workflow_version,
-            run_name=run_name, sample_id=sample_id,
-            table_alias="t2",
-        )
+        fc2 = _fragment(mask, "t2")
         params = {**params, "min_samples": min_samples, "limit": limit}
 
-        cards_sql = text(
-            f"""
+        cards_sql = statement(
+            "summary.cards", mask, lambda: f"""
             with x as (
               select
                 t.run_id,
@@ -177,8 +180,8 @@ class ProcessMetricsService:
             """
         )
 
-        top_failures_sql = text(
-            f"""
+        top_failures_sql = statement(
+            "summary.top_failures", mask, lambda: f"""
             with x as (
               select
                 t.process,
@@ -200,8 +203,8 @@ class ProcessMetricsService:
             """
         )
 
-        top_retries_sql = text(
-            f"""
+        top_retries_sql = statement(
+            "summary.top_retries", mask, lambda: f"""
             with x as (
               select
                 t.process,
@@ -226,8 +229,8 @@ class ProcessMetricsService:
             """
         )
 
-        top_exit_codes_sql = text(
-            f"""
+        top_exit_codes_sql = statement(
+            "summary.top_exit_codes", mask, lambda: f"""
             select
               coalesce(t.exit_code, '<null>') as exit_code,
               count(*) as failures
@@ -241,8 +244,8 @@ class ProcessMetricsService:
         )
 
         # Uses raw telemetry table to get breakdown of all event types in flight/submitted
-        event_mix_sql = text(
-            f"""
+        event_mix_sql = statement(
+            "summary.event_mix", mask, lambda: f"""
             select t.event, count(*) as rows
             from telemetry t
             where true
@@ -252,12 +255,21 @@ class ProcessMetricsService:
             """
         )
 
-        async with self.engine.connect() as conn:
-            cards = dict((await conn.execute(cards_sql, params)).mappings().one())
-            top_failures = [dict(row) for row in (await conn.execute(top_failures_sql, params)).mappings().all()]
-            top_retries = [dict(row) for row in (await conn.execute(top_retries_sql, params)).mappings().all()]
-            top_exit_codes = [dict(row) for row in (await conn.execute(top_exit_codes_sql, params)).mappings().all()]
-            event_mix = [dict(row) for row in (await conn.execute(event_mix_sql, params)).mappings().all()]
+        async def one(conn, sql):
+            return dict((await conn.execute(sql, params)).mappings().one())
+
+        async def rows(conn, sql):
+            return [dict(row) for row in (await conn.execute(sql, params)).mappings().all()]
+
+        # Independent aggregates: run them side by side (fanout.py).
+        cards, top_failures, top_retries, top_exit_codes, event_mix = await fan_out(
+            self.engine,
+            lambda conn: one(conn, cards_sql),
+            lambda conn: rows(conn, top_failures_sql),
+            lambda conn: rows(conn, top_retries_sql),
+            lambda conn: rows(conn, top_exit_codes_sql),
+            lambda conn: rows(conn, event_mix_sql),
+        )
 
         return {
             "generated_at_utc": datetime.now(timezone.utc).isoformat(),
@@ -292,7 +304,7 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
@@ -300,8 +312,8 @@ class ProcessMetricsService:
         )
         params = {**params, "min_samples": min_samples, "limit": limit}
 
-        summary_sql = text(
-            f"""
+        summary_sql = statement(
+            "retries.summary", mask, lambda: f"""
             with x as (
               select
                 t.attempt,
@@ -322,8 +334,8 @@ class ProcessMetricsService:
             """
         )
 
-        by_process_sql = text(
-            f"""
+        by_process_sql = statement(
+            "retries.by_process", mask, lambda: f"""
             with x as (
               select
                 t.process,
@@ -349,8 +361,8 @@ class ProcessMetricsService:
             """
         )
 
-        by_attempt_sql = text(
-            f"""
+        by_attempt_sql = statement(
+            "retries.by_attempt", mask, lambda: f"""
             select
               t.attempt,
               count(*) as rows,
@@ -400,7 +412,7 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
@@ -408,8 +420,8 @@ class ProcessMetricsService:
         )
         params = {**params, "min_samples": min_samples, "limit": limit}
 
-        sql = text(
-            f"""
+        sql = statement(
+            "resources_by_attempt", mask, lambda: f"""
             with x as (
               select
                 t.process,
@@ -486,7 +498,7 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
@@ -494,8 +506,8 @@ class ProcessMetricsService:
         )
         params = {**params, "min_samples": min_samples, "limit": limit}
 
-        sql = text(
-            f"""
+        sql = statement(
+            "failures", mask, lambda: f"""
             with x as (
               select
                 t.process,
@@ -585,7 +597,7 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
@@ -593,8 +605,8 @@ class ProcessMetricsService:
         )
         params = {**params, "limit": limit}
 
-        sql = text(
-            f"""
+        sql = statement(
+            "failure_signatures", mask, lambda: f"""
             select
               t.process,
               coalesce(t.exit_code, '<null>') as exit_code,
@@ -637,20 +649,16 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
+            process=process,
         )
         params = {**params, "bucket": bucket}
 
-        process_clause = ""
-        if process is not None:
-            process_clause = "and t.process = :process"
-            params["process"] = process
-
-        sql = text(
-            f"""
+        sql = statement(
+            "timeline", mask, lambda: f"""
             select
               date_trunc(:bucket, t.utc_time) as bucket_start,
               count(*) as total,
@@ -663,7 +671,6 @@ class ProcessMetricsService:
             from task_executions t
             where true
               {fc}
-              {process_clause}
             group by bucket_start
             order by bucket_start
             """
@@ -724,7 +731,7 @@ class ProcessMetricsService:
 
         async with self.engine.connect() as conn:
             rows = [dict(r) for r in (await conn.execute(sql)).mappings().all()]
-            active_nf_runs = (await conn.execute(active_runs_sql)).scalar_one()
+            active_nf_runs: int = (await conn.execute(active_runs_sql)).scalar_one()
 
         total_running = sum(r["running"] for r in rows)
         total_queued  = sum(r["queued"]  for r in rows)
@@ -763,24 +770,17 @@ class ProcessMetricsService:
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
         )
-        fc, params = self._filter_clause(
+        mask, fc, params = self._filter_clause(
             window_days=window_days, window_hours=window_hours,
             since=since, until=until,
             workflow_id=workflow_id, workflow_version=workflow_version,
             run_name=run_name, sample_id=sample_id,
+            process=process, status=status,
         )
         params = {**params, "limit": limit, "offset": offset}
 
-        extra_clauses = ""
-        if process is not None:
-            extra_clauses += " and t.process = :process"
-            params["process"] = process
-        if status is not None:
-            extra_clauses += " and t.status = :status"
-            params["status"] = status
-
-        sql = text(
-            f"""
+        sql = statement(
+            "tasks", mask, lambda: f"""
             select
               t.telemetry_id,
               t.run_name,
@@ -808,7 +808,6 @@ class ProcessMetricsService:
             from task_executions t
             where true
               {fc}
-              {extra_clauses}
             order by t.utc_time desc
             limit :limit offset :offset
             """
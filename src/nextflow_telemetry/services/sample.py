@@ -1,22 +1,58 @@
 """Sample catalog service."""
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select, text
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.ext.asyncio import AsyncEngine
 
-from ..db import collection_samples_tbl, samples_tbl
-from ..utils import normalize_srrs, parse_srrs
+from ..replica import Connectable
+from ..db import collection_samples_tbl, sample_accessions_tbl, samples_tbl
+from ..utils import normalize_srrs, parse_srrs, srr_key, srrs_to_sample_id
+from . import membership
+from .accessions import set_accessions, set_accessions_from
 from .collection import add_to_collection
 
+# Rows per staging round trip / transaction in register_bulk. The router cuts
+# a streamed body into chunks of this size.
+BULK_CHUNK_ROWS = 5000
+
+_BULK_COLUMNS = ["ord", "sample_id", "ncbi_accession", "biosample_id", "collection", "metadata"]
+# Row fields that must be JSON strings when present (COPY takes them as text).
+_BULK_TEXT_FIELDS = ("sample_id", "ncbi_accession", "biosample_id", "collection")
+
+# (sample_id, ncbi_accession) per staged sample, last row winning as in the
+# upsert below; the source for set_accessions_from.
+_BULK_ACCESSIONS = (
+    "SELECT DISTINCT ON (sample_id) sample_id, ncbi_accession "
+    "FROM _bulk_samples ORDER BY sample_id, ord DESC"
+)
+
+# Last row wins for a sample_id repeated within a chunk. Same conflict policy
+# as register(): metadata_ replaced, biosample_id only when supplied.
+_BULK_UPSERT = text(
+    """
+    INSERT INTO samples AS s (sample_id, ncbi_accession, biosample_id, metadata_, created_at, updated_at)
+    SELECT DISTINCT ON (sample_id)
+           sample_id, ncbi_accession, biosample_id, metadata::jsonb, :now, :now
+    FROM _bulk_samples
+    ORDER BY sample_id, ord DESC
+    ON CONFLICT (sample_id) DO UPDATE SET
+        ncbi_accession = EXCLUDED.ncbi_accession,
+        biosample_id   = COALESCE(EXCLUDED.biosample_id, s.biosample_id),
+        metadata_      = EXCLUDED.metadata_,
+        updated_at     = EXCLUDED.updated_at
+    RETURNING s.sample_id, (s.xmax = 0) AS inserted
+    """
+)
+
 
 @dataclass
 class SampleService:
-    engine: AsyncEngine
+    engine: Connectable
 
     async def register(
         self,
@@ -65,6 +101,9 @@ class SampleService:
             )
             result = await conn.execute(stmt)
             row = dict(result.mappings().one())
+            if normalised is not None:
+                await set_accessions(conn, {sample_id: normalised})
+            membership.record_samples(conn, [sample_id])
             if collection:
                 await add_to_collection(
                     conn, collection, source="manual", sample_ids=[sample_id]
@@ -80,6 +119,81 @@ class SampleService:
             row["collections"] = [m[0] for m in mrows.all()]
             return row
 
+    async def register_bulk(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Register a chunk of samples in one transaction; per-row outcomes.
+
+        Each row is a register() payload (``sample_id`` optional — derived from
+        the SRRs as in ``srrs_to_sample_id`` when absent) plus its input
+        ``line``; a row carrying ``error`` was unparseable upstream. Valid rows
+        are COPY'd into a temp table and upserted into ``samples`` with one
+        statement; accessions follow set-based from the temp table, membership
+        with one ``add_to_collection`` per distinct collection. A row with a
+        non-string id / accession / collection field is ``invalid``, not a
+        failed COPY for the whole chunk.
+
+        Returns ``[{line, sample_id, status, error}]`` in input order, status
+        one of ``created`` / ``updated`` / ``invalid``.
+        """
+        outcomes: list[dict[str, Any]] = []
+        staged: list[tuple[int, str, str, str | None, str | None, str | None]] = []
+        for r in rows:
+            sid = r.get("sample_id")
+            out: dict[str, Any] = {"line": r.get("line"),
+                                   "sample_id": sid if isinstance(sid, str) else None,
+                                   "status": "invalid", "error": r.get("error")}
+            outcomes.append(out)
+            if out["error"]:
+                continue
+            bad = [f for f in _BULK_TEXT_FIELDS if r.get(f) is not None and not isinstance(r[f], str)]
+            acc = r.get("ncbi_accession")
+            srrs = parse_srrs(acc) if isinstance(acc, str) else []
+            md = r.get("metadata")
+            if bad:
+                out["error"] = f"{', '.join(bad)} must be a string"
+            elif not srrs:
+                out["error"] = "ncbi_accession must contain at least one non-empty SRR accession"
+            elif md is not None and not isinstance(md, dict):
+                out["error"] = "metadata must be a JSON object"
+            else:
+                out["sample_id"] = r.get("sample_id") or srrs_to_sample_id(srrs)
+                out["status"] = None
+                staged.append((
+                    len(staged), out["sample_id"], normalize_srrs(srrs),
+                    r.get("biosample_id") or None, r.get("collection") or None,
+                    json.dumps(md) if md is not None else None,
+                ))
+        if not staged:
+            return outcomes
+
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TEMP TABLE _bulk_samples (ord int, sample_id text, ncbi_accession text, "
+                "biosample_id text, collection text, metadata text) ON COMMIT DROP"
+            ))
+            driver = (await conn.get_raw_connection()).driver_connection
+            assert driver is not None  # asyncpg connection, checked out above
+            await driver.copy_records_to_table(
+                "_bulk_samples", records=staged, columns=_BULK_COLUMNS
+            )
+            result = await conn.execute(_BULK_UPSERT, {"now": datetime.now(timezone.utc)})
+            inserted: dict[str, bool] = {sid: ins for sid, ins in result.tuples()}
+
+            await set_accessions_from(conn, _BULK_ACCESSIONS)
+            by_collection: dict[str, dict[str, None]] = {}
+            for _, sample_id, _, _, collection, _ in staged:
+                if collection:
+                    by_collection.setdefault(collection, {})[sample_id] = None
+            for collection, members in by_collection.items():
+                await add_to_collection(
+                    conn, collection, source="manual", sample_ids=list(members)
+                )
+            membership.record_samples(conn, list(inserted))
+
+        for out in outcomes:
+            if out["status"] is None:
+                out["status"] = "created" if inserted[out["sample_id"]] else "updated"
+        return outcomes
+
     async def list_samples(
         self,
         limit: int = 100,
@@ -93,13 +207,20 @@ class SampleService:
         Each returned row carries a ``collections`` list (its collection_ids).
         Filtering is server-side so the catalog is usable past the old
         client-side 1000-row ceiling (#118): ``search`` is a case-insensitive
-        substring match on ``sample_id``; ``collection`` matches membership in a
+        substring match on ``sample_id`` (pg_trgm-indexed) or an exact SRR run
+        accession (via ``sample_accessions``); ``collection`` matches membership in a
         collection (via ``collection_samples``) — the single source of truth,
         not the retired ``metadata.cohort`` scalar.
         """
         conds = []
         if search:
-            conds.append(samples_tbl.c.sample_id.ilike(f"%{search}%"))
+            conds.append(or_(
+                samples_tbl.c.sample_id.ilike(f"%{search}%"),
+                samples_tbl.c.sample_id.in_(
+                    select(sample_accessions_tbl.c.sample_id)
+                    .where(sample_accessions_tbl.c.srr == srr_key(search))
+                ),
+            ))
         if collection:
             conds.append(samples_tbl.c.sample_id.in_(
                 select(collection_samples_tbl.c.sample_id)
@@ -141,7 +262,12 @@ class SampleService:
         the same source the Cohorts dashboard reads, so the two agree. Counts are
         overlap-allowed: a sample in N collections contributes to N chips, so the
         chip counts need not sum to ``total`` (many-to-many membership).
+
+        Served from the in-process membership index when it is loaded; SQL
+        otherwise.
         """
+        if await membership.index.ensure_fresh(self.engine):
+            return membership.index.total, membership.index.facets()
         async with self.engine.connect() as conn:
             total = (await conn.execute(
                 select(func.count()).select_from(samples_tbl)
@@ -156,6 +282,42 @@ class SampleService:
             )).mappings().all()
         return total, [{"collection": r["collection"], "count": r["count"]} for r in rows]
 
+    async def collection_intersection(
+        self, collection_ids: list[str], limit: int = 1000
+    ) -> tuple[int, list[str]]:
+        """Samples that belong to *every* given collection.
+
+        Returns (count, first ``limit`` sample_ids in registration order). A
+        bitset AND on the membership index when loaded; otherwise one
+        ``collection_samples`` GROUP BY ... HAVING count = n.
+        """
+        cids = sorted(set(collection_ids))
+        if not cids:
+            return 0, []
+        idx = membership.index
+        if await idx.ensure_fresh(self.engine):
+            bits = idx.intersection(cids)
+            return bits.bit_count(), idx.sample_ids(bits, limit)
+        cs = collection_samples_tbl.c
+        matching = (
+            select(cs.sample_id)
+            .where(cs.collection_id.in_(cids))
+            .group_by(cs.sample_id)
+            .having(func.count() == len(cids))
+            .subquery()
+        )
+        async with self.engine.connect() as conn:
+            count = (await conn.execute(
+                select(func.count()).select_from(matching)
+            )).scalar_one()
+            rows = await conn.execute(
+                select(samples_tbl.c.sample_id)
+                .join(matching, matching.c.sample_id == samples_tbl.c.sample_id)
+                .order_by(samples_tbl.c.id)
+                .limit(limit)
+            )
+            return count, list(rows.scalars())
+
     async def get(self, sample_id: str) -> dict | None:
         async with self.engine.connect() as conn:
             result = await conn.execute(
@@ -165,12 +327,21 @@ class SampleService:
             return dict(row) if row else None
 
     async def get_by_srr(self, srr: str) -> dict | None:
-        """Return the sample whose ncbi_accession contains the given SRR accession."""
+        """Return the sample whose ncbi_accession includes exactly this SRR run.
+
+        An indexed lookup on ``sample_accessions.srr``, normalised the same way
+        as ``list_samples``' search (`srr_key`). If the run belongs to
+        several samples (its BioSample gained runs, producing a new SRR set),
+        the newest is returned.
+        """
         async with self.engine.connect() as conn:
             result = await conn.execute(
-                select(samples_tbl).where(
-                    samples_tbl.c.ncbi_accession.contains(srr)
-                )
+                select(samples_tbl)
+                .join(sample_accessions_tbl,
+                      sample_accessions_tbl.c.sample_id == samples_tbl.c.sample_id)
+                .where(sample_accessions_tbl.c.srr == srr_key(srr))
+                .order_by(samples_tbl.c.created_at.desc())
+                .limit(1)
             )
             row = result.mappings().one_or_none()
             return dict(row) if row else None
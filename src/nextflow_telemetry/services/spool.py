@@ -0,0 +1,333 @@
+"""Durable local spool for weblog ingest.
+
+``POST /telemetry`` normally writes straight to Postgres, so a stalled
+database (autovacuum, lock contention from close_run's ``FOR UPDATE``,
+failover) stalls the request until Nextflow's weblog client times out and
+drops the event. With ``TELEMETRY_SPOOL_DIR`` set the route instead appends
+the validated event to a local append-only log, acknowledges once it is on
+disk, and a background drainer replays the log into ``TelemetryService``.
+
+Spool directory layout:
+
+- ``<seq>.log`` segments, one JSON event per line. The active segment rolls
+  over at ``TELEMETRY_SPOOL_SEGMENT_BYTES``; drained segments are deleted.
+- ``checkpoint``: ``"<seq> <offset>"``, the first byte not yet replayed,
+  replaced atomically.
+- ``lock``: flock'd by the owning process. A second worker pointed at the
+  same directory gets ``open() -> False`` and keeps ingesting directly.
+
+Appends are group-committed: appends within ``TELEMETRY_SPOOL_FSYNC_MS``
+share one fsync, and each request returns only after the fsync covering its
+line. The drainer never reads past the last fsync'd byte, so the checkpoint
+can't point beyond what survives a crash; ``open`` truncates a torn final
+line.
+
+Replay takes up to ``DRAIN_BATCH`` events at a time in log order, splits them
+into one sequential lane per run_name (the lifecycle transitions depend on
+per-run order) and runs the lanes concurrently. The checkpoint advances after
+each batch, so delivery is at-least-once: a crash mid-batch replays that
+batch. Connection-level failures are retried with backoff until the database
+is back — the hiccup the spool exists to absorb. Any other error drops the
+event with an ERROR log line, as a direct ingest would have failed it.
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+from collections.abc import Awaitable, Callable
+
+import orjson
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from ..log import logger
+from ..models import Telemetry
+
+# Events read and replayed per checkpoint.
+DRAIN_BATCH = 500
+# run_name lanes replayed at once (each holds a pooled connection while it works).
+DRAIN_LANES = 4
+_MAX_BACKOFF_SECONDS = 30.0
+
+Ingest = Callable[[Telemetry], Awaitable[None]]
+
+
+def _transient(exc: BaseException) -> bool:
+    """True for failures that mean "the database is unavailable right now"."""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, (OperationalError, InterfaceError, PoolTimeout, OSError, TimeoutError))
+
+
+def _truncate_torn_tail(path: str) -> int:
+    """Cut the file back to its last complete line; returns the new size."""
+    with open(path, "r+b") as f:
+        size = pos = f.seek(0, os.SEEK_END)
+        end = 0
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            i = f.read(step).rfind(b"\n")
+            if i >= 0:
+                end = pos - step + i + 1
+                break
+            pos -= step
+        if end != size:
+            f.truncate(end)
+            logger.warning("spool.torn_tail_truncated", extra={"path": path, "bytes": size - end})
+    return end
+
+
+def _sync(closing: list[int], active: int) -> None:
+    for fd in closing:
+        os.fsync(fd)
+        os.close(fd)
+    os.fsync(active)
+
+
+class WeblogSpool:
+    def __init__(self, directory: str, segment_bytes: int, fsync_seconds: float) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_seconds = fsync_seconds
+        self._lock_fd: int | None = None
+        self._fd: int | None = None          # active segment, O_APPEND
+        self._seq = 0                        # active segment number
+        self._size = 0                       # bytes written to the active segment
+        self._rotated: list[int] = []        # rolled-over fds awaiting fsync + close
+        self._durable = (0, 0)               # (seq, offset) covered by the last fsync
+        self._drained = (0, 0)               # the checkpoint
+        self._waiters: list[asyncio.Future[None]] = []
+        self._flusher: asyncio.Task | None = None
+        self._drainer: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def active(self) -> bool:
+        return self._fd is not None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment(self, seq: int) -> str:
+        return self._path(f"{seq:012d}.log")
+
+    def _segments(self) -> list[int]:
+        return sorted(
+            int(name[:-4]) for name in os.listdir(self.directory)
+            if name.endswith(".log") and name[:-4].isdigit()
+        )
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def open(self) -> bool:
+        """Lock the directory and recover it. False if another process owns it."""
+        os.makedirs(self.directory, exist_ok=True)
+        lock_fd = os.open(self._path("lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            logger.warning("spool.locked", extra={"directory": self.directory})
+            return False
+        self._lock_fd = lock_fd
+
+        cp_seq, cp_offset = self._read_checkpoint()
+        segments = self._segments()
+        if segments:
+            self._seq = segments[-1]
+            self._size = _truncate_torn_tail(self._segment(self._seq))
+        else:
+            self._seq, self._size = cp_seq + 1, 0
+        if (cp_seq, cp_offset) > (self._seq, self._size):
+            cp_seq, cp_offset = self._seq, self._size
+        self._drained = (cp_seq, cp_offset)
+        self._write_checkpoint(cp_seq, cp_offset)
+
+        self._fd = os.open(self._segment(self._seq), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.fsync(self._fd)
+        self._durable = (self._seq, self._size)
+        return True
+
+    def start_drainer(self, ingest: Ingest) -> None:
+        self._drainer = asyncio.create_task(self._drain(ingest))
+
+    async def close(self) -> None:
+        """Stop draining and release the directory; undrained events stay spooled."""
+        if self._drainer is not None:
+            self._drainer.cancel()
+            try:
+                await self._drainer
+            except asyncio.CancelledError:
+                pass
+            self._drainer = None
+        if self._flusher is not None:
+            await self._flusher
+        if self._fd is not None:
+            _sync(self._rotated, self._fd)
+            os.close(self._fd)
+            self._fd, self._rotated = None, []
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the flock
+            self._lock_fd = None
+
+    # -- append -------------------------------------------------------------
+
+    async def append(self, event: Telemetry) -> None:
+        """Spool ``event``; returns once it is fsync'd."""
+        assert self._fd is not None, "spool not open"
+        line = orjson.dumps(event.model_dump(mode="json", by_alias=True)) + b"\n"
+        if self._size and self._size + len(line) > self.segment_bytes:
+            self._rotated.append(self._fd)
+            self._seq += 1
+            self._size = 0
+            self._fd = os.open(self._segment(self._seq), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        view = memoryview(line)
+        while view:
+            view = view[os.write(self._fd, view):]
+        self._size += len(line)
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        await waiter
+
+    async def _flush(self) -> None:
+        try:
+            await asyncio.sleep(self.fsync_seconds)
+            while self._waiters:
+                waiters, self._waiters = self._waiters, []
+                rotated, self._rotated = self._rotated, []
+                position = (self._seq, self._size)
+                fd = self._fd
+                assert fd is not None, "spool closed under the flusher"  # close() awaits us first
+                try:
+                    await asyncio.to_thread(_sync, rotated, fd)
+                except OSError as exc:
+                    logger.error("spool.fsync_failed", exc_info=True)
+                    for w in waiters:
+                        if not w.done():
+                            w.set_exception(exc)
+                    continue
+                self._durable = position
+                self._wakeup.set()
+                for w in waiters:
+                    if not w.done():
+                        w.set_result(None)
+        finally:
+            self._flusher = None
+
+    # -- drain --------------------------------------------------------------
+
+    def _read_checkpoint(self) -> tuple[int, int]:
+        try:
+            with open(self._path("checkpoint")) as f:
+                seq, offset = f.read().split()
+            return int(seq), int(offset)
+        except FileNotFoundError:
+            return 0, 0
+
+    def _write_checkpoint(self, seq: int, offset: int) -> None:
+        tmp = self._path("checkpoint.tmp")
+        with open(tmp, "w") as f:
+            f.write(f"{seq} {offset}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path("checkpoint"))
+        self._drained = (seq, offset)
+
+    def _read(self, seq: int, offset: int, limit: int | None) -> tuple[list[bytes], int]:
+        """Up to DRAIN_BATCH complete lines from ``offset``, stopping at ``limit``."""
+        lines: list[bytes] = []
+        try:
+            f = open(self._segment(seq), "rb")
+        except FileNotFoundError:
+            return lines, offset
+        with f:
+            f.seek(offset)
+            while len(lines) < DRAIN_BATCH and (limit is None or offset < limit):
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                lines.append(line)
+                offset += len(line)
+        return lines, offset
+
+    async def _drain(self, ingest: Ingest) -> None:
+        seq, offset = self._drained
+        while True:
+            durable = self._durable
+            limit = durable[1] if seq == durable[0] else None
+            lines, end = await asyncio.to_thread(self._read, seq, offset, limit)
+            if lines:
+                await self._replay(lines, ingest)
+                offset = end
+                self._write_checkpoint(seq, offset)
+                continue
+            if seq < durable[0]:
+                # Closed segment fully replayed: move past it and drop it.
+                self._write_checkpoint(seq + 1, 0)
+                try:
+                    os.unlink(self._segment(seq))
+                except FileNotFoundError:
+                    pass
+                seq, offset = seq + 1, 0
+                continue
+            self._wakeup.clear()
+            if self._durable == durable:
+                await self._wakeup.wait()
+
+    async def _replay(self, lines: list[bytes], ingest: Ingest) -> None:
+        lanes: dict[str, list[Telemetry]] = {}
+        for line in lines:
+            try:
+                event = Telemetry.model_validate(orjson.loads(line))
+            except ValueError:
+                logger.error("spool.record_invalid", extra={"record": line[:200].decode(errors="replace")})
+                continue
+            lanes.setdefault(event.run_name, []).append(event)
+        slots = asyncio.Semaphore(DRAIN_LANES)
+
+        async def lane(events: list[Telemetry]) -> None:
+            async with slots:
+                for event in events:
+                    await self._replay_one(event, ingest)
+
+        await asyncio.gather(*(lane(events) for events in lanes.values()))
+
+    async def _replay_one(self, event: Telemetry, ingest: Ingest) -> None:
+        delay = 0.5
+        while True:
+            try:
+                await ingest(event)
+                return
+            except Exception as exc:
+                if not _transient(exc):
+                    logger.error(
+                        "spool.event_dropped",
+                        extra={"run_name": event.run_name, "event": event.event},
+                        exc_info=True,
+                    )
+                    return
+                logger.warning(
+                    "spool.ingest_retry",
+                    extra={"run_name": event.run_name, "retry_in": delay, "error": str(exc)},
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_BACKOFF_SECONDS)
+
+    # -- introspection ------------------------------------------------------
+
+    def backlog_bytes(self) -> int:
+        """Spooled bytes not yet replayed (durable or not)."""
+        seq, offset = self._drained
+        total = -offset
+        for s in self._segments():
+            if s >= seq:
+                try:
+                    total += os.path.getsize(self._segment(s))
+                except FileNotFoundError:
+                    pass
+        return max(total, 0)
@@ -8,17 +8,23 @@ the sample list the core registers.
 """
 from __future__ import annotations
 
+import asyncio
 import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import AsyncExitStack, aclosing, asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 
-from ..db import samples_tbl, submissions_tbl
+from ..db import submissions_tbl
 from ..utils import normalize_srrs, srrs_to_sample_id
+from . import ena_cache
+from .accessions import set_accessions_from
 from .collection import add_to_collection
 
 ENA_FILEREPORT = "https://www.ebi.ac.uk/ena/portal/api/filereport"
@@ -37,34 +43,49 @@ class AccessionError(ValueError):
     """Raised for an accession the endpoint won't accept (bad type / no runs)."""
 
 
-def _library_composition(rows: list[dict[str, Any]]) -> dict[str, Any]:
-    """Aggregate per-run library metadata so an approver can eyeball study type
-    (shotgun WGS vs 16S/amplicon). Advisory only — never blocks a submission."""
-    def tally(field: str) -> dict[str, int]:
-        c: dict[str, int] = {}
-        for r in rows:
-            v = (r.get(field) or "").strip() or "unknown"
-            c[v] = c.get(v, 0) + 1
-        return dict(sorted(c.items(), key=lambda kv: -kv[1]))
-
-    strat, sel = tally("library_strategy"), tally("library_selection")
+_LIBRARY_FIELDS = ("library_strategy", "library_selection", "library_source", "instrument_platform")
+
+
+def _tally(tallies: dict[str, dict[str, int]], row: dict[str, Any]) -> None:
+    """Count one run's library metadata into ``tallies`` (field → value → n)."""
+    for field in _LIBRARY_FIELDS:
+        v = (row.get(field) or "").strip() or "unknown"
+        c = tallies.setdefault(field, {})
+        c[v] = c.get(v, 0) + 1
+
+
+def _composition(tallies: dict[str, dict[str, int]], n_runs: int) -> dict[str, Any]:
+    """Library-composition summary (plus amplicon warning) from run tallies."""
+    def ranked(field: str) -> dict[str, int]:
+        return dict(sorted(tallies.get(field, {}).items(), key=lambda kv: -kv[1]))
+
+    strat, sel = ranked("library_strategy"), ranked("library_selection")
     n_amplicon = sum(n for k, n in strat.items() if k.upper() in _AMPLICON_STRATEGY)
     n_pcr = sum(n for k, n in sel.items() if k.upper() in _AMPLICON_SELECTION)
     warnings = []
     if n_amplicon or n_pcr:
         warnings.append(
-            f"{max(n_amplicon, n_pcr)} of {len(rows)} run(s) look like amplicon/16S "
+            f"{max(n_amplicon, n_pcr)} of {n_runs} run(s) look like amplicon/16S "
             "(library_strategy=AMPLICON or library_selection=PCR), not shotgun metagenomics"
         )
     return {
         "library_strategy": strat,
         "library_selection": sel,
-        "library_source": tally("library_source"),
-        "instrument_platform": tally("instrument_platform"),
+        "library_source": ranked("library_source"),
+        "instrument_platform": ranked("instrument_platform"),
         "warnings": warnings,
     }
 
 
+def _library_composition(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    """Aggregate per-run library metadata so an approver can eyeball study type
+    (shotgun WGS vs 16S/amplicon). Advisory only — never blocks a submission."""
+    tallies: dict[str, dict[str, int]] = {}
+    for r in rows:
+        _tally(tallies, r)
+    return _composition(tallies, len(rows))
+
+
 def classify_source(accession: str) -> str:
     """Return the ``collections.source`` for a study/BioProject accession.
 
@@ -82,18 +103,58 @@ def classify_source(accession: str) -> str:
     )
 
 
-async def _fetch_runs(accession: str) -> list[dict[str, Any]]:
-    params = {"accession": accession, "result": "read_run", "fields": ENA_FIELDS, "format": "json"}
+async def _fetch_lines(accession: str, meta: dict[str, Any]) -> AsyncGenerator[str, None]:
+    """Stream the ENA filereport for an accession as TSV lines (header first).
+
+    Sends any stored ``etag`` / ``last_modified`` in ``meta`` as conditional
+    request headers; records the response status and validators back into it
+    (see ena_cache.Fetch).
+    """
+    params = {"accession": accession, "result": "read_run", "fields": ENA_FIELDS, "format": "tsv"}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
     async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.get(ENA_FILEREPORT, params=params)
-    if resp.status_code == 204 or not resp.content:
-        return []
-    resp.raise_for_status()
-    return resp.json()
+        async with client.stream("GET", ENA_FILEREPORT, params=params, headers=headers) as resp:
+            meta["status"] = resp.status_code
+            if resp.status_code in (204, 304):
+                return
+            resp.raise_for_status()
+            meta["etag"] = resp.headers.get("etag")
+            meta["last_modified"] = resp.headers.get("last-modified")
+            async for line in resp.aiter_lines():
+                yield line.rstrip("\r\n")
+
+
+async def _stream_runs(
+    accession: str, conn: AsyncConnection
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Yield ENA run rows for an accession as they arrive.
+
+    The report is TSV parsed line by line, so a 100k-run BioProject is never
+    held in memory as one JSON document; it comes from the ``ena_reports``
+    cache when recent enough (see services/ena_cache.py), read and written on
+    ``conn``.
+    """
+    header: list[str] | None = None
+    async with aclosing(ena_cache.report_lines(conn, accession, ENA_FIELDS, _fetch_lines)) as lines:
+        async for line in lines:
+            if not line.strip():
+                continue
+            cells = line.split("\t")
+            if header is None:
+                header = cells
+                continue
+            yield dict(zip(header, cells))
 
 
 def _group_samples(rows: list[dict[str, Any]], collection_id: str) -> list[dict[str, Any]]:
-    """Group ENA run rows into samples keyed by SRA sample (secondary_sample_accession)."""
+    """Group ENA run rows into samples keyed by SRA sample (secondary_sample_accession).
+
+    In-memory reference for the staged grouping in ``_GROUP_STAGED``.
+    """
     groups: dict[str, dict[str, Any]] = {}
     for r in rows:
         srr = (r.get("run_accession") or "").strip()
@@ -121,6 +182,61 @@ def _group_samples(rows: list[dict[str, Any]], collection_id: str) -> list[dict[
     return samples
 
 
+# Held while a submission checks out its two connections (see _connections).
+_PAIR_CHECKOUT = asyncio.Lock()
+
+# Runs per COPY into the staging table (and per progress update).
+RUN_CHUNK = 5000
+# Samples per add_to_collection call — bounds its bind parameters.
+MEMBERSHIP_CHUNK = 5000
+
+# Transaction-scoped staging: runs are streamed in, grouped into samples in
+# SQL, and everything is registered in the same transaction, so a submission
+# is still all-or-nothing (and a dry run just rolls it back).
+_STAGE_RUNS = (
+    "CREATE TEMP TABLE _submission_runs (ord int, run_accession text COLLATE \"C\", "
+    "sra_sample text, biosample text, sra_study text, bioproject text) ON COMMIT DROP"
+)
+_STAGE_COLUMNS = ["ord", "run_accession", "sra_sample", "biosample", "sra_study", "bioproject"]
+
+# Same result as _group_samples: one sample per SRA sample, ncbi_accession the
+# sorted distinct SRRs (byte order, via COLLATE "C" — what Python's sorted()
+# does for ASCII accessions) and sample_id = md5 of it (srrs_to_sample_id).
+# Annotation comes from the SRA sample's first run in the report.
+_GROUP_STAGED = """
+    CREATE TEMP TABLE _submission_samples ON COMMIT DROP AS
+    SELECT DISTINCT ON (md5(g.ncbi_accession))
+           md5(g.ncbi_accession) AS sample_id, g.*, false AS added
+    FROM (
+        SELECT string_agg(DISTINCT run_accession, ';' ORDER BY run_accession) AS ncbi_accession,
+               sra_sample,
+               (array_agg(biosample ORDER BY ord))[1]  AS biosample,
+               (array_agg(sra_study ORDER BY ord))[1]  AS sra_study,
+               (array_agg(bioproject ORDER BY ord))[1] AS bioproject,
+               min(ord) AS first_ord
+        FROM _submission_runs
+        GROUP BY sra_sample
+    ) g
+    ORDER BY md5(g.ncbi_accession), g.first_ord
+"""
+
+_INSERT_NEW_SAMPLES = """
+    WITH ins AS (
+        INSERT INTO samples (sample_id, ncbi_accession, biosample_id, metadata_, created_at, updated_at)
+        SELECT sample_id, ncbi_accession, biosample,
+               jsonb_build_object('sra_sample', sra_sample, 'biosample', biosample,
+                                  'sra_study', sra_study, 'bioproject', bioproject,
+                                  'collection', CAST(:collection_id AS text)),
+               :now, :now
+        FROM _submission_samples
+        ORDER BY first_ord
+        ON CONFLICT (sample_id) DO NOTHING
+        RETURNING sample_id
+    )
+    UPDATE _submission_samples s SET added = true FROM ins WHERE s.sample_id = ins.sample_id
+"""
+
+
 @dataclass
 class SubmissionService:
     engine: AsyncEngine
@@ -132,37 +248,55 @@ class SubmissionService:
 
         Existing samples keep their metadata (only a membership row is added), so a
         sample shared across studies isn't clobbered. Both success and failure write
-        a submissions row. When ``dry_run`` is set, nothing is written (no samples,
-        no collection, no submission row) — just the preview counts are returned with
-        status "dry_run" and an empty submission_id. Returns the submission receipt.
+        a submissions row; while the ENA report streams in and samples are written
+        the row reads ``status="running"`` with a ``metadata_.progress`` counter.
+        When ``dry_run`` is set, nothing is written (no samples, no collection, no
+        submission row) — just the preview counts are returned with status
+        "dry_run" and an empty submission_id. Returns the submission receipt.
         """
         accession = accession.strip()
         submission_id = "" if dry_run else uuid.uuid4().hex
         collection_id = accession.upper()
+        source: str | None = None
         try:
             source = classify_source(accession)
-            rows = await _fetch_runs(accession)
-            samples = _group_samples(rows, collection_id)
-            if not samples:
-                raise AccessionError(f"no runs found for '{accession}'")
-            composition = _library_composition(rows)
-            warnings = composition.pop("warnings")
-            if dry_run:
-                counts = await self._count_new(samples)
-                status = "dry_run"
-            else:
-                counts = await self._register(
-                    submission_id=submission_id,
-                    method="ena_accession",
-                    accession=accession,
-                    collection_id=collection_id,
-                    source=source,
-                    type_="project",
-                    submitted_by=submitted_by,
-                    samples=samples,
-                )
-                status = "succeeded"
-        except (AccessionError, httpx.HTTPError) as e:
+            if not dry_run:
+                await self._open(submission_id, "ena_accession", accession, collection_id,
+                                 source, "project", submitted_by)
+            # ``conn`` carries the submission's transaction, ``side`` commits
+            # progress and the ENA cache as they happen.
+            async with self._connections() as (side, conn):
+                txn = await conn.begin()
+                try:
+                    tallies, n_runs = await self._stage_runs(conn, side, accession, submission_id)
+                    found = await self._group_staged(conn)
+                    if not found:
+                        raise AccessionError(f"no runs found for '{accession}'")
+                    composition = _composition(tallies, n_runs)
+                    warnings = composition.pop("warnings")
+                    if dry_run:
+                        counts = await self._count_new(conn, found)
+                        status = "dry_run"
+                        await txn.rollback()
+                    else:
+                        counts = await self._register(
+                            conn,
+                            side,
+                            submission_id=submission_id,
+                            accession=accession,
+                            collection_id=collection_id,
+                            source=source,
+                            type_="project",
+                            found=found,
+                        )
+                        status = "succeeded"
+                        await txn.commit()
+                finally:
+                    if txn.is_active:
+                        await txn.rollback()
+        except Exception as e:
+            # Any failure — not just bad accessions / ENA errors — must close
+            # out the "running" row opened above.
             if not dry_run:
                 await self._record_failure(
                     submission_id, "ena_accession", accession, collection_id, submitted_by, str(e)
@@ -179,83 +313,176 @@ class SubmissionService:
             **counts,
         }
 
-    async def _count_new(self, samples: list[dict[str, Any]]) -> dict[str, int]:
+    @asynccontextmanager
+    async def _connections(self) -> AsyncIterator[tuple[AsyncConnection, AsyncConnection]]:
+        """Two connections, checked out together up front; nothing takes a third.
+
+        The pair is taken under a process-wide lock, so two submissions can't
+        each hold one connection of a small pool while waiting for a second.
+        """
+        async with AsyncExitStack() as stack:
+            async with _PAIR_CHECKOUT:
+                side = await stack.enter_async_context(self.engine.connect())
+                conn = await stack.enter_async_context(self.engine.connect())
+            yield side, conn
+
+    async def _open(
+        self, submission_id: str, method: str, accession: str | None,
+        collection_id: str, source: str, type_: str | None, submitted_by: str,
+    ) -> None:
+        """Write the submission row up front (own transaction) so progress is visible."""
+        async with self.engine.begin() as conn:
+            await conn.execute(submissions_tbl.insert().values(
+                submission_id=submission_id, method=method, accession=accession,
+                collection_id=collection_id, source=source, type=type_,
+                submitted_by=submitted_by, status="running", error=None,
+                samples_found=None, samples_added=None, samples_existing=None,
+                metadata_={"progress": {"phase": "fetching", "runs_fetched": 0}},
+                created_at=datetime.now(timezone.utc),
+            ))
+
+    @staticmethod
+    async def _progress(side: AsyncConnection, submission_id: str, **progress: Any) -> None:
+        """Publish progress on the submission row, committed on ``side`` (outside
+        the main transaction)."""
+        if not submission_id:  # dry run
+            return
+        await side.execute(
+            update(submissions_tbl)
+            .where(submissions_tbl.c.submission_id == submission_id)
+            .values(metadata_={"progress": progress})
+        )
+        await side.commit()
+
+    async def _stage_runs(
+        self, conn: AsyncConnection, side: AsyncConnection, accession: str, submission_id: str
+    ) -> tuple[dict[str, dict[str, int]], int]:
+        """Stream the ENA report into ``_submission_runs`` in RUN_CHUNK COPYs.
+
+        Returns (library tallies, runs in the report).
+        """
+        await conn.execute(text(_STAGE_RUNS))
+        driver = (await conn.get_raw_connection()).driver_connection
+        assert driver is not None  # asyncpg connection, checked out above
+        tallies: dict[str, dict[str, int]] = {}
+        n_runs = 0
+        chunk: list[tuple] = []
+
+        async def flush() -> None:
+            await driver.copy_records_to_table("_submission_runs", records=chunk, columns=_STAGE_COLUMNS)
+            chunk.clear()
+            await self._progress(side, submission_id, phase="fetching", runs_fetched=n_runs)
+
+        # aclosing: if a COPY or progress write raises, the stream (and the
+        # cache writes it does on ``side``) is closed now, while ``side`` is
+        # still ours, not whenever it's garbage-collected.
+        async with aclosing(_stream_runs(accession, side)) as runs:
+            async for r in runs:
+                n_runs += 1
+                _tally(tallies, r)
+                srr = (r.get("run_accession") or "").strip()
+                srs = (r.get("secondary_sample_accession") or "").strip()
+                if not srr or not srs:
+                    continue
+                chunk.append((
+                    n_runs, srr, srs,
+                    (r.get("sample_accession") or "").strip() or None,
+                    (r.get("secondary_study_accession") or "").strip() or None,
+                    (r.get("study_accession") or "").strip() or None,
+                ))
+                if len(chunk) >= RUN_CHUNK:
+                    await flush()
+        if chunk:
+            await flush()
+        return tallies, n_runs
+
+    @staticmethod
+    async def _group_staged(conn: AsyncConnection) -> int:
+        """Group staged runs into ``_submission_samples``; returns the sample count."""
+        await conn.execute(text(_GROUP_STAGED))
+        return (await conn.execute(text("SELECT count(*) FROM _submission_samples"))).scalar_one()
+
+    @staticmethod
+    async def _count_new(conn: AsyncConnection, found: int) -> dict[str, int]:
         """Preview counts for a dry run — read-only, no writes."""
-        by_id = {s["sample_id"]: s for s in samples}
-        async with self.engine.connect() as conn:
-            existing = {
-                r[0] for r in (await conn.execute(
-                    select(samples_tbl.c.sample_id).where(samples_tbl.c.sample_id.in_(list(by_id)))
-                )).all()
-            }
+        existing: int = (await conn.execute(text(
+            "SELECT count(*) FROM _submission_samples s JOIN samples USING (sample_id)"
+        ))).scalar_one()
         return {
-            "samples_found": len(by_id),
-            "samples_added": len(by_id) - len(existing),
-            "samples_existing": len(existing),
+            "samples_found": found,
+            "samples_added": found - existing,
+            "samples_existing": existing,
         }
 
     async def _register(
-        self, *, submission_id: str, method: str, accession: str | None,
-        collection_id: str, source: str, type_: str | None,
-        submitted_by: str, samples: list[dict[str, Any]],
+        self, conn: AsyncConnection, side: AsyncConnection, *, submission_id: str, accession: str | None,
+        collection_id: str, source: str, type_: str | None, found: int,
     ) -> dict[str, int]:
-        """Shared core: upsert new samples, the collection, membership, and the submission row."""
-        by_id = {s["sample_id"]: s for s in samples}
+        """Shared core: register the staged samples, the collection, membership,
+        and close the submission row — all in the caller's transaction."""
         now = datetime.now(timezone.utc)
+        added = (await conn.execute(
+            text(_INSERT_NEW_SAMPLES), {"collection_id": collection_id, "now": now}
+        )).rowcount
+        await set_accessions_from(
+            conn, "SELECT sample_id, ncbi_accession FROM _submission_samples WHERE added"
+        )
 
-        async with self.engine.begin() as conn:
-            existing = {
-                r[0] for r in (await conn.execute(
-                    select(samples_tbl.c.sample_id).where(samples_tbl.c.sample_id.in_(list(by_id)))
-                )).all()
-            }
-            new_ids = [sid for sid in by_id if sid not in existing]
-
-            if new_ids:
-                await conn.execute(
-                    samples_tbl.insert(),
-                    [{
-                        "sample_id": sid,
-                        "ncbi_accession": by_id[sid]["ncbi_accession"],
-                        "biosample_id": by_id[sid]["biosample_id"],
-                        "metadata_": by_id[sid]["metadata"],
-                        "created_at": now,
-                        "updated_at": now,
-                    } for sid in new_ids],
-                )
-
+        # Membership through the single seam, in bounded keyset pages.
+        after = ""
+        written = 0
+        while True:
+            page: list[str] = list((await conn.execute(
+                text("SELECT sample_id FROM _submission_samples WHERE sample_id > :after "
+                     "ORDER BY sample_id LIMIT :n"),
+                {"after": after, "n": MEMBERSHIP_CHUNK},
+            )).scalars())
+            if not page:
+                break
             await add_to_collection(
                 conn, collection_id, source=source, type_=type_, label=collection_id,
-                sample_ids=list(by_id),
+                sample_ids=page,
                 metadata={"origin": "submission", "accession": accession},
             )
+            written += len(page)
+            after = page[-1]
+            await self._progress(side, submission_id, phase="registering",
+                                 samples_found=found, members_written=written)
 
-            counts = {
-                "samples_found": len(by_id),
-                "samples_added": len(new_ids),
-                "samples_existing": len(existing),
-            }
-            await conn.execute(submissions_tbl.insert().values(
-                submission_id=submission_id, method=method, accession=accession,
-                collection_id=collection_id, source=source, type=type_,
-                submitted_by=submitted_by, status="succeeded", error=None,
-                metadata_=None, created_at=now, **counts,
-            ))
+        counts = {
+            "samples_found": found,
+            "samples_added": added,
+            "samples_existing": found - added,
+        }
+        await conn.execute(
+            update(submissions_tbl)
+            .where(submissions_tbl.c.submission_id == submission_id)
+            .values(status="succeeded", error=None, metadata_=None, **counts)
+        )
         return counts
 
     async def _record_failure(
         self, submission_id: str, method: str, accession: str | None,
         collection_id: str | None, submitted_by: str, error: str,
     ) -> None:
-        """Record a failed attempt in its own transaction (the main one rolled back)."""
+        """Record a failed attempt in its own transaction (the main one rolled back).
+
+        Closes out the row ``_open`` wrote, or inserts one if the attempt failed
+        before that (e.g. a rejected accession).
+        """
         now = datetime.now(timezone.utc)
+        stmt = pg_insert(submissions_tbl).values(
+            submission_id=submission_id, method=method, accession=accession,
+            collection_id=collection_id, source=None, type=None,
+            submitted_by=submitted_by, status="failed", error=error,
+            samples_found=None, samples_added=None, samples_existing=None,
+            metadata_=None, created_at=now,
+        )
         async with self.engine.begin() as conn:
-            await conn.execute(submissions_tbl.insert().values(
-                submission_id=submission_id, method=method, accession=accession,
-                collection_id=collection_id, source=None, type=None,
-                submitted_by=submitted_by, status="failed", error=error,
-                samples_found=None, samples_added=None, samples_existing=None,
-                metadata_=None, created_at=now,
+            await conn.execute(stmt.on_conflict_do_update(
+                index_elements=["submission_id"],
+                set_={"status": "failed", "error": error, "samples_found": None,
+                      "samples_added": None, "samples_existing": None},
             ))
 
     async def get(self, submission_id: str) -> dict | None:
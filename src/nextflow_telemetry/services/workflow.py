@@ -10,6 +10,7 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from . import cohort_progress
 from ..db import jobs_tbl, workflows_tbl
 
 VALID_STATUSES = {"active", "paused", "retired"}
@@ -112,7 +113,13 @@ class WorkflowService:
                 .returning(*workflows_tbl.c)
             )
             result = await conn.execute(stmt)
-            return dict(result.mappings().one())
+            row = dict(result.mappings().one())
+            # The active version set changed, so this workflow's samples'
+            # progress flags can; recounted in the background, not in this
+            # transaction.
+            await cohort_progress.queue_resync(conn, workflow_id)
+        cohort_progress.resync.schedule(self.engine)
+        return row
 
     async def update_status(self, workflow_pk: int, status: str) -> dict | None:
         """Transition workflow lifecycle: active → paused → retired.
@@ -161,8 +168,11 @@ class WorkflowService:
                         workflow_pk, purged,
                     )
             out = dict(row)
-            out["purged_pending_jobs"] = purged
-            return out
+            # Any status change moves the active set cohort progress is measured against.
+            await cohort_progress.queue_resync(conn, out["workflow_id"])
+        cohort_progress.resync.schedule(self.engine)
+        out["purged_pending_jobs"] = purged
+        return out
 
     async def update_revision(self, workflow_pk: int, revision: str) -> dict | None:
         """Update the git revision for a workflow without forcing reruns."""
@@ -0,0 +1,246 @@
+"""Slow-query capture with EXPLAIN plans (``GET /api/admin/slow-queries``).
+
+Every statement run through a tracked engine is timed. One that takes at
+least ``SLOW_QUERY_MS`` is recorded in a ring buffer of the last
+``SLOW_QUERY_BUFFER_SIZE`` slow statements. The buffer keeps the statement's
+fingerprint, its normalized text and the *shape* of its parameters (types
+and list lengths, never values).
+
+The first slow occurrence of a fingerprint also gets a plan. ``EXPLAIN
+(ANALYZE off, FORMAT JSON)`` of the same statement and parameters runs in a background
+task, so the request that hit the slow query doesn't wait for it. It runs on
+``explain_engine`` (main sets the analytics pool), not the engine the
+statement was slow on, so a slow ingest or dispatch statement doesn't take a
+second connection from that small pool while it's under pressure. Statements
+that reference a temp table (seen created through a tracked engine) aren't
+planned: the table doesn't exist on the EXPLAIN's connection. The plan is refreshed at most once per ``EXPLAIN_EVERY_SECONDS``
+per fingerprint, one EXPLAIN at a time; slow statements arriving while one
+is in flight just go without. ``ANALYZE`` stays off: the plan is the
+planner's estimate and the statement isn't executed again.
+
+``snapshot()`` aggregates the buffer by fingerprint: count, p50 / p95 / max
+duration, last seen and the latest plan, slowest first. In-process only;
+one API worker's view.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import hashlib
+import math
+import re
+import time
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .log import logger
+
+# Re-EXPLAIN a fingerprint at most this often (plans drift with the data).
+EXPLAIN_EVERY_SECONDS = 300.0
+# Server-side cap on one EXPLAIN (planning a pathological query can be slow).
+EXPLAIN_TIMEOUT_MS = 5000
+
+# Only these are worth planning; EXPLAIN of anything else is an error.
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+# Key on the connection's ``info`` dict: perf_counter() at cursor execute.
+_STARTED = "slowlog.started"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\$\d+|\?)(?:\s*,\s*(?:\$\d+|\?))+\s*\)")
+_PARAM = re.compile(r"\$\d+")
+_TEMP_TABLE = re.compile(
+    r"CREATE\s+TEMP(?:ORARY)?\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(statement: str) -> str:
+    """``statement`` with literals and parameters as ``?`` and whitespace collapsed.
+
+    Expanded ``IN`` lists collapse to ``(...)``, so the same query with a
+    different number of ids has one fingerprint.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def params_shape(parameters: Any) -> list[str]:
+    """Parameter types (``list[12]`` for arrays), without the values."""
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    if not isinstance(parameters, Sequence) or isinstance(parameters, (str, bytes)):
+        return []
+    return [
+        f"{type(p).__name__}[{len(p)}]" if isinstance(p, (list, tuple)) else type(p).__name__
+        for p in parameters
+    ]
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    sql: str
+    params: list[str]
+    duration_ms: float
+    at: datetime
+
+
+@dataclass
+class _Plan:
+    plan: Any = None
+    explained_at: float = field(default=-math.inf)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, size: int) -> None:
+        self.threshold = threshold_ms / 1000
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self.plans: dict[str, _Plan] = {}
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+        # Where EXPLAINs run; None = the engine the statement was slow on.
+        self.explain_engine: AsyncEngine | None = None
+        # Temp tables created through tracked engines (session-local, so a
+        # statement using one can't be planned on another connection).
+        self.temp_tables: set[str] = set()
+
+    def record(self, statement: str, parameters: Any, elapsed: float) -> SlowQuery:
+        sql = normalize(statement)
+        entry = SlowQuery(
+            fingerprint=fingerprint(sql),
+            sql=sql,
+            params=params_shape(parameters),
+            duration_ms=round(elapsed * 1000, 1),
+            at=datetime.now(timezone.utc),
+        )
+        self.entries.append(entry)
+        return entry
+
+    def wants_plan(self, fp: str, statement: str) -> bool:
+        if self._explaining or not statement.lstrip()[:6].lower().startswith(_EXPLAINABLE):
+            return False
+        if any(name in statement for name in self.temp_tables):
+            return False
+        plan = self.plans.get(fp)
+        return plan is None or time.monotonic() - plan.explained_at >= EXPLAIN_EVERY_SECONDS
+
+    async def explain(self, engine: AsyncEngine, fp: str, statement: str, parameters: Any) -> None:
+        """Store the plan for ``fp``. The caller sets ``_explaining`` first."""
+        plan = self.plans.setdefault(fp, _Plan())
+        plan.explained_at = time.monotonic()
+        try:
+            # Closing the connection rolls back the SET LOCAL with the rest.
+            async with engine.connect() as conn:
+                await conn.execute(text(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}"))
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE off, FORMAT JSON) " + statement, parameters
+                )
+                plan.plan = result.scalar()
+        except Exception:
+            logger.warning("slowlog.explain_failed", extra={"fingerprint": fp}, exc_info=True)
+        finally:
+            self._explaining = False
+
+    def _start_explain(self, engine: AsyncEngine, fp: str, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # sync engine, no loop to plan on
+            return
+        self._explaining = True
+        # A fresh context, so the EXPLAIN isn't counted in the request's
+        # querystats.
+        task = loop.create_task(
+            self.explain(engine, fp, statement, parameters), context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def snapshot(self, include_plans: bool = True) -> dict[str, Any]:
+        """Slow statements in the buffer, aggregated by fingerprint."""
+        groups: dict[str, list[SlowQuery]] = {}
+        for e in self.entries:
+            groups.setdefault(e.fingerprint, []).append(e)
+        rows = []
+        for fp, entries in groups.items():
+            durations = sorted(e.duration_ms for e in entries)
+            last = entries[-1]
+            row: dict[str, Any] = {
+                "fingerprint": fp,
+                "sql": last.sql,
+                "params": last.params,
+                "count": len(entries),
+                "p50_ms": _percentile(durations, 0.50),
+                "p95_ms": _percentile(durations, 0.95),
+                "max_ms": durations[-1],
+                "last_seen": last.at,
+            }
+            if include_plans:
+                plan = self.plans.get(fp)
+                row["plan"] = plan.plan if plan is not None else None
+            rows.append(row)
+        rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "buffered": len(self.entries),
+            "capacity": self.entries.maxlen,
+            "queries": rows,
+        }
+
+    # -- engine hooks -------------------------------------------------------
+
+    def track(self, engine: AsyncEngine) -> None:
+        """Record statements through ``engine`` that take at least the threshold."""
+        if self.threshold <= 0:
+            return
+        sync = engine.sync_engine
+
+        def before_cursor_execute(conn: Any, *args: Any) -> None:
+            conn.info[_STARTED] = time.perf_counter()
+
+        def after_cursor_execute(
+            conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+        ) -> None:
+            if m := _TEMP_TABLE.match(statement.lstrip()):
+                self.temp_tables.add(m.group(1))
+            started = conn.info.pop(_STARTED, None)
+            if started is None:
+                return
+            elapsed = time.perf_counter() - started
+            if elapsed < self.threshold or statement.startswith("EXPLAIN "):
+                return
+            if executemany:
+                self.record(statement, parameters[0] if parameters else (), elapsed)
+                return
+            entry = self.record(statement, parameters, elapsed)
+            if self.wants_plan(entry.fingerprint, statement):
+                self._start_explain(
+                    self.explain_engine or engine, entry.fingerprint, statement, parameters
+                )
+
+        event.listen(sync, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync, "after_cursor_execute", after_cursor_execute)
+
+
+log = SlowQueryLog(settings.SLOW_QUERY_MS, settings.SLOW_QUERY_BUFFER_SIZE)
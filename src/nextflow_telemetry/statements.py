@@ -0,0 +1,40 @@
+"""Canonical SQL statements for the filtered analytics queries.
+
+The process-metrics and cohort queries splice optional filter fragments into
+their SQL (``{fc}`` in services/process_metrics.py, ``_workflow_scope`` in
+services/cohort.py). Filter *values* are always bind parameters, so the SQL
+text depends only on which filters are present — a bitmask. ``statement()``
+builds each (query, mask) text once and hands back the same ``TextClause``
+from then on:
+
+- no per-request f-string formatting, ``text()`` bind-param parsing or
+  SQLAlchemy cache-key generation beyond the first call;
+- a small, fixed set of SQL strings reaches asyncpg, so its per-connection
+  prepared-statement cache (``DB_PREPARED_STATEMENT_CACHE_SIZE``, main.py)
+  holds every analytics statement instead of evicting them. ``count()``
+  reports how many distinct statements have been built so far.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+
+from sqlalchemy import TextClause, text
+
+_registry: dict[tuple[str, Hashable], TextClause] = {}
+
+
+def statement(name: str, mask: Hashable, build: Callable[[], str]) -> TextClause:
+    """The cached statement for ``(name, mask)``; ``build`` runs only on a miss.
+
+    ``mask`` must determine the SQL ``build`` produces — callers key on the
+    filter-presence bitmask, never on filter values.
+    """
+    key = (name, mask)
+    stmt = _registry.get(key)
+    if stmt is None:
+        stmt = _registry[key] = text(build())
+    return stmt
+
+
+def count() -> int:
+    return len(_registry)
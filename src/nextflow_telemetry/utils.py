@@ -19,6 +19,11 @@ def srrs_to_sample_id(srrs: list[str]) -> str:
     return hashlib.md5(canonical.encode()).hexdigest()
 
 
+def srr_key(srr: str) -> str:
+    """Return a run accession as looked up in ``sample_accessions`` (trimmed, upper-case)."""
+    return srr.strip().upper()
+
+
 def parse_srrs(ncbi_accession: str) -> list[str]:
     """Parse a semicolon-separated SRR string into a list of accessions."""
     return [s.strip() for s in ncbi_accession.split(";") if s.strip()]
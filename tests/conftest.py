@@ -11,6 +11,7 @@ import importlib
 import os
 import sys
 from collections.abc import Generator
+from types import SimpleNamespace
 
 import pytest
 from testcontainers.postgres import PostgresContainer
@@ -64,6 +65,30 @@ def app_module(monkeypatch: pytest.MonkeyPatch):
     return module
 
 
+@pytest.fixture()
+def fresh_app(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """A fresh import of the package (DB init skipped), for tests that patch
+    module state the app reads.
+
+    ``integration_client`` re-imports the package, so a module imported at the
+    top of a test file may not be the copy ``main`` resolves. Patch the ones
+    returned here instead: ``main`` plus its ``metrics``, ``querystats``,
+    ``slowlog`` and ``admin`` (routers.admin) modules.
+    """
+    monkeypatch.setenv("TELEMETRY_SKIP_DB_INIT", "1")
+    for mod_name in list(sys.modules):
+        if mod_name.startswith("nextflow_telemetry"):
+            del sys.modules[mod_name]
+    main = importlib.import_module("nextflow_telemetry.main")
+    return SimpleNamespace(
+        main=main,
+        metrics=main.metrics,
+        querystats=main.querystats,
+        slowlog=main.slowlog,
+        admin=sys.modules["nextflow_telemetry.routers.admin"],
+    )
+
+
 # ---------------------------------------------------------------------------
 # Integration fixtures — real DB
 # ---------------------------------------------------------------------------
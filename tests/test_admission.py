@@ -0,0 +1,87 @@
+"""Route-class admission gates (pure asyncio; no DB)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from nextflow_telemetry.admission import AdmissionController, Gate, Saturated, route_class
+
+
+@pytest.mark.parametrize(
+    "method,path,expected",
+    [
+        ("POST", "/telemetry", "ingest"),
+        ("POST", "/api/runs/run-1/event", "ingest"),
+        ("GET", "/api/runs/run-1", "analytics"),
+        ("POST", "/api/dispatch/batch", "dispatch"),
+        ("POST", "/api/daemons/heartbeat", "dispatch"),
+        ("POST", "/api/task-logs", "uploads"),
+        ("POST", "/api/samples/bulk", "uploads"),
+        ("GET", "/api/task-logs/run-1/ab/12", "analytics"),
+        ("GET", "/api/metrics/processes/tasks", "analytics"),
+        ("GET", "/health", None),
+        ("GET", "/auth/me", None),
+    ],
+)
+def test_route_class(method, path, expected):
+    assert route_class(method, path) == expected
+
+
+async def test_gate_queues_then_rejects():
+    gate = Gate("analytics", limit=1, queue_depth=1, timeout=5)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with gate.admit():
+            await release.wait()
+
+    first = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert (gate.in_flight, gate.waiting) == (1, 1)
+
+    # Slot taken and queue full: fail fast.
+    with pytest.raises(Saturated):
+        async with gate.admit():
+            pass
+    assert gate.rejected == 1
+
+    release.set()
+    await asyncio.gather(first, queued)
+    assert (gate.in_flight, gate.waiting) == (0, 0)
+
+
+async def test_gate_rejects_after_queue_timeout():
+    gate = Gate("uploads", limit=1, queue_depth=4, timeout=0.01)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with gate.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(Saturated):
+        async with gate.admit():
+            pass
+    assert (gate.waiting, gate.rejected) == (0, 1)
+    release.set()
+    await holder
+
+
+def test_zero_limit_disables_gate():
+    limits = {"ingest": 0, "dispatch": 2, "uploads": 2, "analytics": 2}
+    ctl = AdmissionController(limits, dict.fromkeys(limits, 1), timeout=2.5)
+    assert ctl.gate_for("POST", "/telemetry") is None
+    assert ctl.gate_for("POST", "/api/dispatch/batch").name == "dispatch"
+    assert ctl.retry_after == 3
+    assert set(ctl.snapshot()["gates"]) == {"dispatch", "uploads", "analytics"}
+
+
+def test_limits_are_clamped_to_pool_sizes():
+    limits = {"ingest": 64, "dispatch": 2, "uploads": 0, "analytics": 16}
+    pools = {"ingest": 5, "dispatch": 3, "uploads": 4, "analytics": 8}
+    ctl = AdmissionController(limits, dict.fromkeys(limits, 1), timeout=1, pool_sizes=pools)
+    assert {name: g.limit for name, g in ctl.gates.items()} == {"ingest": 5, "dispatch": 2, "analytics": 8}
@@ -0,0 +1,103 @@
+"""Change generations and conditional GETs (sqlite for the engine hooks; no Postgres)."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from nextflow_telemetry import changes
+from nextflow_telemetry.changes import ChangeTracker, written_domains
+
+
+@pytest.mark.parametrize(
+    "sql,expected",
+    [
+        ("INSERT INTO telemetry (run_name) VALUES ($1)", {"runs"}),
+        ("UPDATE jobs SET status=$1 WHERE jobs.id = $2", {"jobs"}),
+        ('delete from "daemon_agents" where agent_id = $1', {"daemons"}),
+        ("WITH c AS (UPDATE jobs SET status='claimed' RETURNING run_name) "
+         "INSERT INTO workflow_runs SELECT * FROM c", {"jobs", "runs"}),
+        ("INSERT INTO samples (sample_id) VALUES ($1) ON CONFLICT (sample_id) DO UPDATE SET x = 1",
+         {"samples"}),
+        ("SELECT * FROM jobs WHERE status = 'pending' FOR UPDATE SKIP LOCKED", set()),
+        ("SELECT count(*) FROM workflow_runs", set()),
+    ],
+)
+def test_written_domains(sql, expected):
+    assert written_domains(sql) == expected
+
+
+def test_etag_changes_only_with_its_domains():
+    t = ChangeTracker(max_age_seconds=3600)
+    runs = t.etag_for("/api/runs/run-1")
+    daemons = t.etag_for("/api/daemons/")
+    assert runs and runs.startswith('W/"')
+    t.bump("daemons")
+    assert t.etag_for("/api/runs/run-1") == runs
+    assert t.etag_for("/api/daemons/") != daemons
+    t.bump("jobs")
+    assert t.etag_for("/api/runs") != runs
+    assert t.etag_for("/api/runsheet") is None
+    assert t.etag_for("/api/samples/facets/collections") is not None
+    assert t.etag_for("/api/samples/S1") is None
+
+
+def test_no_etag_while_a_recent_write_may_not_have_replicated():
+    t = ChangeTracker(max_age_seconds=3600)
+    t.settle_seconds = 60
+    assert t.etag_for("/api/daemons") is not None
+    t.bump("daemons")
+    assert t.etag_for("/api/daemons") is None
+    assert t.etag_for("/api/samples/facets") is not None
+
+
+def test_tracked_engine_bumps_on_commit_not_rollback():
+    t = ChangeTracker(max_age_seconds=3600)
+    engine = create_engine("sqlite://")
+    t.track(SimpleNamespace(sync_engine=engine))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE jobs (id int)"))
+
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO jobs VALUES (1)"))
+        conn.rollback()
+    assert t.generations["jobs"] == 0
+
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO jobs VALUES (2)"))
+        conn.commit()
+        # Committed but the connection is still checked out: not yet bumped.
+        assert t.generations["jobs"] == 0
+    assert t.generations["jobs"] == 1
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT * FROM jobs")).all()
+    assert sum(t.generations.values()) == 1  # reads bump nothing
+
+
+def test_conditional_get_middleware(monkeypatch):
+    import nextflow_telemetry.main as main
+
+    tracker = ChangeTracker(max_age_seconds=3600)
+    monkeypatch.setattr(changes, "tracker", tracker)
+    calls = []
+    app = FastAPI()
+    app.middleware("http")(main.conditional_get_middleware)
+
+    @app.get("/api/daemons/")
+    async def daemons():
+        calls.append(1)
+        return []
+
+    client = TestClient(app)
+    first = client.get("/api/daemons/")
+    etag = first.headers["etag"]
+    assert client.get("/api/daemons/", headers={"If-None-Match": etag}).status_code == 304
+    assert len(calls) == 1
+    tracker.bump("daemons")
+    again = client.get("/api/daemons/", headers={"If-None-Match": etag})
+    assert again.status_code == 200 and again.headers["etag"] != etag
+    assert len(calls) == 2
@@ -9,6 +9,7 @@ samples don't poison reconcile-driven tests elsewhere in the suite.
 from __future__ import annotations
 
 import asyncio
+import json
 import uuid
 from datetime import datetime, timezone
 
@@ -54,6 +55,7 @@ def cohort_data(db_url):
         text("DELETE FROM collections WHERE collection_id LIKE :p").bindparams(p=pat),
         text("DELETE FROM samples WHERE sample_id LIKE :p").bindparams(p=pat),
         text("DELETE FROM workflows WHERE workflow_id LIKE :p").bindparams(p=pat),
+        text("DELETE FROM cohort_resync_queue WHERE workflow_id LIKE :p").bindparams(p=pat),
     ]
     _run(_exec(db_url, *cleanup))
 
@@ -162,29 +164,58 @@ def _seed_telemetry_failure(
     task_hash: str = "ab/cd1234",
     exit_code: str = "1",
 ) -> None:
-    from nextflow_telemetry.db import telemetry_tbl
+    from nextflow_telemetry.db import task_executions_tbl, telemetry_tbl
 
-    _run(_exec(
-        db_url,
-        insert(telemetry_tbl).values(
-            run_id=str(uuid.uuid4()),
-            run_name=run_name,
-            event="process_completed",
-            utc_time=_ts(),
-            sample_id=sample_id,
-            workflow_id=workflow_id,
-            workflow_version=workflow_version,
-            metadata_=None,
-            trace={
-                "process": process,
-                "status": status,
-                "name": f"{process} ({sample_id})",
-                "hash": task_hash,
-                "exit": exit_code,
-                "task_id": "1",
-            },
-        ),
-    ))
+    # Mirrors TelemetryService.ingest: the raw event plus its task_executions
+    # row, which is what the cohort failure analytics read.
+    async def _do():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.begin() as conn:
+                run_id = str(uuid.uuid4())
+                now = _ts()
+                telemetry_id = (await conn.execute(
+                    insert(telemetry_tbl).values(
+                        run_id=run_id,
+                        run_name=run_name,
+                        event="process_completed",
+                        utc_time=now,
+                        sample_id=sample_id,
+                        workflow_id=workflow_id,
+                        workflow_version=workflow_version,
+                        metadata_=None,
+                        trace={
+                            "process": process,
+                            "status": status,
+                            "name": f"{process} ({sample_id})",
+                            "hash": task_hash,
+                            "exit": exit_code,
+                            "task_id": "1",
+                        },
+                    ).returning(telemetry_tbl.c.id)
+                )).scalar_one()
+                await conn.execute(
+                    insert(task_executions_tbl).values(
+                        telemetry_id=telemetry_id,
+                        run_name=run_name,
+                        run_id=run_id,
+                        sample_id=sample_id,
+                        workflow_id=workflow_id,
+                        workflow_version=workflow_version,
+                        utc_time=now,
+                        task_id="1",
+                        task_hash=task_hash,
+                        process=process,
+                        name=f"{process} ({sample_id})",
+                        status=status,
+                        attempt=1,
+                        exit_code=exit_code,
+                    )
+                )
+        finally:
+            await engine.dispose()
+
+    _run(_do())
 
 
 # ---------------------------------------------------------------------------
@@ -345,6 +376,7 @@ def test_leaderboard_ranks_cohorts_by_active_completion(integration_client, db_u
     _seed_cohort(db_url, collection_id=cid_b, sample_ids=b)
     _seed_jobs(db_url, b[0], "failed", workflow_id=wf)
     _seed_jobs(db_url, b[1], "completed", workflow_id=wf, workflow_version="9.9.9", workflow_status="retired")
+    _rebuild_progress(db_url)
 
     rows = client.get("/api/cohorts/leaderboard").json()
     by_id = {r["collection_id"]: r for r in rows}
@@ -365,6 +397,187 @@ def test_leaderboard_ranks_cohorts_by_active_completion(integration_client, db_u
     assert ordered.index(cid_b) < ordered.index(cid_a)
 
 
+def _rebuild_progress(db_url: str) -> None:
+    """The leaderboard reads the materialised cohort_progress table. The
+    _seed_* helpers write jobs/membership with plain SQL, bypassing the
+    lifecycle and add_to_collection seams that maintain it, so rebuild."""
+    from nextflow_telemetry.services import cohort_progress
+
+    async def _do():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.begin() as conn:
+                await cohort_progress.rebuild(conn)
+        finally:
+            await engine.dispose()
+
+    _run(_do())
+
+
+def test_cohort_progress_incremental_matches_rebuild(integration_client, db_url, cohort_data):
+    """Membership writes and lifecycle transitions keep cohort_progress equal
+    to a from-scratch rebuild."""
+    from nextflow_telemetry.db import jobs_tbl
+    from nextflow_telemetry.services import lifecycle
+    from nextflow_telemetry.services.collection import add_to_collection
+
+    client, _ = integration_client
+    tag = cohort_data
+    wf = f"wf-{tag}"
+    cid_a, cid_b = f"COHORT-A-{tag}", f"COHORT-B-{tag}"
+    s = [f"S-{tag}-{i}" for i in range(3)]
+    _seed_cohort(db_url, collection_id=cid_a, sample_ids=s)
+    _seed_jobs(db_url, s[0], "completed", workflow_id=wf)
+    _seed_jobs(db_url, s[1], "failed", workflow_id=wf)
+    _seed_jobs(db_url, s[2], "failed", workflow_id=wf)
+    _rebuild_progress(db_url)
+
+    async def _incremental():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.begin() as conn:
+                await add_to_collection(conn, cid_b, source="manual", sample_ids=[s[0], s[1]])
+                # Re-attaching an existing member must not double-count it.
+                await add_to_collection(conn, cid_b, source="manual", sample_ids=[s[0]])
+                job_id = (await conn.execute(
+                    select(jobs_tbl.c.id).where(jobs_tbl.c.sample_id == s[1])
+                )).scalar_one()
+                await lifecycle.requeue_dead_letter(conn, [job_id], [], _ts())
+        finally:
+            await engine.dispose()
+
+    _run(_incremental())
+
+    def _rows():
+        rows = client.get("/api/cohorts/leaderboard").json()
+        return {r["collection_id"]: r for r in rows if r["collection_id"] in (cid_a, cid_b)}
+
+    incremental = _rows()
+    assert incremental[cid_a]["samples_failed"] == 1
+    assert incremental[cid_b]["sample_count"] == 2
+    assert incremental[cid_b]["samples_completed"] == 1
+    assert incremental[cid_b]["samples_failed"] == 0
+
+    _rebuild_progress(db_url)
+    assert _rows() == incremental
+
+
+def test_cohort_progress_resync_after_status_change(integration_client, db_url, cohort_data):
+    """Pausing a workflow drops its samples from the active completion counts
+    through the background resync, without a rebuild."""
+    from nextflow_telemetry.db import workflows_tbl
+    from nextflow_telemetry.services import cohort_progress
+    from nextflow_telemetry.services.workflow import WorkflowService
+
+    client, _ = integration_client
+    tag = cohort_data
+    wf = f"wf-{tag}"
+    cid = f"COHORT-{tag}"
+    s = [f"S-{tag}-{i}" for i in range(2)]
+    _seed_cohort(db_url, collection_id=cid, sample_ids=s)
+    _seed_jobs(db_url, s[0], "completed", workflow_id=wf)
+    _seed_jobs(db_url, s[1], "completed", workflow_id=wf)
+    _rebuild_progress(db_url)
+
+    async def _pause():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.connect() as conn:
+                pk = (await conn.execute(
+                    select(workflows_tbl.c.id).where(workflows_tbl.c.workflow_id == wf)
+                )).scalar_one()
+            await WorkflowService(engine=engine).update_status(pk, "paused")
+            await cohort_progress.resync._task
+        finally:
+            await engine.dispose()
+
+    _run(_pause())
+    rows = client.get("/api/cohorts/leaderboard").json()
+    [row] = [r for r in rows if r["collection_id"] == cid]
+    assert row["samples_completed"] == 0
+
+
+def test_cohort_progress_resync_drains_a_queue_left_by_a_previous_process(
+    integration_client, db_url, cohort_data
+):
+    """A queued resync that never ran (restart) is picked up by the next drain,
+    and its queue row is removed once it has run."""
+    from nextflow_telemetry.services import cohort_progress
+
+    client, _ = integration_client
+    tag = cohort_data
+    wf = f"wf-{tag}"
+    cid = f"COHORT-{tag}"
+    sid = f"S-{tag}-0"
+    _seed_cohort(db_url, collection_id=cid, sample_ids=[sid])
+    _seed_jobs(db_url, sid, "completed", workflow_id=wf)
+    _rebuild_progress(db_url)
+    # The registry change committed, but its process died before resyncing.
+    _set_workflow_status(db_url, wf, "1.0.0", "paused")
+    _run(_exec(db_url, text("INSERT INTO cohort_resync_queue (workflow_id) VALUES (:wf)").bindparams(wf=wf)))
+
+    async def _startup():
+        engine = create_async_engine(db_url)
+        try:
+            cohort_progress.resync.schedule(engine)
+            await cohort_progress.resync._task
+            async with engine.connect() as conn:
+                return (await conn.execute(text("SELECT count(*) FROM cohort_resync_queue"))).scalar_one()
+        finally:
+            await engine.dispose()
+
+    assert _run(_startup()) == 0
+    rows = client.get("/api/cohorts/leaderboard").json()
+    [row] = [r for r in rows if r["collection_id"] == cid]
+    assert row["samples_completed"] == 0
+
+
+def test_add_members_waits_for_a_concurrent_refresh(integration_client, db_url, cohort_data):
+    """A sample completing while it is being attached is counted in the new
+    cohort: add_members queues behind the refresh's sample lock instead of
+    reading the flags the refresh is about to change."""
+    from nextflow_telemetry.services import cohort_progress
+    from nextflow_telemetry.services.collection import add_to_collection
+
+    client, _ = integration_client
+    tag = cohort_data
+    wf = f"wf-{tag}"
+    cid_a, cid_b = f"COHORT-A-{tag}", f"COHORT-B-{tag}"
+    sid = f"S-{tag}-0"
+    _seed_cohort(db_url, collection_id=cid_a, sample_ids=[sid])
+    _seed_jobs(db_url, sid, "running", workflow_id=wf)
+    _rebuild_progress(db_url)
+
+    async def _race():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.connect() as refresher, engine.connect() as attacher:
+                await refresher.begin()
+                await refresher.execute(
+                    text("UPDATE jobs SET status = 'completed', completed_at = now() "
+                         "WHERE sample_id = :sid"), {"sid": sid},
+                )
+                await cohort_progress.refresh_samples(refresher, [sid])
+
+                async def attach():
+                    async with attacher.begin():
+                        await add_to_collection(attacher, cid_b, source="manual", sample_ids=[sid])
+
+                attach_task = asyncio.create_task(attach())
+                await asyncio.sleep(0.3)
+                assert not attach_task.done()  # blocked on the sample lock
+                await refresher.commit()
+                await attach_task
+        finally:
+            await engine.dispose()
+
+    _run(_race())
+    rows = {r["collection_id"]: r for r in client.get("/api/cohorts/leaderboard").json()}
+    assert rows[cid_a]["samples_completed"] == 1
+    assert rows[cid_b]["samples_completed"] == 1
+    assert rows[cid_b]["samples_running"] == 0
+
+
 def _set_workflow_status(db_url: str, workflow_id: str, version: str, status: str) -> None:
     from nextflow_telemetry.db import workflows_tbl
 
@@ -449,3 +662,50 @@ def test_failures_returns_per_task_rows_with_task_hash(integration_client, db_ur
     assert hashes == {"aa/000001", "bb/000002"}
     sample_set = {r["sample_id"] for r in body["rows"]}
     assert sample_set == set(samples)
+
+
+def test_failure_by_process_plan_is_index_only(integration_client, db_url, cohort_data):
+    """Plan regression: the cohort failure aggregate must stay on typed
+    task_executions columns and be answered from
+    ix_task_executions_sample_status_process without heap visits."""
+    from nextflow_telemetry.services.cohort import CohortService
+
+    tag = cohort_data
+    cid = f"COHORT-{tag}"
+    wf = f"wf-{tag}"
+    samples = [f"S-{tag}-{i}" for i in range(3)]
+    _seed_cohort(db_url, collection_id=cid, sample_ids=samples)
+    for i, sid in enumerate(samples):
+        _seed_telemetry_failure(db_url, sample_id=sid, process="FETCH_READS", workflow_id=wf,
+                                run_name=f"run-{tag}-{i}")
+
+    scope = CohortService._workflow_scope("te", wf, None, False)
+    sql = CohortService._failure_by_process_sql(scope)
+
+    async def _plan():
+        engine = create_async_engine(db_url, isolation_level="AUTOCOMMIT")
+        try:
+            async with engine.connect() as conn:
+                # Index-only needs an up-to-date visibility map; tiny test
+                # tables would otherwise be seq-scanned.
+                await conn.execute(text("VACUUM ANALYZE task_executions"))
+                await conn.execute(text("SET enable_seqscan = off"))
+                await conn.execute(text("SET enable_bitmapscan = off"))
+                explained = text("EXPLAIN (FORMAT JSON) " + sql.text)
+                return (await conn.execute(explained, {"cid": cid, "workflow_id": wf})).scalar_one()
+        finally:
+            await engine.dispose()
+
+    plan = _run(_plan())
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    def _nodes(node):
+        yield node
+        for child in node.get("Plans", []):
+            yield from _nodes(child)
+
+    te_nodes = [n for n in _nodes(plan[0]["Plan"]) if n.get("Relation Name") == "task_executions"]
+    assert te_nodes, plan
+    assert all(n["Node Type"] == "Index Only Scan" for n in te_nodes), te_nodes
+    assert {n["Index Name"] for n in te_nodes} == {"ix_task_executions_sample_status_process"}
@@ -76,6 +76,28 @@ def test_import_creates_study(integration_client):
 # Idempotent re-import
 # ---------------------------------------------------------------------------
 
+def test_import_in_chunks_counts_updates_from_upsert(integration_client, monkeypatch):
+    """Chunk boundaries don't change the summary; a sample repeated within a
+    chunk is upserted once (last row wins)."""
+    import sys
+
+    client, _ = integration_client
+    monkeypatch.setattr(sys.modules["nextflow_telemetry.services.curated"], "IMPORT_CHUNK_ROWS", 2)
+    study_name = _make_study_name()
+    rows = [{"ncbi_accession": f"SRR90000{i}", "subject_id": f"S{i}", "disease": "healthy"} for i in range(5)]
+    rows.insert(1, {"ncbi_accession": "SRR900000", "subject_id": "S0-again", "disease": "IBD"})
+
+    first = _import(client, study_name, _make_tsv(rows)).json()
+    assert (first["rows_loaded"], first["rows_updated"], first["rows_dropped"]) == (5, 0, 0)
+
+    second = _import(client, study_name, _make_tsv(rows)).json()
+    assert (second["rows_loaded"], second["rows_updated"]) == (5, 5)
+
+    samples = client.get(f"/api/curated/studies/{study_name}/samples").json()
+    assert len(samples) == 5
+    assert {s["metadata"]["subject_id"] for s in samples} >= {"S0-again"}
+
+
 def test_import_idempotent(integration_client):
     """Re-importing the same study is idempotent and preserves existing metadata."""
     client, _ = integration_client
@@ -164,6 +186,23 @@ def test_import_missing_accession_column_returns_422(integration_client):
     assert resp.status_code == 422
 
 
+def test_import_late_invalid_utf8_writes_nothing(integration_client, monkeypatch):
+    """A bad byte after the first chunk is rejected before the study or any
+    chunk is committed."""
+    import sys
+
+    client, _ = integration_client
+    monkeypatch.setattr(sys.modules["nextflow_telemetry.services.curated"], "IMPORT_CHUNK_ROWS", 2)
+    study_name = _make_study_name()
+    rows = [{"ncbi_accession": f"SRR91000{i}", "subject_id": f"S{i}"} for i in range(5)]
+    tsv = _make_tsv(rows) + b"\nSRR910009\t\xff\xfe\n"
+
+    resp = _import(client, study_name, tsv)
+    assert resp.status_code == 422
+    assert "UTF-8" in resp.json()["detail"]
+    assert client.get(f"/api/curated/studies/{study_name}").status_code == 404
+
+
 # ---------------------------------------------------------------------------
 # GET /curated/studies
 # ---------------------------------------------------------------------------
@@ -283,3 +322,88 @@ def test_get_sample_annotations_empty(integration_client):
     resp = client.get("/api/curated/samples/0000000000000000000000000000000000000000")
     assert resp.status_code == 200
     assert resp.json() == []
+
+
+# ---------------------------------------------------------------------------
+# GET /curated/samples (attribute filter) and /curated/facets/{key}
+# ---------------------------------------------------------------------------
+
+def _import_cohort(client) -> str:
+    study_name = _make_study_name()
+    tsv = _make_tsv(
+        [
+            {"ncbi_accession": "SRR100001", "subject_id": "A", "disease": "IBD", "country": "USA"},
+            {"ncbi_accession": "SRR100002", "subject_id": "B", "disease": "IBD", "country": "ITA"},
+            {"ncbi_accession": "SRR100003", "subject_id": "C", "disease": "CRC", "country": "USA"},
+            {"ncbi_accession": "SRR100004", "subject_id": "D", "disease": "healthy", "country": "USA"},
+        ],
+        extra_cols=["subject_id", "disease", "country"],
+    )
+    assert _import(client, study_name, tsv).status_code == 200
+    return study_name
+
+
+def test_filter_samples_by_attributes(integration_client):
+    client, _ = integration_client
+    study_name = _import_cohort(client)
+
+    resp = client.get("/api/curated/samples", params={"attr": ["disease:IBD", "country:USA"]})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["total"] == 1
+    assert [a["metadata"]["subject_id"] for a in data["items"]] == ["A"]
+
+    # Values for one key are ORed.
+    resp = client.get(
+        "/api/curated/samples",
+        params={"attr": ["disease:IBD", "disease:CRC"], "study_name": study_name, "limit": 2},
+    )
+    data = resp.json()
+    assert data["total"] == 3
+    assert len(data["items"]) == 2
+
+
+def test_filter_samples_rejects_malformed_attr(integration_client):
+    client, _ = integration_client
+    resp = client.get("/api/curated/samples", params={"attr": "disease"})
+    assert resp.status_code == 400
+
+
+def test_facet_counts(integration_client):
+    client, _ = integration_client
+    study_name = _import_cohort(client)
+
+    resp = client.get("/api/curated/facets/disease", params={"study_name": study_name})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["total"] == 4
+    assert data["values"] == [
+        {"value": "IBD", "count": 2},
+        {"value": "CRC", "count": 1},
+        {"value": "healthy", "count": 1},
+    ]
+
+    # Scoped by other keys; a filter on the faceted key itself is ignored.
+    resp = client.get(
+        "/api/curated/facets/disease",
+        params={"attr": ["country:USA", "disease:IBD"], "study_name": study_name},
+    )
+    data = resp.json()
+    assert data["total"] == 3
+    assert {v["value"]: v["count"] for v in data["values"]} == {"IBD": 1, "CRC": 1, "healthy": 1}
+
+
+def test_facet_cache_cleared_by_import(integration_client):
+    client, _ = integration_client
+    study_name = _import_cohort(client)
+    params = {"study_name": study_name}
+    assert client.get("/api/curated/facets/country", params=params).json()["total"] == 4
+
+    tsv = _make_tsv(
+        [{"ncbi_accession": "SRR100005", "subject_id": "E", "disease": "IBD", "country": "ITA"}],
+        extra_cols=["subject_id", "disease", "country"],
+    )
+    _import(client, study_name, tsv)
+    data = client.get("/api/curated/facets/country", params=params).json()
+    assert data["total"] == 5
+    assert {v["value"]: v["count"] for v in data["values"]} == {"USA": 3, "ITA": 2}
@@ -0,0 +1,197 @@
+"""Dashboard snapshot caching and conditional GET (sections stubbed, no DB),
+plus one Postgres test that runs the real sections in the read-only snapshot
+transaction."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from nextflow_telemetry.db import (
+    collection_samples_tbl,
+    collections_tbl,
+    jobs_tbl,
+    samples_tbl,
+    workflows_tbl,
+)
+from nextflow_telemetry.responses import etag_matches
+from nextflow_telemetry.routers import dashboard
+from nextflow_telemetry.services import cohort_progress
+
+
+class FakeConn:
+    async def execution_options(self, **kw):
+        self.options = kw
+        return self
+
+    def begin(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeEngine:
+    def __init__(self):
+        self.builds = 0
+        self.conn = FakeConn()
+
+    def connect(self):
+        self.builds += 1
+        return self.conn
+
+
+class FakeMetrics:
+    def __init__(self, engine):
+        pass
+
+    async def running(self):
+        return {"generated_at_utc": "now", "total_running": 0}
+
+    async def summary(self):
+        return {"generated_at_utc": "now", "cards": {}}
+
+
+class FakeCohorts:
+    def __init__(self, engine):
+        pass
+
+    async def leaderboard(self):
+        return []
+
+
+def _client(monkeypatch, ttl):
+    state = {"samples": 1}
+
+    async def stats(conn):
+        await asyncio.sleep(0.01)
+        return dict(state)
+
+    async def agents(conn):
+        return []
+
+    async def runs(conn):
+        return {"total": 0, "runs": []}
+
+    monkeypatch.setattr(dashboard, "catalog_stats", stats)
+    monkeypatch.setattr(dashboard, "list_agents", agents)
+    monkeypatch.setattr(dashboard, "runs_page", runs)
+    monkeypatch.setattr(dashboard, "ProcessMetricsService", FakeMetrics)
+    monkeypatch.setattr(dashboard, "CohortService", FakeCohorts)
+    engine = FakeEngine()
+    app = FastAPI()
+    app.include_router(dashboard.create_dashboard_router(engine, ttl_seconds=ttl), prefix="/api")
+    return TestClient(app), engine, state
+
+
+def test_snapshot_is_shared_within_ttl_and_read_in_repeatable_read(monkeypatch):
+    client, engine, _ = _client(monkeypatch, ttl=60)
+    first = client.get("/api/dashboard/snapshot")
+    second = client.get("/api/dashboard/snapshot")
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert engine.builds == 1
+    assert engine.conn.options["isolation_level"] == "REPEATABLE READ"
+    assert "generated_at_utc" not in first.json()["running"]
+
+
+def test_if_none_match_gets_304_until_data_changes(monkeypatch):
+    client, engine, state = _client(monkeypatch, ttl=0)
+    etag = client.get("/api/dashboard/snapshot").headers["etag"]
+
+    # Rebuilt (TTL 0) with the same data: same ETag despite a new timestamp.
+    r = client.get("/api/dashboard/snapshot", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+    assert engine.builds == 2
+
+    state["samples"] = 2
+    r = client.get("/api/dashboard/snapshot", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["stats"] == {"samples": 2}
+
+
+def test_etag_matches():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+
+
+def _seed(db_url: str) -> None:
+    """One cohort of two samples, one completed under the active workflow."""
+    async def go():
+        engine = create_async_engine(db_url)
+        now = datetime.now(timezone.utc)
+        try:
+            async with engine.begin() as conn:
+                wf_pk = (await conn.execute(
+                    insert(workflows_tbl).returning(workflows_tbl.c.id).values(
+                        workflow_id="dash-wf", version="1.0.0", repository_url="https://example.org/repo",
+                        revision="main", max_retries=3, status="active",
+                        created_at=now, updated_at=now,
+                    )
+                )).scalar_one()
+                await conn.execute(insert(collections_tbl).values(
+                    collection_id="DASH-COHORT", source="manual", label="dash",
+                    created_at=now, updated_at=now,
+                ))
+                for sid in ("DASH-S1", "DASH-S2"):
+                    await conn.execute(insert(samples_tbl).values(
+                        sample_id=sid, ncbi_accession=None, created_at=now, updated_at=now,
+                    ))
+                    await conn.execute(insert(collection_samples_tbl).values(
+                        collection_id="DASH-COHORT", sample_id=sid,
+                    ))
+                await conn.execute(insert(jobs_tbl).values(
+                    sample_id="DASH-S1", workflow_pk=wf_pk, workflow_id="dash-wf",
+                    workflow_version="1.0.0", status="completed", retry_count=0,
+                    created_at=now, completed_at=now,
+                ))
+                await cohort_progress.rebuild(conn)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(go())
+
+
+def _without_timestamps(row: dict) -> dict:
+    # orjson and pydantic spell UTC differently ("+00:00" vs "Z").
+    return {k: v for k, v in row.items() if not k.endswith("_at")}
+
+
+def test_snapshot_runs_real_sections_in_read_only_transaction(integration_client, db_url):
+    """The process-metrics fan-out and the cohort leaderboard go through the
+    snapshot's single REPEATABLE READ read-only connection and agree with
+    their standalone endpoints."""
+    client, _ = integration_client
+    _seed(db_url)
+
+    r = client.get("/api/dashboard/snapshot")
+    assert r.status_code == 200
+    body = r.json()
+    assert {"stats", "running", "summary", "cohorts", "daemons", "runs"} <= set(body)
+
+    [cohort] = [c for c in body["cohorts"] if c["collection_id"] == "DASH-COHORT"]
+    assert cohort["sample_count"] == 2
+    assert cohort["samples_completed"] == 1
+    assert cohort["completion_pct"] == 50.0
+    standalone = client.get("/api/cohorts/leaderboard").json()
+    assert [_without_timestamps(c) for c in body["cohorts"]] == [_without_timestamps(c) for c in standalone]
+
+    summary = client.get("/api/metrics/processes/summary").json()
+    assert body["summary"]["cards"] == summary["cards"]
+    running = client.get("/api/metrics/processes/running").json()
+    assert body["running"]["total_running"] == running["total_running"]
+
+    again = client.get("/api/dashboard/snapshot", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,141 @@
+"""ENA filereport cache policy (real DB, fake fetch)."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from nextflow_telemetry.config import settings
+from nextflow_telemetry.db import ena_report_chunks_tbl, ena_reports_tbl
+from nextflow_telemetry.services import ena_cache
+
+_REPORT = ["run_accession\tsecondary_sample_accession", "SRR1\tSRS1", "SRR2\tSRS1"]
+
+
+class FakeEna:
+    """Counts fetches; answers 304 when the stored ETag is sent back."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    async def __call__(self, accession, meta):
+        self.calls.append(dict(meta))
+        if meta.get("etag") == '"v1"':
+            meta["status"] = 304
+            return
+        meta.update(status=200, etag='"v1"', last_modified=None)
+        for line in _REPORT:
+            yield line
+
+
+async def _lines(engine, fetch):
+    async with engine.connect() as conn:
+        return [line async for line in ena_cache.report_lines(conn, "PRJNA1", "f1", fetch)]
+
+
+async def _generations(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            select(ena_report_chunks_tbl.c.generation, func.count())
+            .group_by(ena_report_chunks_tbl.c.generation)
+            .order_by(ena_report_chunks_tbl.c.generation)
+        )).all()
+
+
+async def _age(engine, seconds):
+    async with engine.begin() as conn:
+        await conn.execute(update(ena_reports_tbl).values(
+            fetched_at=datetime.now(timezone.utc) - timedelta(seconds=seconds)))
+
+
+def test_report_is_fetched_once_then_served_and_revalidated(db_url, monkeypatch):
+    monkeypatch.setattr(settings, "ENA_CACHE_TTL_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "ENA_CACHE_MAX_STALE_SECONDS", 600.0)
+    fetch = FakeEna()
+
+    async def scenario():
+        engine = create_async_engine(db_url)
+        try:
+            # Miss → one fetch; fresh hit → none.
+            assert await _lines(engine, fetch) == _REPORT
+            assert await _lines(engine, fetch) == _REPORT
+            assert len(fetch.calls) == 1
+
+            # Stale → served from cache, refreshed in the background (304).
+            await _age(engine, 120)
+            assert await _lines(engine, fetch) == _REPORT
+            await asyncio.gather(*ena_cache._refreshing.values())
+            assert fetch.calls[-1]["etag"] == '"v1"'
+            assert len(fetch.calls) == 2
+
+            # The 304 bumped fetched_at, so the next read is a fresh hit again.
+            assert await _lines(engine, fetch) == _REPORT
+            assert len(fetch.calls) == 2
+
+            # Past max-stale → revalidated inline before serving.
+            await _age(engine, 3600)
+            assert await _lines(engine, fetch) == _REPORT
+            assert len(fetch.calls) == 3 and fetch.calls[-1]["etag"] == '"v1"'
+        finally:
+            await ena_cache.stop()
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_report_is_stored_in_chunks_and_old_generations_dropped(db_url, monkeypatch):
+    monkeypatch.setattr(settings, "ENA_CACHE_TTL_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "ENA_CACHE_MAX_STALE_SECONDS", 600.0)
+    monkeypatch.setattr(ena_cache, "CHUNK_LINES", 2)
+
+    async def fresh(accession, meta):  # no validators: every fetch is a full 200
+        meta["status"] = 200
+        for line in _REPORT:
+            yield line
+
+    async def scenario():
+        engine = create_async_engine(db_url)
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(ena_report_chunks_tbl.delete())
+                await conn.execute(ena_reports_tbl.delete())
+            assert await _lines(engine, fresh) == _REPORT
+            [(first, n)] = await _generations(engine)
+            assert n == 2  # three lines, two per chunk
+
+            await _age(engine, 3600)
+            assert await _lines(engine, fresh) == _REPORT
+            assert [g for g, _ in await _generations(engine)][0] == first  # previous kept
+            await _age(engine, 3600)
+            assert await _lines(engine, fresh) == _REPORT
+            gens = [g for g, _ in await _generations(engine)]
+            assert len(gens) == 2 and first not in gens
+            assert await _lines(engine, fresh) == _REPORT  # served from the chunks
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_empty_report_is_not_cached(db_url, monkeypatch):
+    monkeypatch.setattr(settings, "ENA_CACHE_TTL_SECONDS", 60.0)
+    calls = []
+
+    async def no_runs(accession, meta):
+        calls.append(accession)
+        meta["status"] = 204
+        return
+        yield  # pragma: no cover — makes this an async generator
+
+    async def scenario():
+        engine = create_async_engine(db_url)
+        try:
+            assert await _lines(engine, no_runs) == []
+            assert await _lines(engine, no_runs) == []
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
@@ -0,0 +1,137 @@
+"""nf-etl follow: ``watermark.pending`` exclusion (Postgres) and cmd_follow's
+wake / defer loop (fake listener and lake; no DB)."""
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import asyncpg
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from nextflow_telemetry.db import jobs_tbl, samples_tbl, workflows_tbl
+from nextflow_telemetry.etl import cli, watermark
+
+
+def test_pending_skips_ingested_and_excluded_samples(db_asyncpg_url):
+    wf = f"etl-wf-{uuid.uuid4().hex[:8]}"
+    sids = [f"S-{wf}-{i}" for i in range(4)]
+
+    async def go():
+        engine = create_async_engine(db_asyncpg_url)
+        pg = await asyncpg.connect(db_asyncpg_url.replace("+asyncpg", ""))
+        try:
+            now = datetime.now(timezone.utc)
+            async with engine.begin() as conn:
+                wf_pk = (await conn.execute(
+                    insert(workflows_tbl).returning(workflows_tbl.c.id).values(
+                        workflow_id=wf, version="1.0.0", repository_url="https://example.org/repo",
+                        revision="abc123", max_retries=3, status="active",
+                        created_at=now, updated_at=now,
+                    )
+                )).scalar_one()
+                for i, sid in enumerate(sids):
+                    await conn.execute(insert(samples_tbl).values(
+                        sample_id=sid, ncbi_accession=None, created_at=now, updated_at=now,
+                    ))
+                    await conn.execute(insert(jobs_tbl).values(
+                        sample_id=sid, workflow_pk=wf_pk, workflow_id=wf, workflow_version="1.0.0",
+                        status="completed", retry_count=0, created_at=now,
+                        completed_at=now - timedelta(minutes=10 - i),  # sids[0] oldest
+                    ))
+            await watermark.ensure_table(pg)
+            await watermark.mark_ingested(pg, sids[1], wf, "1.0.0", {})
+
+            assert await watermark.pending(pg, wf, "1.0.0") == [sids[0], sids[2], sids[3]]
+            assert await watermark.pending(pg, wf, "1.0.0", exclude=[sids[0]]) == [sids[2], sids[3]]
+            assert await watermark.pending(pg, wf, "1.0.0", limit=1, exclude=[sids[0]]) == [sids[2]]
+            assert await watermark.pending(pg, wf, "1.0.0", exclude=[]) == [sids[0], sids[2], sids[3]]
+        finally:
+            await pg.execute("DELETE FROM etl_ingested WHERE workflow_id = $1", wf)
+            await pg.close()
+            await engine.dispose()
+
+    asyncio.run(go())
+
+
+class _FakePg:
+    closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_follow_defers_unpublished_samples_and_wakes_on_notify(monkeypatch):
+    """``b`` isn't published yet: it's set aside (not re-fetched every pass)
+    until the next poll, and a completion NOTIFY wakes the loop for ``c``."""
+    backlog = ["a", "b"]
+    ingested: set[str] = set()
+    excludes: list[list[str]] = []
+    batches: list[list[str]] = []
+    listeners = []
+    pg = _FakePg()
+    con = SimpleNamespace(closed=False)
+    con.close = lambda: setattr(con, "closed", True)
+
+    async def pending(_pg, workflow, version, limit=None, exclude=None):
+        excludes.append(sorted(exclude or []))
+        return [s for s in backlog if s not in ingested and s not in (exclude or [])][:limit]
+
+    async def process(_pg, _con, sids, workflow, version, include_markers=False):
+        batches.append(list(sids))
+        ingested.update(s for s in sids if s != "b")
+        return {"samples": len(sids)}
+
+    async def listen(_pg, workflow, version, on_complete):
+        listeners.append(on_complete)
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def connect():
+        return pg
+
+    async def ingested_among(_pg, sids, workflow, version):
+        return ingested & set(sids)
+
+    async def backlog_count(_pg, workflow, version):
+        return sum(1 for s in backlog if s not in ingested)
+
+    monkeypatch.setattr(watermark, "connect", connect)
+    monkeypatch.setattr(watermark, "ensure_table", noop)
+    monkeypatch.setattr(watermark, "listen", listen)
+    monkeypatch.setattr(watermark, "pending", pending)
+    monkeypatch.setattr(watermark, "ingested_among", ingested_among)
+    monkeypatch.setattr(watermark, "backlog_count", backlog_count)
+    monkeypatch.setattr(cli.engine, "process", process)
+    monkeypatch.setattr(cli.lake, "connect", lambda: con)
+    monkeypatch.setattr(cli.lake, "ensure_schema", lambda _con: None)
+
+    args = SimpleNamespace(workflow="wf", version="1.0.0", batch=25, settle_seconds=0,
+                           poll_seconds=0.5, include_markers=False)
+
+    async def go():
+        task = asyncio.create_task(cli.cmd_follow(args))
+        await asyncio.sleep(0.1)
+        # Startup drain: a is ingested, b set aside and not re-fetched.
+        assert batches == [["a", "b"]]
+        assert excludes == [[], ["b"]]
+
+        backlog.append("c")
+        [notify] = listeners
+        notify("c")
+        await asyncio.sleep(0.1)
+        assert batches == [["a", "b"], ["c"]]
+        assert excludes[2:] == [["b"], ["b"]]  # b still set aside
+
+        await asyncio.sleep(0.6)  # past poll_seconds: b is retried
+        assert batches[2:] == [["b"]]
+        assert ingested == {"a", "c"}
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(go())
+    assert pg.closed and con.closed
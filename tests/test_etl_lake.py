@@ -0,0 +1,17 @@
+"""Lake layout checks that don't need the DuckLake extension (no network, no DB)."""
+import pytest
+
+from nextflow_telemetry.etl import lake
+
+
+def test_partition_keys_are_coarse_and_exist():
+    for table, keys in lake.PARTITION_KEYS.items():
+        assert "sample_id" not in keys  # never the small-files key
+        assert set(keys) <= set(lake.SCHEMAS[table])
+    assert lake.PARTITION_KEYS["qc_metrics"] == ("workflow", "version")
+    assert lake.PARTITION_KEYS["resistome"] == ("workflow", "version", "data_type")
+
+
+def test_compact_rejects_bad_target_size_before_touching_lake():
+    with pytest.raises(ValueError):
+        lake.compact(None, target_file_size="128MB'); DROP TABLE x; --")  # type: ignore[arg-type]
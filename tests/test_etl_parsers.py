@@ -78,3 +78,12 @@ def test_qc_maps_number_reads():
     assert qc["reads_raw"] == 48137590 and qc["reads_decontaminated"] == 47184000
     assert qc["metaphlan_index"].startswith("mpa_vJan25")
     assert qc["run_ids"] == "SRR1;SRR2" and qc["pipeline_version"] == "2.2.1"
+
+
+def test_gzip_input_streams_to_same_rows():
+    import gzip
+    assert list(P.parse_metaphlan_profile(gzip.compress(METAPHLAN))) == \
+        list(P.parse_metaphlan_profile(METAPHLAN))
+    lines = P._lines(gzip.compress(b"a\r\nb\n\nc"))
+    assert iter(lines) is lines  # lazy, not a materialized list
+    assert list(lines) == ["a", "b", "", "c"]
@@ -0,0 +1,89 @@
+"""fan_out: concurrency, connection budget, ordering and errors (no DB)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from nextflow_telemetry.config import settings
+from nextflow_telemetry.fanout import default_budget, fan_out
+
+
+class FakeEngine:
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+        self.connections = 0
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        self.open += 1
+        self.connections += 1
+        self.peak = max(self.peak, self.open)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.open -= 1
+        return False
+
+
+def _query(value, delay=0.05, log=None):
+    async def run(conn):
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(value)
+        return value
+    return run
+
+
+async def test_results_in_argument_order_and_concurrent():
+    eng = FakeEngine()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    out = await fan_out(eng, _query("a", 0.1), _query("b", 0.05), _query("c", 0.01), budget=3)
+    assert out == ["a", "b", "c"]
+    assert loop.time() - start < 0.15
+    assert eng.peak == 3
+
+
+async def test_budget_caps_connections_and_reuses_them():
+    eng = FakeEngine()
+    out = await fan_out(eng, *(_query(i, 0.01) for i in range(7)), budget=2)
+    assert out == list(range(7))
+    assert eng.peak == 2
+    assert eng.connections == 2
+
+
+async def test_budget_of_one_runs_sequentially_on_one_connection():
+    eng = FakeEngine()
+    log: list[str] = []
+    await fan_out(eng, _query("a", 0.02, log), _query("b", 0.0, log), budget=1)
+    assert log == ["a", "b"]
+    assert eng.connections == 1
+
+
+def test_default_budget_fits_the_admitted_pages_in_the_pool(monkeypatch):
+    monkeypatch.setattr(settings, "FANOUT_CONNECTIONS", 3)
+    monkeypatch.setattr(settings, "DB_POOL_SIZES", {**settings.DB_POOL_SIZES, "analytics": 8})
+    monkeypatch.setattr(settings, "ADMISSION_LIMITS", {**settings.ADMISSION_LIMITS, "analytics": 4})
+    assert default_budget() == 2
+    monkeypatch.setattr(settings, "ADMISSION_LIMITS", {**settings.ADMISSION_LIMITS, "analytics": 16})
+    assert default_budget() == 1
+    monkeypatch.setattr(settings, "ADMISSION_LIMITS", {**settings.ADMISSION_LIMITS, "analytics": 0})
+    assert default_budget() == 3  # gate disabled: nothing to share
+
+
+async def test_error_cancels_siblings_and_propagates_unchanged():
+    eng = FakeEngine()
+    log: list[str] = []
+
+    async def boom(conn):
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError, match="bad"):
+        await fan_out(eng, _query("slow", 0.2, log), boom, budget=2)
+    await asyncio.sleep(0.25)
+    assert log == []
+    assert eng.open == 0
@@ -166,6 +166,63 @@ def test_list_samples_search_and_collection_filter(integration_client):
     assert len(p1["items"]) == 1
 
 
+def test_get_by_srr_is_exact_and_tracks_reregistration(integration_client):
+    client, _ = integration_client
+    tag = uuid.uuid4().hex[:6].upper()
+    short, long_ = f"SRR{tag}1", f"SRR{tag}12"
+    client.post("/api/samples", json={"sample_id": f"S-short-{tag}", "ncbi_accession": short})
+    client.post("/api/samples", json={"sample_id": f"S-long-{tag}", "ncbi_accession": f"{long_};SRR{tag}9"})
+
+    # SRR…1 is a prefix of SRR…12: only the exact run matches.
+    assert client.get(f"/api/samples/by-srr/{short}").json()["sample_id"] == f"S-short-{tag}"
+    assert client.get(f"/api/samples/by-srr/{long_}").json()["sample_id"] == f"S-long-{tag}"
+    # Normalised like search=: surrounding space and case don't matter.
+    assert client.get(f"/api/samples/by-srr/ {long_.lower()} ").json()["sample_id"] == f"S-long-{tag}"
+
+    # search= also resolves an exact run accession.
+    found = client.get(f"/api/samples?search={long_.lower()}").json()
+    assert [x["sample_id"] for x in found["items"]] == [f"S-long-{tag}"]
+
+    # Re-registering with a different run set replaces the accession rows.
+    client.post("/api/samples", json={"sample_id": f"S-long-{tag}", "ncbi_accession": f"SRR{tag}9"})
+    assert client.get(f"/api/samples/by-srr/{long_}").status_code == 404
+    assert client.get(f"/api/samples/by-srr/SRR{tag}9").json()["sample_id"] == f"S-long-{tag}"
+
+
+def test_register_samples_bulk_ndjson_and_tsv(integration_client):
+    import json
+
+    client, _ = integration_client
+    tag = uuid.uuid4().hex[:6].upper()
+    coll = f"BULK-{tag}"
+    ndjson = "\n".join([
+        json.dumps({"sample_id": f"B-{tag}-0", "ncbi_accession": f"SRR{tag}0", "collection": coll}),
+        "{not json",
+        json.dumps({"ncbi_accession": f"SRR{tag}2;SRR{tag}1", "collection": coll}),  # derived id
+        json.dumps({"sample_id": f"B-{tag}-3", "ncbi_accession": " ; "}),
+        json.dumps({"sample_id": 4, "ncbi_accession": f"SRR{tag}4", "collection": coll}),
+    ]) + "\n"
+    resp = client.post("/api/samples/bulk", content=ndjson,
+                       headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["received"], body["created"], body["updated"], body["invalid"]) == (5, 2, 0, 3)
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "created", "invalid", "invalid"]
+    assert body["results"][4]["error"] == "sample_id must be a string"
+    derived = body["results"][2]["sample_id"]
+    assert client.get(f"/api/samples/by-srr/SRR{tag}1").json()["sample_id"] == derived
+
+    # TSV re-registration updates in place; membership is not duplicated.
+    tsv = f"sample_id\tncbi_accession\tcollection\nB-{tag}-0\tSRR{tag}0\t{coll}\n"
+    body = client.post("/api/samples/bulk", content=tsv,
+                       headers={"Content-Type": "text/tab-separated-values"}).json()
+    assert body["results"] == [{"line": 2, "sample_id": f"B-{tag}-0", "status": "updated", "error": None}]
+    facets = client.get("/api/samples/facets/collections").json()
+    assert {c["collection"]: c["count"] for c in facets["collections"]}[coll] == 2
+
+    assert client.post("/api/samples/bulk", content="x", headers={"Content-Type": "text/plain"}).status_code == 415
+
+
 def test_collection_facets(integration_client):
     client, _ = integration_client
     tag = uuid.uuid4().hex[:8]
@@ -181,6 +238,23 @@ def test_collection_facets(integration_client):
     assert counts.get(coll) == 2
 
 
+def test_collection_membership_intersection(integration_client):
+    client, _ = integration_client
+    tag = uuid.uuid4().hex[:8]
+    a, b = f"A-{tag}", f"B-{tag}"
+    for i, colls in enumerate([(a,), (a, b), (b,), (a, b)]):
+        for coll in colls:
+            client.post("/api/samples", json={"sample_id": f"SRR-int-{tag}-{i}", "ncbi_accession": f"SRR00000{i+1}", "collection": coll})
+
+    body = client.get(f"/api/samples/membership?collection={b}&collection={a}").json()
+    assert body["collections"] == sorted([a, b])
+    assert body["count"] == 2
+    assert body["sample_ids"] == [f"SRR-int-{tag}-1", f"SRR-int-{tag}-3"]
+
+    capped = client.get(f"/api/samples/membership?collection={a}&limit=1").json()
+    assert capped["count"] == 3 and len(capped["sample_ids"]) == 1
+
+
 def test_get_sample_not_found(integration_client):
     client, _ = integration_client
     resp = client.get("/api/samples/DOES_NOT_EXIST")
@@ -1054,6 +1128,25 @@ def test_admin_stats_shape_and_increments(integration_client):
     assert active_pending_after >= active_pending_before + 1
 
 
+def test_dashboard_snapshot_sections_and_etag(integration_client):
+    client, _ = integration_client
+
+    r = client.get("/api/dashboard/snapshot")
+    assert r.status_code == 200
+    body = r.json()
+    for key in ("generated_at_utc", "stats", "running", "summary", "cohorts", "daemons", "runs"):
+        assert key in body
+    assert "jobs_by_status" in body["stats"]
+    assert "runs" in body["runs"]
+    etag = r.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/dashboard/snapshot", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
 def test_retiring_workflow_purges_its_pending_jobs(integration_client):
     """#114: retiring a workflow deletes its still-pending (never-dispatched)
     jobs, so they vanish from BOTH the all-versions and active stats buckets —
@@ -0,0 +1,69 @@
+"""LakeService argument checks that fail before any DuckLake connection is made."""
+import asyncio
+
+import duckdb
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from nextflow_telemetry.routers.lake import create_lake_router
+from nextflow_telemetry.services.lake import PROFILE_TABLES, LakeService
+
+
+def _never_connect(**_kw):
+    raise AssertionError("validation should reject before connecting")
+
+
+def test_profile_tables_exist_in_lake_schema():
+    from nextflow_telemetry.etl import lake
+
+    assert set(PROFILE_TABLES) <= set(lake.SCHEMAS)
+
+
+def test_rank_filter_rejected_on_table_without_rank():
+    svc = LakeService(connect=_never_connect)
+    with pytest.raises(ValueError, match="rank"):
+        asyncio.run(svc.profile("qc_metrics", sample_id="s1", rank="species"))
+
+
+def test_unknown_table_and_method_rejected():
+    svc = LakeService(connect=_never_connect)
+    with pytest.raises(ValueError):
+        asyncio.run(svc.profile("marker_presence", sample_id="s1"))
+    with pytest.raises(ValueError):
+        asyncio.run(svc.matrix("kraken", "parquet"))
+    with pytest.raises(ValueError):
+        asyncio.run(svc.matrix("metaphlan", "csv"))
+
+
+def test_result_cache_is_bounded_by_rows():
+    svc = LakeService(cache_rows=400, connect=_never_connect)
+    svc._pin = lambda cur, force=False: 1  # type: ignore[method-assign]
+    cur = duckdb.connect()
+
+    def rows(n):
+        return svc._cached_rows(cur, ("range", n), lambda sid: ("SELECT * FROM range(?)", [n]))
+
+    assert len(rows(101)["rows"]) == 101  # over a quarter of the budget: not kept
+    assert not svc._cache
+    for n in (100, 99, 98, 97, 96):
+        rows(n)
+    assert svc._cached_total == 99 + 98 + 97 + 96  # oldest (100) evicted
+    assert list(svc._cache) == [(1, "range", n) for n in (99, 98, 97, 96)]
+
+
+class _EmptyLake:
+    async def snapshot(self, refresh=False):
+        raise LookupError("the lake has no snapshots")
+
+    async def profile(self, table, **filters):
+        raise LookupError("the lake has no snapshots")
+
+
+def test_empty_lake_is_404_not_500():
+    app = FastAPI()
+    app.include_router(create_lake_router(_EmptyLake()), prefix="/api")  # type: ignore[arg-type]
+    client = TestClient(app)
+    assert client.get("/api/lake/snapshot").status_code == 404
+    assert client.get("/api/lake/samples/s1/qc_metrics").status_code == 404
+    assert client.get("/api/lake/studies/st/qc_metrics").status_code == 404
@@ -278,6 +278,52 @@ def test_complete_sample_does_not_flip_a_failed_job(db_asyncpg_url):
     _run(go())
 
 
+def test_complete_sample_notifies_listeners_on_commit_only(db_asyncpg_url):
+    import asyncio
+    import json
+
+    import asyncpg
+
+    async def go():
+        engine = create_async_engine(db_asyncpg_url)
+        listener = await asyncpg.connect(db_asyncpg_url.replace("+asyncpg", ""))
+        heard: asyncio.Queue[str] = asyncio.Queue()
+        await listener.add_listener(
+            lifecycle.JOB_COMPLETED_CHANNEL, lambda *args: heard.put_nowait(args[3])
+        )
+        try:
+            wf_pk = await _seed_workflow(engine)
+            sample_id = await _seed_sample(engine)
+            run_name = f"run-{uuid.uuid4().hex[:8]}"
+            await _seed_job(engine, workflow_pk=wf_pk, sample_id=sample_id,
+                            status="running", run_name=run_name)
+            async with engine.connect() as conn:
+                wf_id = (await conn.execute(
+                    select(workflows_tbl.c.workflow_id).where(workflows_tbl.c.id == wf_pk)
+                )).scalar_one()
+            now = datetime.now(timezone.utc)
+
+            # Rolled back: nobody hears about it.
+            async with engine.connect() as conn:
+                await conn.begin()
+                assert await lifecycle.complete_sample(conn, run_name, sample_id, now) == 1
+                await conn.rollback()
+            await asyncio.sleep(0.2)
+            assert heard.empty()
+
+            async with engine.begin() as conn:
+                await lifecycle.complete_sample(conn, run_name, sample_id, now)
+            payload = await asyncio.wait_for(heard.get(), timeout=5)
+            assert json.loads(payload) == {
+                "sample_id": sample_id, "workflow_id": wf_id, "workflow_version": "1.0.0",
+            }
+        finally:
+            await listener.close()
+            await engine.dispose()
+
+    _run(go())
+
+
 def test_mark_running_duplicate_started_does_not_rewrite_timing(db_asyncpg_url):
     async def go():
         engine = create_async_engine(db_asyncpg_url)
@@ -0,0 +1,116 @@
+"""In-process membership index: bitset algebra and commit/rollback application.
+
+Pure tests — the index is filled through ``apply`` and a sqlite connection
+stands in for the Postgres one, so no database container is needed.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+
+from nextflow_telemetry.services import membership
+from nextflow_telemetry.services.membership import MembershipIndex
+
+
+def _loaded(ops) -> MembershipIndex:
+    idx = MembershipIndex()
+    idx.loaded_at = time.monotonic()
+    idx.apply(ops)
+    return idx
+
+
+def test_facets_and_intersection():
+    idx = _loaded([
+        (None, ["s0", "s1", "s2", "s3"]),
+        ("A", ["s0", "s1", "s3"]),
+        ("B", ["s1", "s2", "s3"]),
+        ("C", ["s2"]),
+    ])
+    assert idx.total == 4
+    assert idx.facets() == [
+        {"collection": "A", "count": 3},
+        {"collection": "B", "count": 3},
+        {"collection": "C", "count": 1},
+    ]
+    both = idx.intersection(["A", "B"])
+    assert both.bit_count() == 2
+    assert idx.sample_ids(both) == ["s1", "s3"]
+    assert idx.sample_ids(both, limit=1) == ["s1"]
+    assert idx.intersection(["A", "nope"]) == 0
+    assert idx.intersection([]) == 0
+
+
+def test_apply_is_idempotent_and_appends_new_samples():
+    idx = _loaded([("A", ["s0"])])
+    idx.apply([("A", ["s0", "s1"]), (None, ["s1"])])
+    assert idx.total == 2
+    assert idx.facets() == [{"collection": "A", "count": 2}]
+
+
+def test_unloaded_index_ignores_writes_and_defers_to_sql():
+    idx = MembershipIndex()
+    idx.apply([("A", ["s0"])])
+    assert idx.total == 0
+    assert asyncio.run(idx.ensure_fresh(engine=None)) is False  # type: ignore[arg-type]
+
+
+class _FakeConn:
+    """Serves the load's two scans; a write lands between them."""
+
+    def __init__(self, idx, samples, members, during):
+        self.idx, self.results, self.during = idx, [samples, members], during
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        rows = self.results.pop(0)
+        if not self.results:
+            self.idx.apply(self.during)
+        return SimpleNamespace(tuples=lambda: iter(rows))
+
+
+def test_reload_runs_in_background_and_keeps_concurrent_writes(monkeypatch):
+    monkeypatch.setattr(membership.settings, "MEMBERSHIP_INDEX_TTL_SECONDS", 0.0)
+    idx = _loaded([("A", ["s0"])])
+    conn = _FakeConn(idx, [("s0",)], [("A", "s0")], [("B", ["s1"])])
+    engine = SimpleNamespace(connect=lambda: conn)
+
+    async def run():
+        assert await idx.ensure_fresh(engine) is True  # answers before reloading
+        assert idx.facets() == [{"collection": "A", "count": 1}]
+        await idx._reload
+
+    asyncio.run(run())
+    # The write committed mid-scan isn't in the scanned rows but survives the swap.
+    assert idx.facets() == [{"collection": "A", "count": 1}, {"collection": "B", "count": 1}]
+    assert idx.total == 2
+
+
+def test_recorded_writes_apply_on_commit_only(monkeypatch):
+    idx = _loaded([])
+    monkeypatch.setattr(membership, "index", idx)
+    engine = create_engine("sqlite://")
+    with engine.connect() as sync_conn:
+        # record_* only touch AsyncConnection.sync_connection.
+        conn = SimpleNamespace(sync_connection=sync_conn)
+
+        sync_conn.begin()
+        membership.record_members(conn, "A", ["s0"])
+        sync_conn.rollback()
+        assert idx.facets() == []
+
+        sync_conn.begin()
+        membership.record_members(conn, "A", ["s1"])
+        membership.record_samples(conn, ["s2"])
+        assert idx.facets() == []  # not yet committed
+        sync_conn.commit()
+
+    assert idx.facets() == [{"collection": "A", "count": 1}]
+    assert idx.total == 2
@@ -0,0 +1,100 @@
+"""Prometheus registry, exposition format and hot-path instrumentation (no DB)."""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from nextflow_telemetry import metrics
+from nextflow_telemetry.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_render_text_format():
+    reg = Registry()
+    c = reg.add(Counter("events_total", "Events.", ("event",)))
+    g = reg.add(Gauge("depth", "Depth."))
+    h = reg.add(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    c.inc("started")
+    c.inc("started", amount=2)
+    c.inc('we"ird\n')
+    g.set(3)
+    for v in (0.05, 0.1, 0.5, 7.0):
+        h.observe(v, "/api/runs/{run_name}")
+
+    lines = asyncio.run(reg.render()).splitlines()
+    assert "# TYPE events_total counter" in lines
+    assert 'events_total{event="started"} 3' in lines
+    assert 'events_total{event="we\\"ird\\n"} 1' in lines
+    assert "depth 3" in lines
+    # Buckets are cumulative and upper-inclusive.
+    route = 'route="/api/runs/{run_name}"'
+    assert f'latency_seconds_bucket{{{route},le="0.1"}} 2' in lines
+    assert f'latency_seconds_bucket{{{route},le="1"}} 3' in lines
+    assert f'latency_seconds_bucket{{{route},le="+Inf"}} 4' in lines
+    assert f"latency_seconds_sum{{{route}}} 7.65" in lines
+    assert f"latency_seconds_count{{{route}}} 4" in lines
+
+
+def test_failed_scrape_hook_does_not_fail_the_scrape():
+    reg = Registry()
+    g = reg.add(Gauge("depth", "Depth."))
+
+    async def broken():
+        raise RuntimeError("db down")
+
+    async def ok():
+        g.set(1)
+
+    reg.on_scrape(broken)
+    reg.on_scrape(ok)
+    assert "depth 1" in asyncio.run(reg.render())
+
+
+def test_unknown_weblog_events_share_one_series(monkeypatch):
+    counter = Counter("weblog_events_total", "", ("event",))
+    monkeypatch.setattr(metrics, "weblog_events", counter)
+    metrics.count_weblog_event("process_completed")
+    metrics.count_weblog_event("made-up-1")
+    metrics.count_weblog_event("made-up-2")
+    assert counter.values == {("process_completed",): 1, ("other",): 2}
+
+
+def test_request_latency_is_labelled_by_route_template(fresh_app, monkeypatch):
+    hist = Histogram("http_request_duration_seconds", "", ("method", "route", "status"))
+    monkeypatch.setattr(fresh_app.metrics, "http_request_seconds", hist)
+    app = FastAPI()
+    app.middleware("http")(fresh_app.main.access_log_middleware)
+
+    @app.get("/api/runs/{run_name}")
+    async def run(run_name: str):
+        return {}
+
+    client = TestClient(app)
+    client.get("/api/runs/r1")
+    client.get("/api/runs/r2")
+    client.get("/api/nope")
+    assert hist.series[("GET", "/api/runs/{run_name}", "200")][-1] == 2
+    assert hist.series[("GET", "<unmatched>", "404")][-1] == 1
+
+
+def test_instrumented_pool_keeps_its_label_across_recreate():
+    pool = metrics.InstrumentedPool(lambda: sqlite3.connect(":memory:"), pool_size=1)
+    pool.metrics_name = "ingest"
+    assert pool.recreate().metrics_name == "ingest"
+
+
+async def test_loop_lag_monitor_sees_a_blocked_loop(monkeypatch):
+    hist = Histogram("lag", "", buckets=(0.05,))
+    monkeypatch.setattr(metrics, "loop_lag_seconds", Gauge("event_loop_lag_seconds", ""))
+    monkeypatch.setattr(metrics, "loop_lag_hist", hist)
+    monitor = metrics.LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0)
+    time.sleep(0.1)  # hold the loop past the probe's deadline
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    counts = hist.series[()]
+    assert counts[1] == 1  # exactly one sample above 50ms
@@ -51,6 +51,70 @@ def test_normalize_window_passes_through_when_until_supplied():
     assert out == (None, None)
 
 
+# ---------------------------------------------------------------------------
+# Canonical statements: SQL text depends only on which filters are present
+# ---------------------------------------------------------------------------
+
+class _RecordingEngine:
+    """Stands in for AsyncEngine: records executed statements, returns no rows."""
+
+    def __init__(self):
+        self.executed = []
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+        return self
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return []
+
+
+def test_filter_clause_mask_tracks_presence_not_values():
+    svc = ProcessMetricsService(engine=None)
+    m1, fc1, p1 = svc._filter_clause(window_days=7, run_name="a", status="FAILED")
+    m2, fc2, p2 = svc._filter_clause(window_days=30, run_name="b", status="COMPLETED")
+    assert m1 == m2 and fc1 == fc2
+    assert fc1 == " and t.utc_time >= now() - make_interval(days => :window_days)" \
+                  " and t.run_name = :run_name and t.status = :status"
+    assert p1 == {"window_days": 7, "run_name": "a", "status": "FAILED"}
+    assert p2["run_name"] == "b"
+    assert svc._filter_clause(window_days=7)[0] != m1
+    assert svc._filter_clause()[1] == ""
+
+
+def test_filter_clause_still_validates():
+    svc = ProcessMetricsService(engine=None)
+    with pytest.raises(ValueError):
+        svc._filter_clause(window_days=1, window_hours=1)
+    with pytest.raises(ValueError):
+        svc._filter_clause(window_hours=0)
+
+
+async def test_tasks_reuses_one_statement_per_filter_mask():
+    eng = _RecordingEngine()
+    svc = ProcessMetricsService(engine=eng)
+    await svc.tasks(run_name="a", process="ALIGN")
+    await svc.tasks(run_name="b", process="SORT")
+    await svc.tasks(run_name="b")
+    (s1, p1), (s2, p2), (s3, _) = eng.executed
+    assert s1 is s2
+    assert s3 is not s1
+    assert "t.process = :process" in s1.text and "t.process" not in s3.text.split("where")[1]
+    assert (p1["process"], p2["process"]) == ("ALIGN", "SORT")
+
+
 # ---------------------------------------------------------------------------
 # Service-level integration: bare call returns window_days=7 in payload
 # ---------------------------------------------------------------------------
@@ -0,0 +1,77 @@
+"""Per-request SQL stats on the access log (sqlite for the engine hooks; no Postgres)."""
+from __future__ import annotations
+
+import logging
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from nextflow_telemetry import querystats
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    querystats.instrument(SimpleNamespace(sync_engine=engine))
+    return engine
+
+
+def test_statements_are_counted_only_inside_a_sampled_request():
+    engine = _engine()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # no request: not attributed
+
+        stats, token = querystats.begin(sample_rate=1.0)
+        try:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                              "WHERE i < 20000) SELECT count(*) FROM n"))
+        finally:
+            querystats.end(token)
+        conn.execute(text("SELECT 1"))
+
+    assert stats.statements == 2
+    assert 0 < stats.slowest_seconds <= stats.db_seconds
+    fields = stats.log_fields()
+    assert fields["db_statements"] == 2
+    assert fields["db_slowest_sql"].startswith("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL")
+
+
+def test_unsampled_requests_collect_nothing():
+    assert querystats.begin(sample_rate=0) == (None, None)
+    assert querystats.current() is None
+
+
+def test_access_log_carries_db_fields(fresh_app, monkeypatch):
+    main = fresh_app.main
+    monkeypatch.setattr(fresh_app.querystats.settings, "QUERY_STATS_SAMPLE_RATE", 1.0)
+    engine = create_engine("sqlite://")
+    fresh_app.querystats.instrument(SimpleNamespace(sync_engine=engine))
+    app = FastAPI()
+    app.middleware("http")(main.access_log_middleware)
+
+    @app.get("/api/things")
+    async def things():
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+        return []
+
+    # Capture on main's logger: importing main reconfigures logging, which
+    # drops caplog's handler.
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler(logging.INFO)
+    handler.emit = records.append  # type: ignore[method-assign]
+    level = main.logger.level
+    main.logger.addHandler(handler)
+    main.logger.setLevel(logging.INFO)
+    try:
+        TestClient(app).get("/api/things")
+    finally:
+        main.logger.removeHandler(handler)
+        main.logger.setLevel(level)
+    rec = next(r for r in records if r.getMessage() == "http.request")
+    assert rec.db_statements == 3
+    assert rec.db_slowest_sql == "SELECT 1"
+    assert rec.db_ms >= 0 and rec.db_pool_wait_ms >= 0
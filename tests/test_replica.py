@@ -0,0 +1,89 @@
+"""Read-replica routing decisions (fake engines; no DB)."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from nextflow_telemetry import replica
+from nextflow_telemetry.replica import ReadEngine, replay_lag
+
+
+class FakeEngine:
+    """Answers the lag probe with ``lag`` (or raises when it's an exception)."""
+
+    def __init__(self, lag=0.0) -> None:
+        self.lag = lag
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, _stmt):
+        row = _probe(replay_age=self.lag)
+
+        class Result:
+            def one(self):
+                return row
+
+        return Result()
+
+
+def _probe(*, in_recovery=True, replayed_all=False, replay_age=0.0, receipt_age=0.0):
+    return SimpleNamespace(
+        in_recovery=in_recovery, replayed_all=replayed_all,
+        replay_age=replay_age, receipt_age=receipt_age,
+    )
+
+
+async def test_reads_use_replica_only_after_a_good_probe():
+    primary, rep = FakeEngine(), FakeEngine(lag=0.5)
+    eng = ReadEngine(primary, rep, max_lag_seconds=5)
+    assert eng.pick() is primary  # not probed yet
+
+    await eng.check()
+    assert eng.pick() is rep
+
+    rep.lag = 60.0
+    await eng.check()
+    assert eng.pick() is primary
+
+    rep.lag = OSError("replica down")
+    await eng.check()
+    assert eng.lag_seconds is None
+    assert eng.pick() is primary
+
+
+async def test_strong_consistency_reads_primary():
+    primary, rep = FakeEngine(), FakeEngine(lag=0.0)
+    eng = ReadEngine(primary, rep)
+    await eng.check()
+    token = replica.consistency.set("strong")
+    try:
+        assert eng.pick() is primary
+    finally:
+        replica.consistency.reset(token)
+    assert eng.pick() is rep
+
+
+def test_without_replica_everything_reads_primary():
+    primary = FakeEngine()
+    eng = ReadEngine(primary)
+    assert eng.pick() is primary
+    assert eng.connect() is primary
+
+
+def test_replayed_all_counts_as_caught_up_only_while_streaming():
+    # Idle primary, receiver streaming: the old replay timestamp isn't lag.
+    assert replay_lag(_probe(replayed_all=True, replay_age=3600, receipt_age=10), 60) == 0
+    # Receiver disconnected: replay has caught up with a frozen receive LSN.
+    assert replay_lag(_probe(replayed_all=True, replay_age=3600, receipt_age=None), 60) == 3600
+    # Streaming, but nothing heard from the primary for too long.
+    assert replay_lag(_probe(replayed_all=True, replay_age=3600, receipt_age=300), 60) == 3600
+    assert replay_lag(_probe(replayed_all=None, replay_age=None, receipt_age=None), 60) == float("inf")
+    assert replay_lag(_probe(in_recovery=False, replay_age=None), 60) == 0
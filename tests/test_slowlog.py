@@ -0,0 +1,120 @@
+"""Slow-query ring buffer, fingerprints and EXPLAIN capture (sqlite / fakes; no Postgres)."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from nextflow_telemetry.slowlog import SlowQueryLog, fingerprint, normalize, params_shape
+
+
+def test_normalize_folds_literals_params_and_in_lists():
+    a = normalize("SELECT *\n  FROM jobs WHERE status = 'pending' AND id IN ($1, $2, $3) LIMIT 50")
+    b = normalize("SELECT * FROM jobs WHERE status = 'failed' AND id IN ($1, $2) LIMIT 10")
+    assert a == "SELECT * FROM jobs WHERE status = ? AND id IN (...) LIMIT ?"
+    assert fingerprint(a) == fingerprint(b)
+    assert normalize("SELECT t2.x FROM t2") == "SELECT t2.x FROM t2"
+
+
+def test_params_shape_hides_values():
+    assert params_shape(("S1", 7, ["a", "b"], None)) == ["str", "int", "list[2]", "NoneType"]
+    assert params_shape({"x": 1.5}) == ["float"]
+
+
+def test_snapshot_aggregates_by_fingerprint():
+    log = SlowQueryLog(threshold_ms=100, size=3)
+    for ms in (120, 300, 200, 900):
+        log.record("SELECT * FROM jobs WHERE id = $1", (1,), ms / 1000)
+    log.record("SELECT 1", (), 0.5)
+
+    snap = log.snapshot()
+    assert snap["buffered"] == 3 and snap["capacity"] == 3  # oldest two dropped
+    jobs, one = snap["queries"]
+    assert jobs["sql"] == "SELECT * FROM jobs WHERE id = ?"
+    assert (jobs["count"], jobs["p50_ms"], jobs["p95_ms"], jobs["max_ms"]) == (2, 200.0, 900.0, 900.0)
+    assert jobs["params"] == ["int"] and jobs["plan"] is None
+    assert one["count"] == 1
+    assert "plan" not in log.snapshot(include_plans=False)["queries"][0]
+
+
+def test_tracked_engine_records_only_slow_statements():
+    log = SlowQueryLog(threshold_ms=20, size=10)
+    engine = create_engine("sqlite://")
+    log.track(SimpleNamespace(sync_engine=engine))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                          "WHERE i < 300000) SELECT count(*) FROM n"))
+    [entry] = log.entries
+    assert entry.sql.startswith("WITH RECURSIVE n(i) AS (SELECT ? UNION ALL")
+    assert entry.duration_ms >= 20
+
+
+def test_explain_goes_to_explain_engine_and_skips_temp_tables(monkeypatch):
+    log = SlowQueryLog(threshold_ms=20, size=10)
+    engine = create_engine("sqlite://")
+    tracked = SimpleNamespace(sync_engine=engine)
+    log.track(tracked)
+    log.explain_engine = analytics = SimpleNamespace()
+    started = []
+    monkeypatch.setattr(log, "_start_explain", lambda eng, fp, stmt, params: started.append((eng, stmt)))
+    slow = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+            "WHERE i < 300000) SELECT count(*) FROM n")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TEMP TABLE _staged (i int)"))
+        conn.execute(text(slow + ", _staged"))
+        conn.execute(text(slow))
+    assert log.temp_tables == {"_staged"}
+    assert len(log.entries) == 2  # both recorded
+    [(eng, stmt)] = started  # only the one without the temp table planned
+    assert eng is analytics and "_staged" not in stmt
+
+
+class _ExplainConn:
+    def __init__(self):
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt))
+
+    async def exec_driver_sql(self, sql, params):
+        self.statements.append(sql)
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Node Type": "Seq Scan"}}])
+
+
+async def test_explain_runs_in_the_background_once_per_fingerprint():
+    log = SlowQueryLog(threshold_ms=1, size=10)
+    conn = _ExplainConn()
+    engine = SimpleNamespace(connect=lambda: conn)
+    stmt = "SELECT * FROM jobs WHERE id = $1"
+    entry = log.record(stmt, (1,), 0.5)
+
+    assert log.wants_plan(entry.fingerprint, stmt)
+    log._start_explain(engine, entry.fingerprint, stmt, (1,))
+    assert not log.wants_plan(entry.fingerprint, stmt)  # one in flight
+    for task in list(log._tasks):
+        await task
+
+    assert conn.statements[-1] == "EXPLAIN (ANALYZE off, FORMAT JSON) " + stmt
+    assert log.snapshot()["queries"][0]["plan"] == [{"Plan": {"Node Type": "Seq Scan"}}]
+    assert not log.wants_plan(entry.fingerprint, stmt)  # planned recently
+    assert not log.wants_plan("other", "SET search_path TO x")
+
+
+def test_admin_endpoint(fresh_app, monkeypatch):
+    log = fresh_app.slowlog.SlowQueryLog(threshold_ms=100, size=10)
+    log.record("SELECT 1", (), 0.25)
+    monkeypatch.setattr(fresh_app.slowlog, "log", log)
+    app = FastAPI()
+    app.include_router(fresh_app.admin.create_admin_router(engine=None), prefix="/api")
+    body = TestClient(app).get("/api/admin/slow-queries?include_plans=false").json()
+    assert body["threshold_ms"] == 100
+    assert body["queries"][0]["p95_ms"] == 250.0
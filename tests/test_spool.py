@@ -0,0 +1,130 @@
+"""Weblog spool: durability, ordering and recovery (no DB; fake ingest)."""
+from __future__ import annotations
+
+import asyncio
+import os
+
+from sqlalchemy.exc import OperationalError
+
+from nextflow_telemetry.models import Telemetry
+from nextflow_telemetry.services import spool as spool_mod
+from nextflow_telemetry.services.spool import WeblogSpool
+
+
+def _event(run_name: str, n: int) -> Telemetry:
+    return Telemetry.model_validate({
+        "runId": f"id-{run_name}",
+        "runName": run_name,
+        "event": f"e{n}",
+        "utcTime": "2024-01-01T00:00:00Z",
+        "trace": {"n": n},
+    })
+
+
+class Recorder:
+    def __init__(self, fail_first: int = 0) -> None:
+        self.seen: list[tuple[str, str]] = []
+        self.fail_first = fail_first
+
+    async def __call__(self, event: Telemetry) -> None:
+        if self.fail_first:
+            self.fail_first -= 1
+            raise OperationalError("select 1", {}, ConnectionRefusedError())
+        self.seen.append((event.run_name, event.event))
+
+
+async def _until(cond, timeout: float = 5.0) -> None:
+    async def wait() -> None:
+        while not cond():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), timeout)
+
+
+_real_sleep = asyncio.sleep
+
+
+async def _fast_sleep(delay: float) -> None:
+    await _real_sleep(min(delay, 0.001))
+
+
+def _spool(tmp_path, segment_bytes: int = 1 << 20) -> WeblogSpool:
+    return WeblogSpool(str(tmp_path), segment_bytes=segment_bytes, fsync_seconds=0.001)
+
+
+async def test_append_then_drain_preserves_per_run_order(tmp_path):
+    sp = _spool(tmp_path)
+    assert sp.open()
+    rec = Recorder()
+    sp.start_drainer(rec)
+    await asyncio.gather(*(sp.append(_event(run, n)) for n in range(5) for run in ("a", "b")))
+    await _until(lambda: len(rec.seen) == 10)
+    await sp.close()
+
+    for run in ("a", "b"):
+        assert [e for r, e in rec.seen if r == run] == [f"e{n}" for n in range(5)]
+    assert sp.backlog_bytes() == 0
+
+
+async def test_undrained_events_survive_restart(tmp_path):
+    sp = _spool(tmp_path)
+    assert sp.open()
+    for n in range(3):
+        await sp.append(_event("a", n))
+    await sp.close()  # never drained
+    # A crash mid-write leaves a torn final line; recovery drops it.
+    seg = sorted(p for p in os.listdir(tmp_path) if p.endswith(".log"))[-1]
+    with open(tmp_path / seg, "ab") as f:
+        f.write(b'{"runId": "torn')
+
+    sp = _spool(tmp_path)
+    assert sp.open()
+    rec = Recorder()
+    sp.start_drainer(rec)
+    await _until(lambda: len(rec.seen) == 3)
+    await sp.append(_event("a", 3))
+    await _until(lambda: len(rec.seen) == 4)
+    await sp.close()
+    assert rec.seen == [("a", f"e{n}") for n in range(4)]
+
+    # Checkpointed: a third process replays nothing.
+    sp = _spool(tmp_path)
+    assert sp.open()
+    rec = Recorder()
+    sp.start_drainer(rec)
+    await asyncio.sleep(0.1)
+    await sp.close()
+    assert rec.seen == []
+
+
+async def test_transient_failures_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(spool_mod.asyncio, "sleep", _fast_sleep)
+    sp = _spool(tmp_path)
+    assert sp.open()
+    rec = Recorder(fail_first=3)
+    sp.start_drainer(rec)
+    await sp.append(_event("a", 0))
+    await _until(lambda: rec.seen == [("a", "e0")])
+    await sp.close()
+
+
+async def test_segments_roll_over_and_are_removed_once_drained(tmp_path):
+    sp = _spool(tmp_path, segment_bytes=200)
+    assert sp.open()
+    for n in range(6):
+        await sp.append(_event("a", n))
+    assert len([p for p in os.listdir(tmp_path) if p.endswith(".log")]) > 1
+    rec = Recorder()
+    sp.start_drainer(rec)
+    await _until(lambda: len(rec.seen) == 6)
+    await _until(lambda: len([p for p in os.listdir(tmp_path) if p.endswith(".log")]) == 1)
+    await sp.close()
+    assert rec.seen == [("a", f"e{n}") for n in range(6)]
+
+
+async def test_second_process_cannot_share_directory(tmp_path):
+    first = _spool(tmp_path)
+    assert first.open()
+    second = _spool(tmp_path)
+    assert not second.open()
+    assert not second.active
+    await first.close()
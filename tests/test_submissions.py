@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import asyncio
 
+import httpx
 import pytest
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -15,6 +16,7 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from nextflow_telemetry.db import (
     collection_samples_tbl,
     collections_tbl,
+    sample_accessions_tbl,
     samples_tbl,
     submissions_tbl,
 )
@@ -32,6 +34,14 @@ _ENA_ROWS = [
 ]
 
 
+def _fake_stream(rows):
+    """Stand-in for the streamed ENA report."""
+    async def stream(accession, conn):
+        for r in rows:
+            yield r
+    return stream
+
+
 def _run(coro):
     return asyncio.run(coro)
 
@@ -46,10 +56,7 @@ async def _scalar(db_url, stmt):
 
 
 def test_submission_registers_and_is_idempotent(db_url, monkeypatch):
-    async def fake_fetch(accession):
-        return _ENA_ROWS
-
-    monkeypatch.setattr(sub_mod, "_fetch_runs", fake_fetch)
+    monkeypatch.setattr(sub_mod, "_stream_runs", _fake_stream(_ENA_ROWS))
 
     async def scenario():
         engine = create_async_engine(db_url)
@@ -108,10 +115,7 @@ def test_composition_in_receipt(db_url, monkeypatch):
                  library_source="METAGENOMIC", instrument_platform="ILLUMINA")
             for r in _ENA_ROWS]
 
-    async def fake_fetch(accession):
-        return rows
-
-    monkeypatch.setattr(sub_mod, "_fetch_runs", fake_fetch)
+    monkeypatch.setattr(sub_mod, "_stream_runs", _fake_stream(rows))
 
     async def scenario():
         engine = create_async_engine(db_url)
@@ -128,10 +132,7 @@ def test_composition_in_receipt(db_url, monkeypatch):
 
 
 def test_dry_run_previews_without_writing(db_url, monkeypatch):
-    async def fake_fetch(accession):
-        return _ENA_ROWS
-
-    monkeypatch.setattr(sub_mod, "_fetch_runs", fake_fetch)
+    monkeypatch.setattr(sub_mod, "_stream_runs", _fake_stream(_ENA_ROWS))
 
     async def scenario():
         engine = create_async_engine(db_url)
@@ -168,3 +169,102 @@ def test_bad_accession_records_failed_submission(db_url):
         submissions_tbl.c.accession == "SRR999"))) == "failed"
     assert _run(_scalar(db_url, select(submissions_tbl.c.samples_added).where(
         submissions_tbl.c.accession == "SRR999"))) is None
+
+
+def test_staged_grouping_matches_reference_across_chunks(db_url, monkeypatch):
+    # Runs of one SRA sample arrive far apart and chunks are tiny, so grouping
+    # only works if it happens over the whole staged report.
+    rows = []
+    for i in range(7):
+        for srs in ("SRS10", "SRS11", "SRS12"):
+            rows.append({"run_accession": f"SRR{srs[3:]}{i}", "secondary_sample_accession": srs,
+                         "sample_accession": f"SAMN{srs[3:]}", "study_accession": "PRJNA9",
+                         "secondary_study_accession": "SRP9"})
+    rows.append({"run_accession": "", "secondary_sample_accession": "SRS13"})  # no run: skipped
+    monkeypatch.setattr(sub_mod, "_stream_runs", _fake_stream(rows))
+    monkeypatch.setattr(sub_mod, "RUN_CHUNK", 2)
+    monkeypatch.setattr(sub_mod, "MEMBERSHIP_CHUNK", 2)
+    expected = {s["sample_id"]: s for s in sub_mod._group_samples(rows, "PRJNA9")}
+
+    async def scenario():
+        engine = create_async_engine(db_url)
+        try:
+            r = await SubmissionService(engine=engine).register_from_accession(
+                "PRJNA9", submitted_by="a@b.c")
+            async with engine.connect() as conn:
+                got = {row.sample_id: row for row in await conn.execute(select(samples_tbl))}
+                sub = (await conn.execute(select(submissions_tbl))).mappings().one()
+                n_acc = (await conn.execute(
+                    select(func.count()).select_from(sample_accessions_tbl))).scalar_one()
+            return r, got, sub, n_acc
+        finally:
+            await engine.dispose()
+
+    r, got, sub, n_acc = _run(scenario())
+    assert r["samples_found"] == r["samples_added"] == 3
+    assert set(got) == set(expected)
+    for sid, s in expected.items():
+        assert got[sid].ncbi_accession == s["ncbi_accession"]
+        assert got[sid].biosample_id == s["biosample_id"]
+        assert got[sid].metadata_ == s["metadata"]
+    assert n_acc == 21
+    assert (sub["status"], sub["samples_added"], sub["metadata_"]) == ("succeeded", 3, None)
+
+
+def test_failure_mid_stream_writes_no_samples(db_url, monkeypatch):
+    async def broken_stream(accession, conn):
+        yield _ENA_ROWS[0]
+        raise httpx.ReadTimeout("ENA went away")
+
+    monkeypatch.setattr(sub_mod, "_stream_runs", broken_stream)
+    monkeypatch.setattr(sub_mod, "RUN_CHUNK", 1)
+
+    async def scenario():
+        engine = create_async_engine(db_url)
+        try:
+            with pytest.raises(httpx.HTTPError):
+                await SubmissionService(engine=engine).register_from_accession(
+                    "PRJNA1", submitted_by="a@b.c")
+        finally:
+            await engine.dispose()
+
+    _run(scenario())
+
+    # The staged chunk was rolled back with the transaction; the row opened
+    # for progress is closed out as failed.
+    assert _run(_scalar(db_url, select(func.count()).select_from(samples_tbl))) == 0
+    assert _run(_scalar(db_url, select(submissions_tbl.c.status))) == "failed"
+
+
+def test_stream_is_closed_when_staging_fails(monkeypatch):
+    """A COPY that raises closes the run stream before _stage_runs returns,
+    while its connection is still checked out (no DB)."""
+    from types import SimpleNamespace
+
+    closed: list[bool] = []
+
+    async def stream(accession, conn):
+        try:
+            for r in _ENA_ROWS:
+                yield r
+        finally:
+            closed.append(True)
+
+    async def copy_fails(*args, **kwargs):
+        raise OSError("COPY failed")
+
+    class Conn:
+        async def execute(self, *args):
+            pass
+
+        async def get_raw_connection(self):
+            return SimpleNamespace(driver_connection=SimpleNamespace(copy_records_to_table=copy_fails))
+
+    async def scenario():
+        with pytest.raises(OSError):
+            await SubmissionService(engine=None)._stage_runs(Conn(), Conn(), "PRJNA1", "sub-1")
+        return list(closed)  # before the loop's shutdown would finalize it
+
+    monkeypatch.setattr(sub_mod, "_stream_runs", stream)
+    monkeypatch.setattr(sub_mod, "RUN_CHUNK", 1)
+    assert _run(scenario()) == [True]